@@ -1,11 +1,22 @@
+# Imported first so the startup clock covers every other import.
+from utils.startup import report_requested, startup
+
 import tkinter as tk
 from gui.main_window import MainWindow
 
+startup.mark("imports")
+
+
 def main():
     root = tk.Tk()
     root.title("Personal Expense Tracker")
     root.geometry("1000x1020")
-    MainWindow(root)
+
+    def started():
+        if report_requested():
+            print(startup.report(), flush=True)
+
+    MainWindow(root, on_started=started)
     root.mainloop()
 
 if __name__ == "__main__":
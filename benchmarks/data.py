@@ -0,0 +1,133 @@
+# Deterministic synthetic ledgers for the benchmarks: the same (size, seed)
+# always yields the same rows, so timings from different runs and machines
+# are measured against identical data.
+import random
+from datetime import date as Date, timedelta
+
+# name -> (transactions, years of history they are spread over)
+SIZES = {
+    "10k": (10_000, 3),
+    "100k": (100_000, 10),
+    "1m": (1_000_000, 20),
+}
+
+SEED = 2024
+
+# Every ledger ends on this day, whatever its size.
+END_DATE = Date(2025, 12, 31)
+
+# (category, weight, typical amount) - the form's categories plus a few more.
+EXPENSE_CATEGORIES = [
+    ("Food", 30, 350),
+    ("Transport", 15, 200),
+    ("Fuel", 6, 1500),
+    ("Cloth", 5, 1800),
+    ("Loan", 2, 12000),
+    ("Rent", 1, 18000),
+    ("Bills", 6, 2200),
+    ("Health", 4, 900),
+    ("Shopping", 10, 1400),
+    ("Entertainment", 6, 600),
+    ("Other", 5, 500),
+]
+
+INCOME_CATEGORIES = [("Salary", 5, 85000), ("Trading", 3, 6000), ("Other", 2, 2000)]
+
+PAYMENT_METHODS = ["Cash", "Card", "UPI", "Wallet"]
+PAYMENT_WEIGHTS = [20, 30, 45, 5]
+
+TAGS = [
+    "weekend", "office", "family", "travel", "gift", "online",
+    "subscription", "emergency", "festival", "friends",
+]
+
+# Share of rows that are income.
+INCOME_SHARE = 0.08
+
+# Share of expenses paid in USD, and the INR per USD the monthly rates
+# drift between.
+USD_SHARE = 0.05
+USD_RATE_RANGE = (70.0, 92.0)
+
+BATCH_SIZE = 5000
+
+
+def generate(count, years, seed=SEED):
+    # Yields count rows in date order, spread evenly over `years`, shaped
+    # for Repository.add_transactions: (date, amount, type, category,
+    # payment_method, tags, currency, fingerprint).
+    rng = random.Random(seed)
+    days = years * 365
+    start = END_DATE - timedelta(days=days - 1)
+
+    expense_names = [c for c, _, _ in EXPENSE_CATEGORIES]
+    expense_weights = [w for _, w, _ in EXPENSE_CATEGORIES]
+    expense_amounts = {c: a for c, _, a in EXPENSE_CATEGORIES}
+    income_names = [c for c, _, _ in INCOME_CATEGORIES]
+    income_weights = [w for _, w, _ in INCOME_CATEGORIES]
+    income_amounts = {c: a for c, _, a in INCOME_CATEGORIES}
+
+    for i in range(count):
+        day = start + timedelta(days=i * days // count)
+
+        if rng.random() < INCOME_SHARE:
+            txn_type = "income"
+            category = rng.choices(income_names, income_weights)[0]
+            typical = income_amounts[category]
+        else:
+            txn_type = "expense"
+            category = rng.choices(expense_names, expense_weights)[0]
+            typical = expense_amounts[category]
+
+        amount = typical * rng.lognormvariate(0, 0.5)
+        currency = "INR"
+        if txn_type == "expense" and rng.random() < USD_SHARE:
+            amount, currency = amount / USD_RATE_RANGE[1], "USD"
+        payment = rng.choices(PAYMENT_METHODS, PAYMENT_WEIGHTS)[0]
+        tags = ", ".join(rng.sample(TAGS, rng.choice((0, 0, 0, 1, 1, 2))))
+
+        yield (
+            day.isoformat(), round(amount, 2), txn_type, category, payment, tags,
+            currency, None,
+        )
+
+
+def usd_rates(years, seed=SEED):
+    # One (currency, date, rate) per month of the history, for add_rates.
+    rng = random.Random(seed)
+    low, high = USD_RATE_RANGE
+    first = END_DATE.year - years + 1
+    months = years * 12
+
+    rates = []
+    for i in range(months):
+        rate = low + (high - low) * i / months + rng.uniform(-1, 1)
+        rates.append(("USD", Date(first + i // 12, i % 12 + 1, 1).isoformat(), round(rate, 4)))
+    return rates
+
+
+def batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def populate(repo, size, seed=SEED):
+    # Loads the ledger for a SIZES key plus monthly USD rates, a budget per
+    # expense category and one recurring rule; returns the number of rows
+    # inserted.
+    count, years = SIZES[size]
+    inserted = repo.add_transactions(batches(generate(count, years, seed)))
+    repo.add_rates([usd_rates(years, seed)])
+    for category, _, typical in EXPENSE_CATEGORIES:
+        repo.set_budget(category, "monthly", typical * 25, rollover=category == "Food")
+    repo.add_recurring_rule(
+        "Rent", "FREQ=MONTHLY;BYMONTHDAY=1", END_DATE.replace(day=1).isoformat(),
+        (18000.0, "expense", "Rent", "UPI", ""),
+    )
+    return inserted
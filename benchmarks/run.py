@@ -0,0 +1,354 @@
+# Benchmarks for every Repository method plus the list / dashboard refresh
+# paths, on synthetic ledgers from benchmarks.data.
+#
+#   python -m benchmarks.run                          # 10k + 100k, compare
+#   python -m benchmarks.run --sizes 1m --db-dir /tmp/bench
+#   python -m benchmarks.run --update-baseline
+#   xvfb-run python -m benchmarks.run                 # GUI cases, no display
+#
+# Every case is timed cold: the query cache is dropped before each run, so
+# the numbers are SQLite + Python, not dictionary lookups. Results are
+# written as JSON and each case's median is compared against the stored
+# baseline; the exit status is 1 if anything regressed, if a case has no
+# baseline entry to compare with, or if the GUI cases could not run (pass
+# --no-gui to leave them out).
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.data import END_DATE, SEED, SIZES, populate
+from db import models
+from db.repository import Repository
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+REPEAT = 5
+
+# A case regresses when its median is this many times the baseline's...
+THRESHOLD = 1.5
+# ...and at least this many ms slower, so sub-millisecond noise is ignored.
+NOISE_MS = 1.0
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        models.get_pool().cache.invalidate()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "runs": repeat,
+    }
+
+
+# ======================================================
+# REPOSITORY CASES
+# ======================================================
+# name -> fn(repo); the part before ":" is the Repository method exercised.
+# Read-only cases run first, the ones that write last.
+def repository_cases(repo):
+    year, month = str(END_DATE.year), "6"
+    middle = repo.fetch_page(year=str(END_DATE.year - 1), limit=1)[0]
+    after = (middle[1], middle[0])
+
+    def stream():
+        for _ in repo.iter_transactions():
+            pass
+
+    def add_delete():
+        change = repo.add_transaction(
+            (END_DATE.isoformat(), 250.0, "expense", "Food", "UPI", "weekend")
+        )
+        repo.delete_transaction(change.row[0])
+
+    def bulk_insert():
+        rows = [
+            (END_DATE.isoformat(), 10.0, "expense", "Food", "Cash", "", "INR", f"bench-{i}")
+            for i in range(1000)
+        ]
+        repo.add_transactions([rows])
+        models.get_connection().execute(
+            "DELETE FROM transactions WHERE fingerprint LIKE 'bench-%'"
+        )
+        models.get_connection().commit()
+
+    def budget_roundtrip():
+        budget_id = repo.set_budget("Bench", "yearly", 1000.0)
+        repo.delete_budget(budget_id)
+
+    def rule_roundtrip():
+        rule_id = repo.add_recurring_rule(
+            "Bench", "FREQ=WEEKLY", END_DATE.isoformat(),
+            (1.0, "expense", "Other", "Cash", ""),
+        )
+        repo.add_recurring_occurrences([], [rule_id], END_DATE.isoformat())
+        repo.delete_recurring_rule(rule_id)
+
+    def rates_roundtrip():
+        repo.add_rates([[("EUR", END_DATE.isoformat(), 90.0)]])
+        models.get_connection().execute("DELETE FROM exchange_rates WHERE currency = 'EUR'")
+        models.get_connection().commit()
+
+    return {
+        "fetch_transactions:all": lambda: repo.fetch_transactions(),
+        "fetch_transactions:month": lambda: repo.fetch_transactions(month, year),
+        "fetch_page:first": lambda: repo.fetch_page(),
+        "fetch_page:deep": lambda: repo.fetch_page(after=after),
+        "fetch_page:month": lambda: repo.fetch_page(month, year),
+        "fetch_page:search-rare": lambda: repo.fetch_page(search="loan"),
+        "fetch_page:search-common": lambda: repo.fetch_page(search="u"),
+        "iter_transactions": stream,
+        "fetch_years": lambda: repo.fetch_years(),
+        "get_total": lambda: repo.get_total("expense"),
+        "get_total:month": lambda: repo.get_total("expense", month, year),
+        "get_expense_by_category": lambda: repo.get_expense_by_category(),
+        "fetch_transactions_filtered": lambda: repo.fetch_transactions_filtered(),
+        "dashboard_snapshot:all": lambda: repo.dashboard_snapshot(),
+        "dashboard_snapshot:month": lambda: repo.dashboard_snapshot(month, year),
+        "dashboard_snapshot:all-usd": lambda: repo.dashboard_snapshot(currency="USD"),
+        "dashboard_snapshot:month-usd": lambda: repo.dashboard_snapshot(month, year, "USD"),
+        "get_total:usd": lambda: repo.get_total("expense", currency="USD"),
+        "rate_table": lambda: repo.rate_table(),
+        "missing_rates": lambda: repo.missing_rates(),
+        "fetch_tags": lambda: repo.fetch_tags(),
+        "fetch_by_tags:any": lambda: repo.fetch_by_tags(["gift", "festival"]),
+        "fetch_by_tags:all": lambda: repo.fetch_by_tags(["gift", "festival"], "all"),
+        "get_spend_by_tag": lambda: repo.get_spend_by_tag(),
+        "fetch_budgets": lambda: repo.fetch_budgets(),
+        "fetch_budget_spending": lambda: repo.fetch_budget_spending(),
+        "fetch_budget_spending:usd": lambda: repo.fetch_budget_spending("USD"),
+        "fetch_recurring_rules": lambda: repo.fetch_recurring_rules(),
+        "add_transaction+delete_transaction": add_delete,
+        "add_transactions:1000": bulk_insert,
+        "set_budget+delete_budget": budget_roundtrip,
+        "add_recurring_rule+add_recurring_occurrences+delete_recurring_rule": rule_roundtrip,
+        "add_rates": rates_roundtrip,
+    }
+
+
+def uncovered_methods(cases):
+    covered = set()
+    for name in cases:
+        covered.update(name.split(":")[0].split("+"))
+
+    public = {
+        name
+        for name in dir(Repository)
+        if not name.startswith("_") and callable(getattr(Repository, name))
+    }
+    return sorted(public - covered)
+
+
+# ======================================================
+# GUI CASES (REAL TK; NEEDS A DISPLAY, E.G. xvfb-run)
+# ======================================================
+def gui_cases(repeat):
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"gui": f"skipped, no display ({e})"}
+
+    try:
+        from gui.reports import ReportsWindow
+        from gui.transaction_list import TransactionList
+
+        # Without an executor both views read inline, so each timing covers
+        # the query plus the widget work it triggers.
+        list_view = TransactionList(tk.Frame(root))
+        reports = ReportsWindow(tk.Frame(root))
+        root.update()
+
+        def refresh_list():
+            list_view.refresh()
+            root.update_idletasks()
+
+        def build_dashboard():
+            reports.build_dashboard()
+            root.update_idletasks()
+
+        def reload_dashboard():
+            reports.load_data()
+            root.update_idletasks()
+
+        return {
+            "TransactionList.refresh": measure(refresh_list, repeat),
+            "ReportsWindow.build_dashboard": measure(build_dashboard, repeat),
+            "ReportsWindow.load_data": measure(reload_dashboard, repeat),
+        }
+    finally:
+        root.destroy()
+
+
+# ======================================================
+# ONE LEDGER SIZE
+# ======================================================
+def run_size(size, repeat, db_dir, gui=True):
+    path = os.path.join(db_dir, f"bench-{size}.db")
+    models.configure(path)
+    models.init_db()
+    repo = Repository()
+
+    result = {}
+    count = models.get_connection().execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    if count != SIZES[size][0]:
+        # Reused --db-dir files are only trusted when complete.
+        models.close_pool()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        models.configure(path)
+        models.init_db()
+
+        start = time.perf_counter()
+        populate(repo, size)
+        result["populate"] = {"median_ms": round((time.perf_counter() - start) * 1000, 3), "runs": 1}
+
+    cases = repository_cases(repo)
+    for name, fn in cases.items():
+        result[name] = measure(fn, repeat)
+
+    if gui:
+        result.update(gui_cases(repeat))
+
+    models.close_pool()
+    return result, list(cases)
+
+
+# ======================================================
+# BASELINE COMPARISON
+# ======================================================
+# Returns (size, case, baseline_ms, current_ms) for every regression.
+def compare(results, baseline, threshold=THRESHOLD, noise_ms=NOISE_MS):
+    regressions = []
+    for size, cases in results.get("results", {}).items():
+        base_cases = baseline.get("results", {}).get(size, {})
+        for name, timing in cases.items():
+            base = base_cases.get(name)
+            if not isinstance(timing, dict) or not isinstance(base, dict):
+                continue
+            if name == "populate" or "median_ms" not in base:
+                continue
+
+            now, then = timing["median_ms"], base["median_ms"]
+            if now > then * threshold and now - then > noise_ms:
+                regressions.append((size, name, then, now))
+    return regressions
+
+
+# Returns (size, case) for every timed case the baseline has no entry for;
+# such a case would otherwise pass without ever being compared.
+def missing_baseline(results, baseline):
+    missing = []
+    for size, cases in results.get("results", {}).items():
+        base_cases = baseline.get("results", {}).get(size, {})
+        for name, timing in cases.items():
+            if name == "populate" or not isinstance(timing, dict):
+                continue
+            if "median_ms" not in base_cases.get(name, {}):
+                missing.append((size, name))
+    return missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the repository and views.")
+    parser.add_argument("--sizes", default="10k,100k", help=f"comma-separated, of {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--out", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--no-gui", action="store_true")
+    parser.add_argument("--db-dir", help="keep (and reuse) the generated databases here")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": SEED,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    benchmarked = set()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_dir = args.db_dir or tmp
+        os.makedirs(db_dir, exist_ok=True)
+
+        for size in sizes:
+            print(f"== {size} ==", flush=True)
+            timings, cases = run_size(size, args.repeat, db_dir, gui=not args.no_gui)
+            benchmarked.update(cases)
+            results["results"][size] = timings
+            for name, timing in timings.items():
+                if isinstance(timing, dict):
+                    print(f"  {name:<40} {timing['median_ms']:>10.2f} ms")
+                else:
+                    print(f"  {name:<40} {timing}")
+
+    # Over every size run, not just the last one.
+    uncovered = uncovered_methods(benchmarked)
+    if uncovered:
+        print(f"Repository methods without a benchmark: {', '.join(uncovered)}")
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    # Asked-for GUI cases that did not run are a failure, not a pass; a
+    # baseline recorded without them could never check them.
+    skipped = [size for size, timings in results["results"].items() if "gui" in timings]
+    if skipped:
+        print(
+            f"GUI cases skipped for {', '.join(skipped)}: run under xvfb-run, "
+            "or pass --no-gui to leave them out."
+        )
+        return 1
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    for size, name, then, now in regressions:
+        print(f"REGRESSION {size} {name}: {then:.2f} ms -> {now:.2f} ms")
+    missing = missing_baseline(results, baseline)
+    for size, name in missing:
+        print(f"NO BASELINE {size} {name}: re-record with --update-baseline")
+    if regressions or missing:
+        return 1
+
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,221 @@
+from collections import namedtuple
+
+import numpy as np
+
+from db.money import from_minor, to_minor
+
+PERIODS = ("monthly", "yearly")
+
+# Utilization from which a budget warns; spending past the limit exceeds it.
+WARN_AT = 0.8
+
+OK, WARNING, EXCEEDED = 0, 1, 2
+ALERT_LABELS = {OK: "ok", WARNING: "warning", EXCEEDED: "exceeded"}
+
+Budget = namedtuple("Budget", ["id", "category", "period", "limit", "rollover"])
+
+# One budget in one period. available is the limit plus whatever rolled
+# over from earlier periods; month is None for yearly budgets. spent and
+# available are Decimal.
+BudgetStatus = namedtuple(
+    "BudgetStatus",
+    ["budget", "year", "month", "spent", "available", "utilization", "alert"],
+)
+
+
 def check_budget(spent, limit):
-return spent > limit
\ No newline at end of file
+    # Works on scalars and, elementwise, on NumPy arrays.
+    return spent > limit
+
+
+# ======================================================
+# PERIOD INDEXES (SAME NUMBERING AS fetch_budget_spending)
+# ======================================================
+def period_index(period, year, month):
+    if period == "monthly":
+        return year * 12 + month - 1
+    return year
+
+
+def period_bounds(period, index):
+    if period == "monthly":
+        return index // 12, index % 12 + 1
+    return index, None
+
+
+# ======================================================
+# VECTORIZED EVALUATION
+# ======================================================
+# group/periods/spent are flat arrays sorted by (group, period), one element
+# per budget-period with spending; limits/rollovers are indexed by group.
+# Rollover budgets accrue one limit per period from their first period with
+# spending, so what is available in period p is
+#     limit * (p - first + 1) - spent before p
+# which is a cumulative sum restarted at each group. Money arrays are int64
+# minor units, so the sums and the comparisons against limits are exact.
+def evaluate(group, periods, spent, limits, rollovers):
+    if not len(group):
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int8)
+
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    counts = np.diff(np.r_[starts, len(group)])
+
+    running = np.cumsum(spent)
+    offset = np.repeat(running[starts] - spent[starts], counts)
+    spent_before = running - spent - offset
+    first = np.repeat(periods[starts], counts)
+
+    limit = limits[group]
+    accrued = limit * (periods - first + 1) - spent_before
+    available = np.where(rollovers[group], accrued, limit)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(available > 0, spent / available, np.inf)
+
+    alert = np.select(
+        [check_budget(spent, available), utilization >= WARN_AT],
+        [EXCEEDED, WARNING],
+        OK,
+    ).astype(np.int8)
+    return available, utilization, alert
+
+
+class _Series:
+    # Evaluated history of one budget: parallel arrays ordered by period.
+    __slots__ = ("periods", "spent", "available", "utilization", "alert")
+
+    def __init__(self, periods, spent, available, utilization, alert):
+        self.periods = periods
+        self.spent = spent
+        self.available = available
+        self.utilization = utilization
+        self.alert = alert
+
+
+class BudgetEngine:
+    # Utilization and alerts for every budget in every period.
+    #
+    # Built from two reads (definitions + one grouped spending query) and
+    # evaluated in one vectorized pass. After that, apply(change) folds a
+    # single added/deleted transaction into the budgets of its category only
+    # and re-evaluates just those histories, so a save costs O(periods of
+    # one budget) however many budgets and years there are.
+    def __init__(self, budgets, spending):
+        self.budgets = {}
+        self._by_category = {}
+        self._series = {}
+
+        for row in budgets:
+            budget = Budget(*row)
+            self.budgets[budget.id] = budget
+            self._by_category.setdefault(budget.category, []).append(budget)
+
+        ids = list(self.budgets)
+        position = {budget_id: i for i, budget_id in enumerate(ids)}
+        limits = np.array([to_minor(self.budgets[i].limit) for i in ids], dtype=np.int64)
+        rollovers = np.array([bool(self.budgets[i].rollover) for i in ids])
+
+        spending = [r for r in spending if r[0] in position]
+        group = np.array([position[r[0]] for r in spending], dtype=np.int64)
+        periods = np.array([r[1] for r in spending], dtype=np.int64)
+        spent = np.array([to_minor(r[2]) for r in spending], dtype=np.int64)
+
+        columns = (periods, spent) + evaluate(group, periods, spent, limits, rollovers)
+
+        # Split the flat result into one series per budget.
+        bounds = np.searchsorted(group, np.arange(len(ids) + 1))
+        for i, budget_id in enumerate(ids):
+            lo, hi = bounds[i], bounds[i + 1]
+            self._series[budget_id] = _Series(*(c[lo:hi].copy() for c in columns))
+
+    @classmethod
+    def load(cls, repo):
+        return cls(repo.fetch_budgets(), repo.fetch_budget_spending())
+
+    # ======================================================
+    # INCREMENTAL UPDATE (ONE TRANSACTION)
+    # ======================================================
+    def apply(self, change):
+        # Returns the ids of the budgets that changed.
+        _, date, amount, txn_type, category = change.row[:5]
+        budgets = self._by_category.get(category or "", ())
+        if txn_type != "expense" or date is None or not budgets:
+            return []
+
+        delta = to_minor(amount) if change.op == "insert" else -to_minor(amount)
+        year, month = int(date[:4]), int(date[5:7])
+
+        for budget in budgets:
+            series = self._series[budget.id]
+            index = period_index(budget.period, year, month)
+
+            i = np.searchsorted(series.periods, index)
+            if i < len(series.periods) and series.periods[i] == index:
+                series.spent[i] += delta
+            else:
+                series.periods = np.insert(series.periods, i, index)
+                series.spent = np.insert(series.spent, i, delta)
+
+            self._reevaluate(budget, series)
+
+        return [b.id for b in budgets]
+
+    def _reevaluate(self, budget, series):
+        group = np.zeros(len(series.periods), dtype=np.int64)
+        series.available, series.utilization, series.alert = evaluate(
+            group,
+            series.periods,
+            series.spent,
+            np.array([to_minor(budget.limit)], dtype=np.int64),
+            np.array([bool(budget.rollover)]),
+        )
+
+    # ======================================================
+    # QUERIES
+    # ======================================================
+    def status(self, budget_id, year, month):
+        budget = self.budgets[budget_id]
+        series = self._series[budget_id]
+        index = period_index(budget.period, year, month)
+        year, month = period_bounds(budget.period, index)
+
+        i = np.searchsorted(series.periods, index)
+        if i < len(series.periods) and series.periods[i] == index:
+            return self._status_at(budget, series, i)
+
+        # Nothing spent yet in this period.
+        available = to_minor(budget.limit)
+        if budget.rollover and i > 0:
+            first = int(series.periods[0])
+            available = available * (index - first + 1) - int(series.spent[:i].sum())
+
+        nothing, available = from_minor(0), from_minor(available)
+        if available > 0:
+            return BudgetStatus(budget, year, month, nothing, available, 0.0, OK)
+        return BudgetStatus(budget, year, month, nothing, available, float("inf"), EXCEEDED)
+
+    def period_status(self, year, month):
+        # Every budget in the period containing (year, month), most used first.
+        statuses = [self.status(b, year, month) for b in self.budgets]
+        return sorted(statuses, key=lambda s: s.utilization, reverse=True)
+
+    def alerts(self, year, month):
+        return [s for s in self.period_status(year, month) if s.alert != OK]
+
+    def history(self, budget_id):
+        budget = self.budgets[budget_id]
+        series = self._series[budget_id]
+        for i in range(len(series.periods)):
+            yield self._status_at(budget, series, i)
+
+    def _status_at(self, budget, series, i):
+        year, month = period_bounds(budget.period, int(series.periods[i]))
+        return BudgetStatus(
+            budget,
+            year,
+            month,
+            from_minor(int(series.spent[i])),
+            from_minor(int(series.available[i])),
+            float(series.utilization[i]),
+            int(series.alert[i]),
+        )
@@ -1,2 +1,92 @@
-def apply_recurring():
-pass # extension hook
\ No newline at end of file
+import logging
+from collections import namedtuple
+from datetime import date as Date, datetime, timedelta
+from itertools import islice
+
+from db.recurrence import parse_rule
+from db.repository import Repository
+
+log = logging.getLogger("expenses.recurring")
+
+RecurringRule = namedtuple(
+    "RecurringRule",
+    [
+        "id", "name", "rrule", "dtstart", "amount", "type", "category",
+        "payment_method", "tags", "currency", "last_run",
+    ],
+)
+
+
+# ======================================================
+# OCCURRENCES (LAZY)
+# ======================================================
+def occurrences(rule, after=None, until=None):
+    # Occurrence dates (ISO strings) strictly after `after` and up to and
+    # including `until`; either bound may be None. Generated one at a time,
+    # so open-ended rules are safe to iterate.
+    recurrence = parse_rule(rule.rrule, rule.dtstart)
+    if after is None:
+        dates = iter(recurrence)
+    else:
+        dates = recurrence.xafter(datetime.fromisoformat(after), inc=False)
+
+    for occurrence in dates:
+        day = occurrence.date().isoformat()
+        if until is not None and day > until:
+            return
+        yield day
+
+
+def preview(rule, start=None, count=None):
+    # Upcoming (date, amount, type, category, payment_method, tags, currency)
+    # rows of a rule from `start` (default today) on, without touching the
+    # database.
+    start = start or Date.today().isoformat()
+    after = (Date.fromisoformat(start) - timedelta(days=1)).isoformat()
+
+    rows = (
+        (
+            day, rule.amount, rule.type, rule.category, rule.payment_method,
+            rule.tags, rule.currency,
+        )
+        for day in occurrences(rule, after=after)
+    )
+    return rows if count is None else islice(rows, count)
+
+
+# ======================================================
+# CATCH-UP (ONE BATCHED TRANSACTION)
+# ======================================================
+def apply_recurring(repo=None, today=None):
+    # Materializes every occurrence due since each rule's last run, up to
+    # and including today, with a single executemany insert; returns how
+    # many transactions were created. Safe to call repeatedly: last_run
+    # moves forward in the same transaction and (rule_id, date) is unique.
+    # A stored rule that no longer parses is logged and left for later, so
+    # it cannot stop startup or the other rules.
+    repo = repo or Repository()
+    today = today or Date.today().isoformat()
+    rules = [RecurringRule(*r) for r in repo.fetch_recurring_rules()]
+
+    due = []
+    for rule in rules:
+        if rule.dtstart > today or (rule.last_run or "") >= today:
+            continue
+        try:
+            parse_rule(rule.rrule, rule.dtstart)
+        except ValueError as e:
+            log.warning("skipping recurring rule %s (%s): %s", rule.id, rule.name, e)
+            continue
+        due.append(rule)
+    if not due:
+        return 0
+
+    def rows():
+        for rule in due:
+            for day in occurrences(rule, after=rule.last_run, until=today):
+                yield (
+                    rule.id, day, rule.amount, rule.type, rule.category,
+                    rule.payment_method, rule.tags, rule.currency,
+                )
+
+    return repo.add_recurring_occurrences(rows(), [r.id for r in due], today)
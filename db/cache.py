@@ -0,0 +1,94 @@
+import functools
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = 256
+
+
+class QueryCache:
+    # Bounded LRU of Repository read results, keyed by (method, args).
+    #
+    # Every entry belongs to a data version. Our own write paths bump it
+    # through invalidate(); commits from other connections or processes are
+    # noticed through PRAGMA data_version, which SQLite changes on a
+    # connection whenever somebody else commits to the file.
+    #
+    # Cached values are shared between callers: treat them as read-only.
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        with self._lock:
+            self._bump()
+
+    def _bump(self):
+        self.version += 1
+        self._entries.clear()
+
+    # ======================================================
+    # LOOKUP / STORE
+    # ======================================================
+    def lookup(self, conn, key):
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+
+        with self._lock:
+            # Connections are kept referenced so their id() cannot be reused.
+            seen = self._seen.get(id(conn))
+            if seen is None or seen[1] != data_version:
+                self._seen[id(conn)] = (conn, data_version)
+                self._bump()
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key], self.version
+
+            self.misses += 1
+            return False, None, self.version
+
+    def store(self, key, value, version):
+        with self._lock:
+            # A write landed while the query ran: the value may be stale.
+            if version != self.version:
+                return
+
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def cached_query(method):
+    # Memoize a Repository read method in its pool's QueryCache.
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self._cache()
+        key = (name, args, tuple(sorted(kwargs.items())))
+
+        hit, value, version = cache.lookup(self._connection(), key)
+        if hit:
+            return value
+
+        value = method(self, *args, **kwargs)
+        cache.store(key, value, version)
+        return value
+
+    return wrapper
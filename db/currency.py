@@ -0,0 +1,131 @@
+# Currencies and exchange rates.
+#
+# Amounts are stored in the currency they were entered in
+# (transactions.currency). exchange_rates holds how many BASE_CURRENCY units
+# one unit of a currency is worth, from its date until the next dated rate
+# for that currency; before the first one, the first rate applies. Rates
+# are bulk-loaded from CSV files with currency,date,rate lines:
+#
+#   python -m db.currency load rates.csv [path/to/expenses.db]
+#
+# The Repository's aggregates convert inside their SQL (rate lookups are
+# primary-key seeks on exchange_rates, skipped for rows already in the
+# reporting currency); RateTable below serves single conversions in Python.
+import argparse
+import csv
+import sys
+from bisect import bisect_right
+
+BASE_CURRENCY = "INR"
+
+# Offered by the transaction form and the converter; currencies that only
+# appear in exchange_rates are offered as well.
+CURRENCIES = ("INR", "USD")
+
+SYMBOLS = {"INR": "₹", "USD": "$"}
+
+RATE_BATCH_SIZE = 5000
+
+
+def symbol(currency):
+    return SYMBOLS.get(currency, currency)
+
+
+# ======================================================
+# RATE TABLE (INTERVAL LOOKUP, CACHED PER (CURRENCY, DATE))
+# ======================================================
+class RateTable:
+    # Built from (currency, date, rate) rows ordered by currency and date,
+    # as Repository.rate_table reads them. The Repository caches one per
+    # data version, so the per-date memo below lives until the next write.
+    def __init__(self, rows):
+        self._dates = {}
+        self._rates = {}
+        for currency, date, rate in rows:
+            self._dates.setdefault(currency, []).append(date)
+            self._rates.setdefault(currency, []).append(rate)
+
+        self._memo = {}
+
+    def currencies(self):
+        return sorted({BASE_CURRENCY, *self._dates})
+
+    def rate(self, currency, date):
+        # BASE_CURRENCY units per unit of `currency` on ISO `date`.
+        if currency == BASE_CURRENCY:
+            return 1.0
+
+        key = (currency, date)
+        rate = self._memo.get(key)
+        if rate is None:
+            dates = self._dates.get(currency)
+            if dates is None:
+                raise ValueError(f"no exchange rates for {currency}")
+            i = max(bisect_right(dates, date) - 1, 0)
+            rate = self._memo[key] = self._rates[currency][i]
+        return rate
+
+    def convert(self, amount, currency, to, date):
+        if currency == to:
+            return amount
+        return amount * self.rate(currency, date) / self.rate(to, date)
+
+
+# ======================================================
+# RATE FILES (BULK LOAD)
+# ======================================================
+def read_rates(path, batch_size=RATE_BATCH_SIZE):
+    # Yields lists of (currency, date, rate) from a CSV file with a
+    # currency,date,rate header; raises ValueError on the first bad line.
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        batch = []
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            try:
+                currency = record["currency"].strip().upper()
+                date = record["date"].strip()
+                rate = float(record["rate"])
+            except (KeyError, AttributeError, ValueError):
+                raise ValueError(f"{path}:{line}: expected currency,date,rate")
+            if len(date) != 10 or rate <= 0:
+                raise ValueError(f"{path}:{line}: bad date or rate")
+
+            batch.append((currency, date, rate))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def load_rates(path, repo=None):
+    # Returns how many rates were stored; existing (currency, date) entries
+    # are replaced.
+    from db.repository import Repository
+
+    repo = repo or Repository()
+    return repo.add_rates(read_rates(path))
+
+
+def main(argv=None):
+    from db import models
+
+    parser = argparse.ArgumentParser(description="Load exchange rates.")
+    parser.add_argument("command", choices=["load"])
+    parser.add_argument("file")
+    parser.add_argument("db", nargs="?", default=models.DB_NAME)
+    args = parser.parse_args(argv)
+
+    models.configure(args.db)
+    models.init_db()
+    try:
+        count = load_rates(args.file)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    print(f"Loaded {count} rate(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# Import fingerprints: transactions.fingerprint holds a hash of the
+# statement line a row was imported from, and its unique index (migration
+# 5) turns re-importing the same statement into INSERT OR IGNORE no-ops.
+# fingerprint() is the one definition of that hash.
+import hashlib
+
+from db.currency import BASE_CURRENCY
+from db.money import to_minor
+
+
+def fingerprint(row, currency, n):
+    # Hash of the n-th (from 0) identical (date, amount, type, category,
+    # payment_method, tags) line in `currency`. The amount is hashed as
+    # integer minor units, so 120, 120.0 and "120.00" agree; base-currency
+    # lines hash without their currency, as before currencies existed.
+    date, amount, *rest = row
+    row = (date, to_minor(amount), *rest)
+    if currency != BASE_CURRENCY:
+        row += (currency,)
+    return hashlib.blake2b(repr((row, n)).encode(), digest_size=16).hexdigest()
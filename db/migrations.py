@@ -0,0 +1,739 @@
+# Versioned schema upgrades for expenses.db.
+#
+# The applied version lives in PRAGMA user_version. Each entry in MIGRATIONS
+# upgrades the schema by exactly one version inside its own transaction, so
+# existing databases are upgraded in place and a failed step leaves the file
+# at the previous version.
+import re
+
+from db.money import to_minor
+from db.tags import register_functions, sync_tags
+
+
+# ======================================================
+# 1: BASE TABLE
+# ======================================================
+def _create_transactions(cur):
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT,
+            amount REAL,
+            type TEXT,
+            category TEXT,
+            payment_method TEXT,
+            tags TEXT
+        )
+        """
+    )
+
+
+# ======================================================
+# 2: DERIVED DATE COLUMNS + INDEXES
+# ======================================================
+# Virtual generated columns cost nothing to store, can never drift from
+# ``date`` and can be indexed, so month/year filters become index seeks
+# instead of strftime() over every row. day_num is days since 1970-01-01.
+def _add_date_columns(cur):
+    cur.execute(
+        """
+        ALTER TABLE transactions ADD COLUMN year INTEGER
+        GENERATED ALWAYS AS (CAST(substr(date, 1, 4) AS INTEGER)) VIRTUAL
+        """
+    )
+    cur.execute(
+        """
+        ALTER TABLE transactions ADD COLUMN month INTEGER
+        GENERATED ALWAYS AS (CAST(substr(date, 6, 2) AS INTEGER)) VIRTUAL
+        """
+    )
+    cur.execute(
+        """
+        ALTER TABLE transactions ADD COLUMN day_num INTEGER
+        GENERATED ALWAYS AS (CAST(julianday(date) - 2440587.5 AS INTEGER)) VIRTUAL
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_type_period
+        ON transactions (type, year, month, amount)
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_category_date
+        ON transactions (category, date)
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_period_date
+        ON transactions (year, month, date)
+        """
+    )
+
+
+# ======================================================
+# 3: KEYSET PAGINATION INDEXES
+# ======================================================
+# The rowid is implicitly the last key of every index, so these serve the
+# list view's "(date, id) < (?, ?) ORDER BY date DESC, id DESC" pages
+# without a sort step, for the unfiltered and year-only views.
+def _add_pagination_indexes(cur):
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_date
+        ON transactions (date)
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transactions_year_date
+        ON transactions (year, date)
+        """
+    )
+
+
+# ======================================================
+# 4: TRIGGER-MAINTAINED ROLLUPS
+# ======================================================
+# daily_rollup / monthly_rollup hold SUM(amount) and COUNT(*) per bucket and
+# are kept exact by the triggers below, so dashboard aggregates scale with
+# days x categories instead of with the number of transactions.
+# NULL type/category are stored as '' because they are part of the key, and
+# a NULL amount counts as 0. Rows without a date belong to no bucket.
+_ROLLUP_ADD = """
+    INSERT INTO daily_rollup (year, month, day, type, category, date, total, count)
+    VALUES (
+        {row}.year, {row}.month, CAST(substr({row}.date, 9, 2) AS INTEGER),
+        COALESCE({row}.type, ''), COALESCE({row}.category, ''),
+        {row}.date, COALESCE({row}.amount, 0), 1
+    )
+    ON CONFLICT (year, month, day, type, category) DO UPDATE
+    SET total = total + excluded.total, count = count + 1;
+
+    INSERT INTO monthly_rollup (year, month, type, total, count)
+    VALUES (
+        {row}.year, {row}.month, COALESCE({row}.type, ''), COALESCE({row}.amount, 0), 1
+    )
+    ON CONFLICT (year, month, type) DO UPDATE
+    SET total = total + excluded.total, count = count + 1;
+"""
+
+_ROLLUP_REMOVE = """
+    UPDATE daily_rollup
+    SET total = total - COALESCE({row}.amount, 0), count = count - 1
+    WHERE year = {row}.year AND month = {row}.month
+      AND day = CAST(substr({row}.date, 9, 2) AS INTEGER)
+      AND type = COALESCE({row}.type, '')
+      AND category = COALESCE({row}.category, '');
+
+    DELETE FROM daily_rollup
+    WHERE year = {row}.year AND month = {row}.month
+      AND day = CAST(substr({row}.date, 9, 2) AS INTEGER)
+      AND type = COALESCE({row}.type, '')
+      AND category = COALESCE({row}.category, '')
+      AND count = 0;
+
+    UPDATE monthly_rollup
+    SET total = total - COALESCE({row}.amount, 0), count = count - 1
+    WHERE year = {row}.year AND month = {row}.month
+      AND type = COALESCE({row}.type, '');
+
+    DELETE FROM monthly_rollup
+    WHERE year = {row}.year AND month = {row}.month
+      AND type = COALESCE({row}.type, '')
+      AND count = 0;
+"""
+
+
+def _add_rollups(cur):
+    cur.execute(
+        """
+        CREATE TABLE daily_rollup (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (year, month, day, type, category)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE monthly_rollup (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (type, year, month)
+        ) WITHOUT ROWID
+        """
+    )
+
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_insert AFTER INSERT ON transactions
+        WHEN NEW.date IS NOT NULL
+        BEGIN {_ROLLUP_ADD.format(row="NEW")} END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_delete AFTER DELETE ON transactions
+        WHEN OLD.date IS NOT NULL
+        BEGIN {_ROLLUP_REMOVE.format(row="OLD")} END
+        """
+    )
+    # Split in two so a NULL date on either side only skips its own half.
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_update_old
+        AFTER UPDATE OF date, amount, type, category ON transactions
+        WHEN OLD.date IS NOT NULL
+        BEGIN {_ROLLUP_REMOVE.format(row="OLD")} END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_update_new
+        AFTER UPDATE OF date, amount, type, category ON transactions
+        WHEN NEW.date IS NOT NULL
+        BEGIN {_ROLLUP_ADD.format(row="NEW")} END
+        """
+    )
+
+    # Seed from rows that existed before the triggers did.
+    cur.execute(
+        """
+        INSERT INTO daily_rollup (year, month, day, type, category, date, total, count)
+        SELECT year, month, CAST(substr(date, 9, 2) AS INTEGER),
+               COALESCE(type, ''), COALESCE(category, ''), date,
+               SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM transactions
+        WHERE date IS NOT NULL
+        GROUP BY date, COALESCE(type, ''), COALESCE(category, '')
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO monthly_rollup (year, month, type, total, count)
+        SELECT year, month, type, SUM(total), SUM(count)
+        FROM daily_rollup
+        GROUP BY year, month, type
+        """
+    )
+
+
+# ======================================================
+# 5: IMPORT FINGERPRINTS
+# ======================================================
+# Hash of an imported statement line (db/fingerprints.py); the unique index
+# makes re-importing the same statement a no-op (INSERT OR IGNORE). Manual
+# entries keep NULL, which the partial index leaves out.
+def _add_fingerprints(cur):
+    cur.execute("ALTER TABLE transactions ADD COLUMN fingerprint TEXT")
+    cur.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint
+        ON transactions (fingerprint)
+        WHERE fingerprint IS NOT NULL
+        """
+    )
+
+
+# ======================================================
+# 6: BUDGETS
+# ======================================================
+# One spending limit per (category, period); period is 'monthly' or
+# 'yearly'. With rollover set, what a period leaves unspent (or overspends)
+# carries into the next one. Spending is read from daily_rollup, whose
+# (type, category) index keeps the budget join a range scan.
+def _add_budgets(cur):
+    cur.execute(
+        """
+        CREATE TABLE budgets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            period TEXT NOT NULL CHECK (period IN ('monthly', 'yearly')),
+            limit_amount REAL NOT NULL CHECK (limit_amount > 0),
+            rollover INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (category, period)
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_daily_rollup_type_category
+        ON daily_rollup (type, category, year, month, total)
+        """
+    )
+
+
+# ======================================================
+# 7: RECURRING RULES
+# ======================================================
+# rrule holds an RFC 5545 recurrence ("FREQ=MONTHLY;BYMONTHDAY=1") that
+# starts at dtstart; last_run is the day occurrences were materialized up
+# to. Generated transactions carry their rule_id, and the unique
+# (rule_id, date) index makes a repeated catch-up insert nothing.
+def _add_recurring_rules(cur):
+    cur.execute(
+        """
+        CREATE TABLE recurring_rules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            rrule TEXT NOT NULL,
+            dtstart TEXT NOT NULL,
+            amount REAL NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT,
+            payment_method TEXT,
+            tags TEXT,
+            last_run TEXT
+        )
+        """
+    )
+    cur.execute("ALTER TABLE transactions ADD COLUMN rule_id INTEGER")
+    cur.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_rule_date
+        ON transactions (rule_id, date)
+        WHERE rule_id IS NOT NULL
+        """
+    )
+
+
+# ======================================================
+# 8: NORMALIZED TAGS
+# ======================================================
+# See db/tags.py. The primary key serves "transactions with tag x"; the
+# second index serves "tags of transaction y" and the delete trigger.
+def _add_tags(cur):
+    cur.execute(
+        """
+        CREATE TABLE tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE transaction_tags (
+            tag_id INTEGER NOT NULL,
+            transaction_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, transaction_id)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transaction_tags_transaction
+        ON transaction_tags (transaction_id)
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER trg_transaction_tags_delete AFTER DELETE ON transactions
+        BEGIN
+            DELETE FROM transaction_tags WHERE transaction_id = OLD.id;
+        END
+        """
+    )
+
+    # Backfill every existing row.
+    register_functions(cur.connection)
+    sync_tags(cur, 0)
+
+
+# ======================================================
+# 9: FULL-TEXT SEARCH (FTS5)
+# ======================================================
+# External-content FTS5 index over the searchable text columns; it stores
+# only the index and reads the text back from transactions. prefix='2 3'
+# keeps short search-as-you-type prefixes ("fu*") to one index lookup.
+_FTS_COLUMNS = "category, payment_method, tags"
+
+
+def _add_search(cur):
+    cur.execute(
+        f"""
+        CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            {_FTS_COLUMNS},
+            content='transactions', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """
+    )
+
+    add = (
+        f"INSERT INTO transactions_fts (rowid, {_FTS_COLUMNS}) "
+        "VALUES (NEW.id, NEW.category, NEW.payment_method, NEW.tags);"
+    )
+    remove = (
+        f"INSERT INTO transactions_fts (transactions_fts, rowid, {_FTS_COLUMNS}) "
+        "VALUES ('delete', OLD.id, OLD.category, OLD.payment_method, OLD.tags);"
+    )
+    cur.execute(
+        f"CREATE TRIGGER trg_fts_insert AFTER INSERT ON transactions BEGIN {add} END"
+    )
+    cur.execute(
+        f"CREATE TRIGGER trg_fts_delete AFTER DELETE ON transactions BEGIN {remove} END"
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_fts_update
+        AFTER UPDATE OF {_FTS_COLUMNS} ON transactions
+        BEGIN {remove} {add} END
+        """
+    )
+
+    cur.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+# ======================================================
+# 10: CURRENCIES + EXCHANGE RATES
+# ======================================================
+# Every transaction keeps the currency it was entered in; rows from before
+# this version are INR, which the app always assumed. exchange_rates is
+# described in db/currency.py. The rollups gain currency as the last key
+# column so aggregates can convert each (day, currency) bucket instead of
+# each transaction; they are rebuilt, with triggers that also follow
+# currency updates.
+_CURRENCY_ROLLUP_ADD = """
+    INSERT INTO daily_rollup
+        (year, month, day, type, category, currency, date, total, count)
+    VALUES (
+        {row}.year, {row}.month, CAST(substr({row}.date, 9, 2) AS INTEGER),
+        COALESCE({row}.type, ''), COALESCE({row}.category, ''), {row}.currency,
+        {row}.date, COALESCE({row}.amount, 0), 1
+    )
+    ON CONFLICT (year, month, day, type, category, currency) DO UPDATE
+    SET total = total + excluded.total, count = count + 1;
+
+    INSERT INTO monthly_rollup (year, month, type, currency, total, count)
+    VALUES (
+        {row}.year, {row}.month, COALESCE({row}.type, ''), {row}.currency,
+        COALESCE({row}.amount, 0), 1
+    )
+    ON CONFLICT (type, year, month, currency) DO UPDATE
+    SET total = total + excluded.total, count = count + 1;
+"""
+
+_CURRENCY_ROLLUP_REMOVE = """
+    UPDATE daily_rollup
+    SET total = total - COALESCE({row}.amount, 0), count = count - 1
+    WHERE year = {row}.year AND month = {row}.month
+      AND day = CAST(substr({row}.date, 9, 2) AS INTEGER)
+      AND type = COALESCE({row}.type, '')
+      AND category = COALESCE({row}.category, '')
+      AND currency = {row}.currency;
+
+    DELETE FROM daily_rollup
+    WHERE year = {row}.year AND month = {row}.month
+      AND day = CAST(substr({row}.date, 9, 2) AS INTEGER)
+      AND type = COALESCE({row}.type, '')
+      AND category = COALESCE({row}.category, '')
+      AND currency = {row}.currency
+      AND count = 0;
+
+    UPDATE monthly_rollup
+    SET total = total - COALESCE({row}.amount, 0), count = count - 1
+    WHERE year = {row}.year AND month = {row}.month
+      AND type = COALESCE({row}.type, '')
+      AND currency = {row}.currency;
+
+    DELETE FROM monthly_rollup
+    WHERE year = {row}.year AND month = {row}.month
+      AND type = COALESCE({row}.type, '')
+      AND currency = {row}.currency
+      AND count = 0;
+"""
+
+# The rate the currency converter used to hard-code, as the USD fallback
+# until real rates are loaded.
+_DEFAULT_RATES = [("USD", "1970-01-01", 91.0)]
+
+
+def _add_currencies(cur):
+    cur.execute(
+        "ALTER TABLE transactions ADD COLUMN currency TEXT NOT NULL DEFAULT 'INR'"
+    )
+    cur.execute(
+        "ALTER TABLE recurring_rules ADD COLUMN currency TEXT NOT NULL DEFAULT 'INR'"
+    )
+    cur.execute(
+        """
+        CREATE TABLE exchange_rates (
+            currency TEXT NOT NULL,
+            date TEXT NOT NULL,
+            rate REAL NOT NULL CHECK (rate > 0),
+            PRIMARY KEY (currency, date)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.executemany(
+        "INSERT INTO exchange_rates (currency, date, rate) VALUES (?, ?, ?)",
+        _DEFAULT_RATES,
+    )
+
+    for trigger in (
+        "trg_rollup_insert", "trg_rollup_delete",
+        "trg_rollup_update_old", "trg_rollup_update_new",
+    ):
+        cur.execute(f"DROP TRIGGER {trigger}")
+    cur.execute("DROP INDEX idx_daily_rollup_type_category")
+    cur.execute("DROP TABLE daily_rollup")
+    cur.execute("DROP TABLE monthly_rollup")
+
+    cur.execute(
+        """
+        CREATE TABLE daily_rollup (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            day INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            currency TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (year, month, day, type, category, currency)
+        ) WITHOUT ROWID
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE monthly_rollup (
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            currency TEXT NOT NULL,
+            total REAL NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (type, year, month, currency)
+        ) WITHOUT ROWID
+        """
+    )
+    # Budget spending, converted or not, stays an index-only range scan.
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_daily_rollup_type_category
+        ON daily_rollup (type, category, year, month, currency, date, total)
+        """
+    )
+
+    columns = "date, amount, type, category, currency"
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_insert AFTER INSERT ON transactions
+        WHEN NEW.date IS NOT NULL
+        BEGIN {_CURRENCY_ROLLUP_ADD.format(row="NEW")} END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_delete AFTER DELETE ON transactions
+        WHEN OLD.date IS NOT NULL
+        BEGIN {_CURRENCY_ROLLUP_REMOVE.format(row="OLD")} END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_update_old
+        AFTER UPDATE OF {columns} ON transactions
+        WHEN OLD.date IS NOT NULL
+        BEGIN {_CURRENCY_ROLLUP_REMOVE.format(row="OLD")} END
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER trg_rollup_update_new
+        AFTER UPDATE OF {columns} ON transactions
+        WHEN NEW.date IS NOT NULL
+        BEGIN {_CURRENCY_ROLLUP_ADD.format(row="NEW")} END
+        """
+    )
+
+    cur.execute(
+        """
+        INSERT INTO daily_rollup
+            (year, month, day, type, category, currency, date, total, count)
+        SELECT year, month, CAST(substr(date, 9, 2) AS INTEGER),
+               COALESCE(type, ''), COALESCE(category, ''), currency, date,
+               SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM transactions
+        WHERE date IS NOT NULL
+        GROUP BY date, COALESCE(type, ''), COALESCE(category, ''), currency
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO monthly_rollup (year, month, type, currency, total, count)
+        SELECT year, month, type, currency, SUM(total), SUM(count)
+        FROM daily_rollup
+        GROUP BY year, month, type, currency
+        """
+    )
+
+
+# ======================================================
+# 11: INTEGER MINOR UNITS (TABLE REBUILD)
+# ======================================================
+# Money columns hold exact integer minor units (db/money.py) instead of
+# binary floats. SQLite cannot change a column's type, so each table is
+# rebuilt the documented way: a new table from its own CREATE statement with
+# the column retyped, the rows copied (ids kept, amounts rounded to whole
+# paise), the old table dropped, the new one renamed, and the indexes and
+# triggers the drop took with it recreated from their saved SQL. Amounts
+# go through db.money.to_minor, the rounding every new amount gets. The
+# rollups are recreated empty and re-seeded with integer sums.
+_MONEY_COLUMNS = {
+    "daily_rollup": ("total",),
+    "monthly_rollup": ("total",),
+    "budgets": ("limit_amount",),
+    "recurring_rules": ("amount",),
+    "transactions": ("amount",),
+}
+
+
+def _retyped_table(cur, table, name):
+    # (CREATE statement for `name` with the money columns INTEGER, saved
+    # CREATE INDEX / TRIGGER statements of `table`).
+    (create,) = cur.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    for column in _MONEY_COLUMNS[table]:
+        create, found = re.subn(rf"\b{column} REAL\b", f"{column} INTEGER", create)
+        if found != 1:
+            raise RuntimeError(f"{table}.{column} is not a REAL column")
+    create = re.sub(rf"^CREATE TABLE {table}\b", f"CREATE TABLE {name}", create)
+
+    dependents = [
+        sql for (sql,) in cur.execute(
+            "SELECT sql FROM sqlite_master "
+            "WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+            (table,),
+        )
+    ]
+    return create, dependents
+
+
+def _recreate_empty(cur, table):
+    create, dependents = _retyped_table(cur, table, table)
+    cur.execute(f"DROP TABLE {table}")
+    cur.execute(create)
+    for sql in dependents:
+        cur.execute(sql)
+
+
+def _rebuild_copying(cur, table):
+    create, dependents = _retyped_table(cur, table, f"{table}_minor")
+    # Generated columns (hidden 2 and 3) are computed, not copied.
+    columns = [r[1] for r in cur.execute(f"PRAGMA table_xinfo({table})") if r[6] == 0]
+    values = [f"to_minor({c})" if c in _MONEY_COLUMNS[table] else c for c in columns]
+    seq = cur.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+
+    cur.execute(create)
+    cur.execute(
+        f"INSERT INTO {table}_minor ({', '.join(columns)}) "
+        f"SELECT {', '.join(values)} FROM {table}"
+    )
+    cur.execute(f"DROP TABLE {table}")
+    cur.execute(f"ALTER TABLE {table}_minor RENAME TO {table}")
+    for sql in dependents:
+        cur.execute(sql)
+
+    # AUTOINCREMENT never reuses an id, including those of deleted rows.
+    if seq is not None:
+        cur.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (seq[0], table)
+        )
+
+
+def _to_minor(amount):
+    return None if amount is None else to_minor(amount)
+
+
+def _use_minor_units(cur):
+    # A REAL times 100 rounded in SQL would turn 1.005 (really
+    # 1.00499999...) into 1.00, where the app stores 1.01.
+    cur.connection.create_function("to_minor", 1, _to_minor, deterministic=True)
+
+    # Rollups first and in place: renaming a table re-checks the triggers on
+    # transactions, which need daily_rollup and monthly_rollup to exist.
+    _recreate_empty(cur, "daily_rollup")
+    _recreate_empty(cur, "monthly_rollup")
+    for table in ("budgets", "recurring_rules", "transactions"):
+        _rebuild_copying(cur, table)
+
+    cur.execute(
+        """
+        INSERT INTO daily_rollup
+            (year, month, day, type, category, currency, date, total, count)
+        SELECT year, month, CAST(substr(date, 9, 2) AS INTEGER),
+               COALESCE(type, ''), COALESCE(category, ''), currency, date,
+               SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM transactions
+        WHERE date IS NOT NULL
+        GROUP BY date, COALESCE(type, ''), COALESCE(category, ''), currency
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO monthly_rollup (year, month, type, currency, total, count)
+        SELECT year, month, type, currency, SUM(total), SUM(count)
+        FROM daily_rollup
+        GROUP BY year, month, type, currency
+        """
+    )
+
+
+MIGRATIONS = [
+    _create_transactions,
+    _add_date_columns,
+    _add_pagination_indexes,
+    _add_rollups,
+    _add_fingerprints,
+    _add_budgets,
+    _add_recurring_rules,
+    _add_tags,
+    _add_search,
+    _add_currencies,
+    _use_minor_units,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    version = get_version(conn)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than this app "
+            f"supports ({SCHEMA_VERSION})."
+        )
+
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        try:
+            MIGRATIONS[number - 1](cur)
+            cur.execute(f"PRAGMA user_version = {number}")
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    return SCHEMA_VERSION
@@ -1,29 +1,151 @@
+import atexit
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from db.cache import QueryCache
+from db.migrations import migrate
+from db.tags import register_functions
 
 DB_NAME = "expenses.db"
 
+# Pragmas applied to every pooled connection.
+# cache_size < 0 is in KiB (SQLite convention), mmap_size is in bytes.
+PRAGMA_PROFILES = {
+    "default": {
+        "cache_size": -16384,
+        "mmap_size": 64 * 1024 * 1024,
+        "synchronous": "NORMAL",
+    },
+    "large": {
+        "cache_size": -131072,
+        "mmap_size": 512 * 1024 * 1024,
+        "synchronous": "NORMAL",
+    },
+    "safe": {
+        "cache_size": -8192,
+        "mmap_size": 0,
+        "synchronous": "FULL",
+    },
+}
 
-def get_connection():
-    return sqlite3.connect(DB_NAME)
+STATEMENT_CACHE_SIZE = 256
+READER_POOL_SIZE = 2
 
 
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS transactions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            amount REAL,
-            type TEXT,
-            category TEXT,
-            payment_method TEXT,
-            tags TEXT
+class ConnectionPool:
+    """One long-lived connection for the UI thread plus a few read-only
+    connections that background threads check out and give back. The pool
+    also owns the query cache shared by every Repository on this file."""
+
+    def __init__(self, db_name=DB_NAME, profile="default", readers=READER_POOL_SIZE):
+        self.db_name = db_name
+        self.profile = profile
+        self.pragmas = PRAGMA_PROFILES[profile]
+        self.readers = readers
+        self.cache = QueryCache()
+
+        self._primary = None
+        self._idle = queue.LifoQueue()
+        self._all_readers = []
+        self._lock = threading.Lock()
+
+    def _open(self, read_only=False):
+        conn = sqlite3.connect(
+            self.db_name,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            check_same_thread=not read_only,
         )
-        """
-    )
+        conn.execute("PRAGMA journal_mode=WAL")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        register_functions(conn)
+        return conn
+
+    # ======================================================
+    # UI THREAD CONNECTION (READ / WRITE)
+    # ======================================================
+    def connection(self):
+        if self._primary is None:
+            self._primary = self._open()
+        return self._primary
+
+    # ======================================================
+    # BACKGROUND READERS
+    # ======================================================
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._all_readers) < self.readers:
+                conn = self._open(read_only=True)
+                self._all_readers.append(conn)
+                return conn
+
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    @contextmanager
+    def reader(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+            self._idle = queue.LifoQueue()
+
+        if self._primary is not None:
+            # Refresh planner statistics for the indexes we rely on.
+            self._primary.execute("PRAGMA optimize")
+            self._primary.close()
+            self._primary = None
+
 
-    conn.commit()
-    conn.close()
+_pool = None
+
+
+def configure(db_name=DB_NAME, profile="default", readers=READER_POOL_SIZE):
+    """Swap the process-wide pool, e.g. to point at another database file
+    or to pick a different pragma profile."""
+    global _pool
+    close_pool()
+    _pool = ConnectionPool(db_name, profile, readers)
+    return _pool
+
+
+def get_pool():
+    if _pool is None:
+        configure()
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+atexit.register(close_pool)
+
+
+def get_connection():
+    return get_pool().connection()
+
+
+def init_db():
+    migrate(get_connection())
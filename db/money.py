@@ -0,0 +1,36 @@
+# Exact money: amounts are stored and summed as integer minor units (paise,
+# cents; MINOR_DIGITS places for every currency) and cross the Repository
+# boundary as decimal.Decimal, so nothing is ever a binary float.
+#
+#   to_minor("12.345") == 1235      from_minor(1235) == Decimal("12.35")
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+MINOR_DIGITS = 2
+
+_ONE = Decimal(1)
+_MINOR_UNIT = _ONE.scaleb(-MINOR_DIGITS)
+
+
+def to_minor(amount):
+    # Decimal, int, str or float -> int minor units, half up. A float goes
+    # through its shortest repr, so 0.1 is 10 paise and not 10.000000000000000555.
+    if isinstance(amount, int):
+        return amount * 10 ** MINOR_DIGITS
+    if isinstance(amount, float):
+        amount = repr(amount)
+
+    try:
+        minor = Decimal(amount).scaleb(MINOR_DIGITS).quantize(_ONE, ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"not an amount: {amount!r}")
+    if not minor.is_finite():
+        raise ValueError(f"not an amount: {amount!r}")
+    return int(minor)
+
+
+def from_minor(minor):
+    # None (a legacy row without an amount) stays None. Multiplying by the
+    # unit is exact and keeps its exponent: 1000 -> Decimal("10.00").
+    if minor is None:
+        return None
+    return _MINOR_UNIT * minor
@@ -0,0 +1,14 @@
+# Recurring rules are stored as the RRULE part of an RFC 5545 rule
+# ("FREQ=MONTHLY;BYMONTHDAY=1") plus an ISO dtstart. parse_rule() is the one
+# reading of that pair: Repository.add_recurring_rule checks new rules with
+# it before storing them and business.recurring expands stored ones.
+from datetime import datetime
+
+
+def parse_rule(rrule, dtstart):
+    # dateutil rrule; raises ValueError for anything dateutil cannot parse.
+    # Imported here so a ledger without rules never loads dateutil at
+    # startup.
+    from dateutil.rrule import rrulestr
+
+    return rrulestr(rrule, dtstart=datetime.fromisoformat(dtstart))
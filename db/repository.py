@@ -1,129 +1,862 @@
-from db.models import get_connection
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from contextlib import contextmanager
 
+from db.cache import cached_query
+from db.currency import BASE_CURRENCY, RateTable
+from db.models import get_connection, get_pool
+from db.money import from_minor, to_minor
+from db.recurrence import parse_rule
+from db.tags import next_id, parse_tags, sync_tags
+from utils.diagnostics import instrument_queries
 
+
+PAGE_SIZE = 200
+EXPORT_CHUNK_SIZE = 5000
+
+TRANSACTION_COLUMNS = (
+    "id", "date", "amount", "type", "category", "payment_method", "tags",
+    "currency",
+)
+
+# What a write did, so views can patch themselves instead of re-querying.
+# op is "insert" or "delete"; row is the full
+# (id, date, amount, type, category, payment_method, tags, currency) tuple.
+#
+# Amounts are stored as integer minor units (db/money.py). Methods take
+# them as Decimal (or int, str, float) and return them as Decimal, sums
+# included, which SQLite computes exactly over the integers.
+Change = namedtuple("Change", ["op", "row"])
+
+_ORDERS = {"desc": "DESC", "asc": "ASC"}
+
+_SEARCH_WORD = re.compile(r"\w+")
+
+
+# ======================================================
+# DASHBOARD SNAPSHOT (IMMUTABLE)
+# ======================================================
+# Everything ReportsWindow draws for one period, read in a single
+# transaction. categories is ((category, total), ...) and daily is
+# ((date, income, expense), ...) sorted by date; amounts are in currency.
+# unconverted names the currencies whose rows are left out of them for
+# want of exchange rates (Repository.missing_rates).
+class DashboardSnapshot(
+    namedtuple(
+        "DashboardSnapshot",
+        ["month", "year", "income", "expense", "categories", "daily", "currency", "unconverted"],
+        defaults=(BASE_CURRENCY, ()),
+    )
+):
+    __slots__ = ()
+
+    def covers(self, date):
+        if self.year != "All" and int(date[:4]) != int(self.year):
+            return False
+        if self.month != "All" and int(date[5:7]) != int(self.month):
+            return False
+        return True
+
+    def apply(self, change):
+        # New snapshot with one inserted/deleted row folded in. The row must
+        # be in the snapshot's currency; converting needs the rates, so the
+        # caller re-reads the snapshot for any other.
+        _, date, amount, txn_type, category = change.row[:5]
+        if not self.covers(date) or txn_type not in ("income", "expense"):
+            return self
+
+        delta = amount if change.op == "insert" else -amount
+        income, expense = self.income, self.expense
+        categories = self.categories
+
+        if txn_type == "income":
+            income += delta
+        else:
+            expense += delta
+            totals = dict(categories)
+            total = totals.get(category, 0) + delta
+            if total:
+                totals[category] = total
+            else:
+                totals.pop(category, None)
+            categories = tuple(sorted(totals.items(), key=lambda kv: kv[0] or ""))
+
+        daily = list(self.daily)
+        i = bisect_left(daily, (date,))
+        if i < len(daily) and daily[i][0] == date:
+            _, day_income, day_expense = daily[i]
+        else:
+            day_income = day_expense = 0
+            daily.insert(i, None)
+
+        if txn_type == "income":
+            day_income += delta
+        else:
+            day_expense += delta
+
+        if day_income or day_expense:
+            daily[i] = (date, day_income, day_expense)
+        else:
+            del daily[i]
+
+        return self._replace(
+            income=income, expense=expense, categories=categories, daily=tuple(daily)
+        )
+
+
+@contextmanager
+def _read_transaction(conn):
+    # One BEGIN..END so every SELECT inside sees the same snapshot (WAL).
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+
+
+def _period_filter(month="All", year="All"):
+    # Filters hit the indexed year/month columns (on transactions and on the
+    # rollup tables) instead of strftime(date), keeping the predicates
+    # sargable. month/year accept "All", "3", "03", 3.
+    clauses, params = [], []
+    if year != "All":
+        clauses.append("year = ?")
+        params.append(int(year))
+    if month != "All":
+        clauses.append("month = ?")
+        params.append(int(month))
+    return clauses, params
+
+
+def _money(rows, *columns):
+    # rows with the minor-unit values at `columns` as Decimal. Converting
+    # whole columns of the transposed rows is several times cheaper than
+    # rebuilding every row tuple on its own.
+    values = list(zip(*rows))
+    if not values:
+        return []
+    for i in columns:
+        values[i] = map(from_minor, values[i])
+    return list(zip(*values))
+
+
+def _daily_query(amount, amount_params, clauses, params):
+    # (SQL, params) of [(date, income, expense), ...] by date; amount and
+    # amount_params come from Repository._amount().
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    select = f"""
+        SELECT
+            date,
+            COALESCE(SUM(CASE WHEN type='income' THEN {amount} ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN type='expense' THEN {amount} ELSE 0 END), 0)
+    """
+    query = select + f" FROM daily_rollup r{where} GROUP BY year, month, day ORDER BY year, month, day"
+    return query, amount_params * 2 + params
+
+
+def search_query(text):
+    # User text -> FTS5 query: every word must match as a prefix, and
+    # quoting keeps FTS5 operators and punctuation literal.
+    words = _SEARCH_WORD.findall(text or "")
+    return " ".join(f'"{w}"*' for w in words)
+
+
+# Rate of currency {currency} on {date}: the latest dated rate at or before
+# it, else the first one. Both subqueries are single seeks on the
+# (currency, date) primary key of exchange_rates.
+_RATE_SQL = """
+    COALESCE(
+        (SELECT rate FROM exchange_rates e
+         WHERE e.currency = {currency} AND e.date <= {date}
+         ORDER BY e.date DESC LIMIT 1),
+        (SELECT rate FROM exchange_rates e
+         WHERE e.currency = {currency}
+         ORDER BY e.date LIMIT 1)
+    )
+"""
+
+
+def _converted(currency, alias="r", column="total"):
+    # (SQL expression, params) for alias.column taken from alias.currency to
+    # `currency` at alias.date. Rows already in `currency` skip the rate
+    # lookups, so a mostly single-currency ledger converts only the rest.
+    # Each converted value is rounded to whole minor units (half away from
+    # zero), so the SUM around it stays an exact integer sum.
+    #
+    # The values converted are daily_rollup totals: each (date, type,
+    # category, currency) bucket is converted and rounded once.
+    value = f"{alias}.{column}"
+    rate = _RATE_SQL.format(currency=f"{alias}.currency", date=f"{alias}.date")
+    sql = f"CASE WHEN {alias}.currency = ? THEN {value}"
+
+    if currency == BASE_CURRENCY:
+        return f"{sql} ELSE CAST(ROUND({value} * {rate}) AS INTEGER) END", [currency]
+
+    target = _RATE_SQL.format(currency="?", date=f"{alias}.date")
+    sql += (
+        f" WHEN {alias}.currency = '{BASE_CURRENCY}'"
+        f" THEN CAST(ROUND({value} / {target}) AS INTEGER)"
+        f" ELSE CAST(ROUND({value} * {rate} / {target}) AS INTEGER) END"
+    )
+    return sql, [currency] + [currency] * 4
+
+
+@instrument_queries
 class Repository:
+    # Connections are long-lived and owned by db.models' pool, so methods
+    # never close them; writes commit (or roll back) via ``with conn``.
+    # Background threads pass in a connection checked out of the pool.
+    def __init__(self, conn=None):
+        self.conn = conn
+
+    def _connection(self):
+        return self.conn or get_connection()
+
+    def _cache(self):
+        return get_pool().cache
+
+    @contextmanager
+    def _write(self):
+        # Commit (or roll back), then drop every cached read result.
+        conn = self._connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._cache().invalidate()
+
     # ======================================================
     # ADD TRANSACTION
     # ======================================================
-    def add_transaction(self, data):
-        conn = get_connection()
-        cur = conn.cursor()
+    def add_transaction(self, data, currency=BASE_CURRENCY):
+        # data is (date, amount, type, category, payment_method, tags), with
+        # the amount in `currency`.
+        date, amount, *rest = data
+        minor = to_minor(amount)
+        with self._write() as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO transactions
+                (date, amount, type, category, payment_method, tags, currency)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (date, minor, *rest, currency),
+            )
+            sync_tags(conn, cur.lastrowid)
 
-        cur.execute(
-            """
-            INSERT INTO transactions
-            (date, amount, type, category, payment_method, tags)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            data,
-        )
+        return Change("insert", (cur.lastrowid, date, from_minor(minor), *rest, currency))
 
-        conn.commit()
-        conn.close()
+    # ======================================================
+    # BULK INSERT (IMPORTS – ONE TRANSACTION, executemany BATCHES)
+    # ======================================================
+    def add_transactions(self, batches, progress_cb=None):
+        # batches yields lists of (date, amount, type, category,
+        # payment_method, tags, currency, fingerprint).
+        # Rows whose fingerprint is already stored are skipped; returns how
+        # many rows were actually inserted. progress_cb(inserted_so_far) runs
+        # after every batch.
+        inserted = 0
+
+        with self._write() as conn:
+            first_id = next_id(conn)
+            for batch in batches:
+                cur = conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO transactions
+                    (date, amount, type, category, payment_method, tags,
+                     currency, fingerprint)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [(r[0], to_minor(r[1]), *r[2:]) for r in batch],
+                )
+                inserted += cur.rowcount
+                if progress_cb:
+                    progress_cb(inserted)
+
+            sync_tags(conn, first_id)
+
+        return inserted
 
     # ======================================================
-    # FETCH ALL TRANSACTIONS (LIST VIEW)
+    # FETCH TRANSACTIONS (LIST VIEW – MONTH / YEAR FILTER)
     # ======================================================
-    def fetch_transactions(self):
-        conn = get_connection()
+    @cached_query
+    def fetch_transactions(self, month="All", year="All", order="desc"):
+        conn = self._connection()
         cur = conn.cursor()
 
-        cur.execute(
-            """
-            SELECT id, date, amount, type, category, payment_method, tags
+        direction = _ORDERS[order]
+        clauses, params = _period_filter(month, year)
+        query = """
+            SELECT id, date, amount, type, category, payment_method, tags, currency
             FROM transactions
-            ORDER BY date DESC
-            """
-        )
+        """
 
-        rows = cur.fetchall()
-        conn.close()
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+
+        query += f" ORDER BY date {direction}, id {direction}"
+
+        cur.execute(query, params)
+        rows = _money(cur.fetchall(), 2)
         return rows
 
     # ======================================================
-    # TOTAL INCOME / EXPENSE (MONTH FILTER ONLY)
+    # KEYSET PAGE (VIRTUALIZED LIST VIEW)
     # ======================================================
-    def get_total(self, txn_type, month="All"):
-        conn = get_connection()
+    @cached_query
+    def fetch_page(self, month="All", year="All", after=None, limit=PAGE_SIZE, search=None):
+        # Next `limit` rows (newest first) strictly after the (date, id) key
+        # of the last row already shown; after=None is the first page.
+        # search narrows to rows whose category / payment method / tags
+        # contain words starting with each word typed (FTS5 prefix match).
+        conn = self._connection()
         cur = conn.cursor()
 
+        clauses, params = _period_filter(month, year)
+        match = search_query(search)
+        if match:
+            clauses.append(
+                "id IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?)"
+            )
+            params.append(match)
+        if after is not None:
+            clauses.append("(date, id) < (?, ?)")
+            params.extend(after)
+
         query = """
-            SELECT SUM(amount)
+            SELECT id, date, amount, type, category, payment_method, tags, currency
             FROM transactions
-            WHERE type = ?
         """
-        params = [txn_type]
 
-        if month != "All":
-            query += " AND strftime('%m', date) = ?"
-            params.append(month.zfill(2))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
 
-        cur.execute(query, params)
-        total = cur.fetchone()[0] or 0
+        query += " ORDER BY date DESC, id DESC LIMIT ?"
+        params.append(limit)
 
-        conn.close()
-        return total
+        cur.execute(query, params)
+        return _money(cur.fetchall(), 2)
 
     # ======================================================
-    # EXPENSE BY CATEGORY (MONTH FILTER ONLY)
+    # STREAMING READ (EXPORTS – FIXED-SIZE CHUNKS)
     # ======================================================
-    def get_expense_by_category(self, month="All"):
-        conn = get_connection()
+    def iter_transactions(
+        self, start=None, end=None, txn_type=None, chunk_size=EXPORT_CHUNK_SIZE,
+        minor_units=False,
+    ):
+        # Yields lists of at most chunk_size rows in (date, id) order. The
+        # cursor is stepped with fetchmany, so only one chunk is ever held.
+        # start/end are inclusive ISO dates; None leaves that side open.
+        # minor_units=True leaves amounts as the stored integers, for bulk
+        # consumers (binary exports) that keep them that way.
+        conn = self._connection()
         cur = conn.cursor()
 
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(end)
+        if txn_type is not None:
+            clauses.append("type = ?")
+            params.append(txn_type)
+
         query = """
-            SELECT category, SUM(amount)
+            SELECT id, date, amount, type, category, payment_method, tags, currency
             FROM transactions
-            WHERE type = 'expense'
         """
-        params = []
 
-        if month != "All":
-            query += " AND strftime('%m', date) = ?"
-            params.append(month.zfill(2))
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
 
-        query += " GROUP BY category"
+        query += " ORDER BY date, id"
 
         cur.execute(query, params)
-        rows = cur.fetchall()
-
-        conn.close()
-        return [r[0] for r in rows], [r[1] for r in rows]
+        try:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows if minor_units else _money(rows, 2)
+        finally:
+            cur.close()
 
     # ======================================================
-    # DAILY AGGREGATED DATA (LINE CHART – MONTH FILTER ONLY)
+    # DISTINCT YEARS (YEAR DROPDOWN)
     # ======================================================
-    def fetch_transactions_filtered(self, month="All"):
-        conn = get_connection()
+    @cached_query
+    def fetch_years(self):
+        conn = self._connection()
         cur = conn.cursor()
 
-        query = """
-            SELECT
-                date,
-                SUM(CASE WHEN type='income' THEN amount ELSE 0 END) AS income,
-                SUM(CASE WHEN type='expense' THEN amount ELSE 0 END) AS expense
+        # Answered from idx_transactions_period_date without touching rows.
+        cur.execute(
+            """
+            SELECT DISTINCT year
             FROM transactions
+            WHERE year IS NOT NULL
+            ORDER BY year DESC
+            """
+        )
+
+        return [r[0] for r in cur.fetchall()]
+
+    # ======================================================
+    # CURRENCY CONVERSION (INSIDE THE AGGREGATE QUERIES)
+    # ======================================================
+    # Each aggregate below takes a reporting currency and sums
+    # _amount()'s expression instead of the bare column. While every row of
+    # the period is already in that currency (one look at the tiny
+    # monthly_rollup) it is the bare column and the queries run as before.
+    #
+    # Only converting into a currency without rates is an error. Rows in
+    # some other currency without rates cannot be converted: their rate
+    # lookup is NULL, so SUM() leaves them out, and missing_rates() names
+    # them.
+    def _amount(self, conn, currency, clauses, params, alias="r", column="total"):
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        used = {
+            c for (c,) in conn.execute(
+                f"SELECT DISTINCT currency FROM monthly_rollup{where}", params
+            )
+        }
+
+        if used <= {currency}:
+            return f"{alias}.{column}", []
+        if currency not in self.rate_table().currencies():
+            raise ValueError(f"no exchange rates for {currency}")
+        return _converted(currency, alias, column)
+
+    @cached_query
+    def missing_rates(self, month="All", year="All"):
+        # Currencies used in the period that have no exchange rates, so are
+        # left out of totals reported in any other currency.
+        clauses, params = _period_filter(month, year)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        used = {
+            c for (c,) in self._connection().execute(
+                f"SELECT DISTINCT currency FROM monthly_rollup{where}", params
+            )
+        }
+        return sorted(used - set(self.rate_table().currencies()))
+
+    # ======================================================
+    # TOTAL INCOME / EXPENSE (MONTH / YEAR FILTER)
+    # ======================================================
+    @cached_query
+    def get_total(self, txn_type, month="All", year="All", currency=BASE_CURRENCY):
+        conn = self._connection()
+        cur = conn.cursor()
+
+        clauses, params = _period_filter(month, year)
+        amount, amount_params = self._amount(conn, currency, clauses, params)
+        where = " WHERE " + " AND ".join(["type = ?"] + clauses)
+        # Converting needs each day's buckets, which only daily_rollup has.
+        table = "monthly_rollup" if not amount_params else "daily_rollup"
+        query = f"SELECT SUM({amount}) FROM {table} r{where}"
+
+        cur.execute(query, amount_params + [txn_type] + params)
+        total = cur.fetchone()[0] or 0
+        return from_minor(total)
+
+    # ======================================================
+    # EXPENSE BY CATEGORY (MONTH / YEAR FILTER)
+    # ======================================================
+    @cached_query
+    def get_expense_by_category(self, month="All", year="All", currency=BASE_CURRENCY):
+        conn = self._connection()
+        cur = conn.cursor()
+
+        clauses, params = _period_filter(month, year)
+        amount, amount_params = self._amount(conn, currency, clauses, params)
+        query = f"""
+            SELECT NULLIF(category, ''), SUM({amount}) AS spent
+            FROM daily_rollup r
+            WHERE type = 'expense'
         """
-        params = []
 
-        if month != "All":
-            query += " WHERE strftime('%m', date) = ?"
-            params.append(month.zfill(2))
+        for clause in clauses:
+            query += f" AND {clause}"
 
-        query += " GROUP BY date ORDER BY date"
+        query += " GROUP BY category HAVING spent IS NOT NULL"
 
-        cur.execute(query, params)
+        cur.execute(query, amount_params + params)
         rows = cur.fetchall()
+        return [r[0] for r in rows], [from_minor(r[1]) for r in rows]
 
-        conn.close()
+    # ======================================================
+    # DAILY AGGREGATED DATA (LINE CHART – MONTH / YEAR FILTER)
+    # ======================================================
+    @cached_query
+    def fetch_transactions_filtered(self, month="All", year="All", currency=BASE_CURRENCY):
+        conn = self._connection()
+        cur = conn.cursor()
+
+        clauses, params = _period_filter(month, year)
+        amount, amount_params = self._amount(conn, currency, clauses, params)
+        cur.execute(*_daily_query(amount, amount_params, clauses, params))
+        rows = _money(cur.fetchall(), 1, 2)
         return rows
 
+    # ======================================================
+    # DASHBOARD SNAPSHOT (ONE READ TRANSACTION)
+    # ======================================================
+    @cached_query
+    def dashboard_snapshot(self, month="All", year="All", currency=BASE_CURRENCY):
+        conn = self._connection()
+        clauses, params = _period_filter(month, year)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        expense_where = " WHERE " + " AND ".join(["type = 'expense'"] + clauses)
+
+        with _read_transaction(conn):
+            amount, amount_params = self._amount(conn, currency, clauses, params)
+
+            categories = _money(
+                conn.execute(
+                    f"""
+                    SELECT NULLIF(category, ''), SUM({amount}) AS spent
+                    FROM daily_rollup r{expense_where}
+                    GROUP BY category
+                    HAVING spent IS NOT NULL
+                    ORDER BY category
+                    """,
+                    amount_params + params,
+                ),
+                1,
+            )
+
+            daily = conn.execute(
+                *_daily_query(amount, amount_params, clauses, params)
+            ).fetchall()
+
+            if amount_params:
+                # Converted per day above; summing those (integers, so
+                # exactly) beats converting every bucket a third time.
+                totals = {
+                    "income": sum(d[1] for d in daily),
+                    "expense": sum(d[2] for d in daily),
+                }
+            else:
+                totals = dict(
+                    conn.execute(
+                        f"""
+                        SELECT type, SUM(total)
+                        FROM monthly_rollup{where}
+                        GROUP BY type
+                        """,
+                        params,
+                    ).fetchall()
+                )
+
+        return DashboardSnapshot(
+            month=month,
+            year=year,
+            income=from_minor(totals.get("income") or 0),
+            expense=from_minor(totals.get("expense") or 0),
+            categories=tuple(categories),
+            daily=tuple(_money(daily, 1, 2)),
+            currency=currency,
+            unconverted=tuple(self.missing_rates(month, year)) if amount_params else (),
+        )
+
+    # ======================================================
+    # TAGS (NORMALIZED – transaction_tags INDEX LOOKUPS)
+    # ======================================================
+    @cached_query
+    def fetch_tags(self):
+        # [(tag, number of transactions), ...] most used first.
+        conn = self._connection()
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            SELECT t.name, COUNT(*)
+            FROM transaction_tags tt
+            JOIN tags t ON t.id = tt.tag_id
+            GROUP BY tt.tag_id
+            ORDER BY COUNT(*) DESC, t.name
+            """
+        )
+        return cur.fetchall()
+
+    def fetch_by_tags(self, tags, match="any", month="All", year="All"):
+        # Transactions carrying any (or all) of `tags`, newest first. tags is
+        # a list or the same comma-separated text the form accepts.
+        if not isinstance(tags, str):
+            tags = ",".join(tags)
+        names = tuple(parse_tags(tags))
+        if not names:
+            return []
+        return self._fetch_by_tags(names, match, month, year)
+
+    @cached_query
+    def _fetch_by_tags(self, names, match, month, year):
+        conn = self._connection()
+        cur = conn.cursor()
+
+        marks = ", ".join("?" * len(names))
+        tagged = f"""
+            SELECT tt.transaction_id
+            FROM tags t
+            JOIN transaction_tags tt ON tt.tag_id = t.id
+            WHERE t.name IN ({marks})
+        """
+        params = list(names)
+        if match == "all":
+            tagged += " GROUP BY tt.transaction_id HAVING COUNT(*) = ?"
+            params.append(len(names))
+        elif match != "any":
+            raise ValueError(f"match must be 'any' or 'all', not {match!r}")
+
+        clauses, period_params = _period_filter(month, year)
+        query = f"""
+            SELECT id, date, amount, type, category, payment_method, tags, currency
+            FROM transactions
+            WHERE id IN ({tagged})
+        """
+        for clause in clauses:
+            query += f" AND {clause}"
+
+        query += " ORDER BY date DESC, id DESC"
+
+        cur.execute(query, params + period_params)
+        return _money(cur.fetchall(), 2)
+
+    @cached_query
+    def get_spend_by_tag(self, month="All", year="All", currency=BASE_CURRENCY):
+        # [(tag, total expense), ...] largest first. A transaction with two
+        # tags counts towards both.
+        conn = self._connection()
+        cur = conn.cursor()
+
+        clauses, params = _period_filter(month, year)
+        amount, amount_params = self._amount(
+            conn, currency, clauses, params, alias="x", column="amount"
+        )
+        where = " WHERE " + " AND ".join(["x.type = 'expense'"] + [f"x.{c}" for c in clauses])
+        if amount_params:
+            # Rows in `currency` are summed as they are; the rest converted
+            # per tag and daily_rollup bucket, see _converted().
+            query = f"""
+                SELECT t.name, SUM(s.spend) AS spend
+                FROM (
+                    SELECT tt.tag_id, SUM(x.amount) AS spend
+                    FROM transaction_tags tt
+                    JOIN transactions x ON x.id = tt.transaction_id{where} AND x.currency = ?
+                    GROUP BY tt.tag_id
+                    UNION ALL
+                    SELECT x.tag_id, SUM({amount})
+                    FROM (
+                        SELECT tt.tag_id, x.date, x.currency, SUM(x.amount) AS amount
+                        FROM transaction_tags tt
+                        JOIN transactions x ON x.id = tt.transaction_id{where} AND x.currency != ?
+                        GROUP BY tt.tag_id, x.date, COALESCE(x.category, ''), x.currency
+                    ) x
+                    GROUP BY x.tag_id
+                ) s
+                JOIN tags t ON t.id = s.tag_id
+                GROUP BY s.tag_id
+                HAVING spend IS NOT NULL
+            """
+            params = params + [currency] + amount_params + params + [currency]
+            amount_params = []
+        else:
+            query = f"""
+                SELECT t.name, SUM(x.amount) AS spend
+                FROM transaction_tags tt
+                JOIN tags t ON t.id = tt.tag_id
+                JOIN transactions x ON x.id = tt.transaction_id{where}
+                GROUP BY tt.tag_id
+            """
+
+        query += " ORDER BY spend DESC, t.name"
+
+        cur.execute(query, amount_params + params)
+        return _money(cur.fetchall(), 1)
+
+    # ======================================================
+    # BUDGETS (DEFINITIONS + SPENDING PER PERIOD)
+    # ======================================================
+    def set_budget(self, category, period, limit, rollover=False):
+        # One budget per (category, period); setting it again replaces the
+        # limit/rollover. limit is in BASE_CURRENCY. Returns the budget id.
+        with self._write() as conn:
+            return conn.execute(
+                """
+                INSERT INTO budgets (category, period, limit_amount, rollover)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (category, period) DO UPDATE
+                SET limit_amount = excluded.limit_amount,
+                    rollover = excluded.rollover
+                RETURNING id
+                """,
+                (category, period, to_minor(limit), int(bool(rollover))),
+            ).fetchone()[0]
+
+    def delete_budget(self, budget_id):
+        with self._write() as conn:
+            conn.execute("DELETE FROM budgets WHERE id = ?", (budget_id,))
+
+    @cached_query
+    def fetch_budgets(self):
+        conn = self._connection()
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            SELECT id, category, period, limit_amount, rollover
+            FROM budgets
+            ORDER BY id
+            """
+        )
+        return _money(cur.fetchall(), 3)
+
+    @cached_query
+    def fetch_budget_spending(self, currency=BASE_CURRENCY):
+        # Expense total of every budget in every period it has spending in,
+        # all budgets in one grouped pass over daily_rollup. The period is
+        # year * 12 + month - 1 for monthly budgets and the year for yearly
+        # ones; rows come back ordered by (budget id, period). Totals are
+        # in `currency`, while budget limits (fetch_budgets) are always in
+        # BASE_CURRENCY: compare the two only for BASE_CURRENCY, as
+        # BudgetEngine.load does.
+        conn = self._connection()
+        cur = conn.cursor()
+
+        amount, amount_params = self._amount(conn, currency, [], [])
+        cur.execute(
+            f"""
+            SELECT b.id,
+                   CASE b.period
+                       WHEN 'monthly' THEN r.year * 12 + r.month - 1
+                       ELSE r.year
+                   END AS period_index,
+                   SUM({amount}) AS spent
+            FROM budgets b
+            JOIN daily_rollup r
+              ON r.type = 'expense' AND r.category = b.category
+            GROUP BY b.id, period_index
+            HAVING spent IS NOT NULL
+            ORDER BY b.id, period_index
+            """,
+            amount_params,
+        )
+        return _money(cur.fetchall(), 2)
+
+    # ======================================================
+    # RECURRING RULES
+    # ======================================================
+    def add_recurring_rule(self, name, rrule, dtstart, data, currency=BASE_CURRENCY):
+        # data is (amount, type, category, payment_method, tags). Raises
+        # ValueError, storing nothing, if rrule/dtstart do not parse.
+        parse_rule(rrule, dtstart)
+        with self._write() as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO recurring_rules
+                (name, rrule, dtstart, amount, type, category, payment_method, tags,
+                 currency)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (name, rrule, dtstart, to_minor(data[0]), *data[1:], currency),
+            )
+        return cur.lastrowid
+
+    def delete_recurring_rule(self, rule_id):
+        # Occurrences already materialized stay in the ledger.
+        with self._write() as conn:
+            conn.execute("DELETE FROM recurring_rules WHERE id = ?", (rule_id,))
+
+    @cached_query
+    def fetch_recurring_rules(self):
+        conn = self._connection()
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            SELECT id, name, rrule, dtstart, amount, type, category,
+                   payment_method, tags, currency, last_run
+            FROM recurring_rules
+            ORDER BY id
+            """
+        )
+        return _money(cur.fetchall(), 4)
+
+    def add_recurring_occurrences(self, rows, rule_ids, run_date):
+        # rows yields (rule_id, date, amount, type, category, payment_method,
+        # tags, currency). Inserted with one executemany, and last_run advanced for
+        # rule_ids, all in the same transaction; an occurrence that already
+        # exists is skipped. Returns how many rows were inserted.
+        with self._write() as conn:
+            first_id = next_id(conn)
+            cur = conn.executemany(
+                """
+                INSERT OR IGNORE INTO transactions
+                (rule_id, date, amount, type, category, payment_method, tags, currency)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                ((r[0], r[1], to_minor(r[2]), *r[3:]) for r in rows),
+            )
+            inserted = cur.rowcount
+            sync_tags(conn, first_id)
+
+            conn.executemany(
+                "UPDATE recurring_rules SET last_run = ? WHERE id = ?",
+                [(run_date, rule_id) for rule_id in rule_ids],
+            )
+
+        return inserted
+
+    # ======================================================
+    # EXCHANGE RATES
+    # ======================================================
+    def add_rates(self, batches):
+        # batches yields lists of (currency, date, rate), see db/currency.py;
+        # a rate already stored for (currency, date) is replaced. One
+        # transaction; returns how many rates were written.
+        written = 0
+        with self._write() as conn:
+            for batch in batches:
+                conn.executemany(
+                    """
+                    INSERT INTO exchange_rates (currency, date, rate)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (currency, date) DO UPDATE SET rate = excluded.rate
+                    """,
+                    batch,
+                )
+                written += len(batch)
+        return written
+
+    @cached_query
+    def rate_table(self):
+        # Shared until the next write, together with its lookup memo.
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT currency, date, rate FROM exchange_rates ORDER BY currency, date"
+        )
+        return RateTable(rows)
+
     # ======================================================
     # DELETE TRANSACTION
     # ======================================================
     def delete_transaction(self, txn_id):
-        conn = get_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM transactions WHERE id = ?", (txn_id,))
-        conn.commit()
-        conn.close()
+        with self._write() as conn:
+            row = conn.execute(
+                """
+                SELECT id, date, amount, type, category, payment_method, tags, currency
+                FROM transactions
+                WHERE id = ?
+                """,
+                (txn_id,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            conn.execute("DELETE FROM transactions WHERE id = ?", (txn_id,))
+
+        return Change("delete", _money([row], 2)[0])
@@ -0,0 +1,108 @@
+# Maintenance for the trigger-maintained daily_rollup / monthly_rollup tables.
+#
+#   python -m db.rollups verify [path/to/expenses.db]
+#   python -m db.rollups rebuild [path/to/expenses.db]
+import argparse
+import sys
+
+from db import models
+
+_DAILY_FROM_TRANSACTIONS = """
+    SELECT year, month, CAST(substr(date, 9, 2) AS INTEGER),
+           COALESCE(type, ''), COALESCE(category, ''), currency, date,
+           SUM(COALESCE(amount, 0)), COUNT(*)
+    FROM transactions
+    WHERE date IS NOT NULL
+    GROUP BY date, COALESCE(type, ''), COALESCE(category, ''), currency
+"""
+
+_MONTHLY_FROM_TRANSACTIONS = """
+    SELECT year, month, COALESCE(type, ''), currency, SUM(COALESCE(amount, 0)), COUNT(*)
+    FROM transactions
+    WHERE date IS NOT NULL
+    GROUP BY year, month, COALESCE(type, ''), currency
+"""
+
+# ======================================================
+# REBUILD (RECOMPUTE FROM transactions)
+# ======================================================
+def rebuild(conn):
+    with conn:
+        conn.execute("DELETE FROM daily_rollup")
+        conn.execute("DELETE FROM monthly_rollup")
+        conn.execute(
+            "INSERT INTO daily_rollup "
+            "(year, month, day, type, category, currency, date, total, count) "
+            + _DAILY_FROM_TRANSACTIONS
+        )
+        conn.execute(
+            "INSERT INTO monthly_rollup (year, month, type, currency, total, count) "
+            + _MONTHLY_FROM_TRANSACTIONS
+        )
+    models.get_pool().cache.invalidate()
+
+
+# ======================================================
+# VERIFY (COMPARE AGAINST A FRESH RECOMPUTE)
+# ======================================================
+# Returns (table, key, stored, expected) for every bucket that drifted; an
+# empty list means the rollups are exact. Totals are integer minor units, so
+# stored and recomputed sums must match exactly.
+def verify(conn):
+    problems = []
+
+    checks = [
+        (
+            "daily_rollup",
+            "SELECT year, month, day, type, category, currency, total, count "
+            "FROM daily_rollup",
+            _DAILY_FROM_TRANSACTIONS,
+            6,
+        ),
+        (
+            "monthly_rollup",
+            "SELECT year, month, type, currency, total, count FROM monthly_rollup",
+            _MONTHLY_FROM_TRANSACTIONS,
+            4,
+        ),
+    ]
+
+    for table, stored_sql, expected_sql, key_len in checks:
+        stored = {r[:key_len]: r[-2:] for r in conn.execute(stored_sql)}
+        expected = {r[:key_len]: r[-2:] for r in conn.execute(expected_sql)}
+
+        for key in stored.keys() | expected.keys():
+            have, want = stored.get(key), expected.get(key)
+            if have != want:
+                problems.append((table, key, have, want))
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild or verify rollup tables.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("db", nargs="?", default=models.DB_NAME)
+    args = parser.parse_args(argv)
+
+    models.configure(args.db)
+    models.init_db()
+    conn = models.get_connection()
+
+    if args.command == "rebuild":
+        rebuild(conn)
+        print("Rollups rebuilt.")
+
+    problems = verify(conn)
+    for table, key, have, want in problems:
+        print(f"{table} {key}: stored={have} expected={want}")
+    if problems:
+        print(f"{len(problems)} rollup bucket(s) out of sync.")
+        return 1
+
+    print("Rollups OK.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
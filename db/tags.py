@@ -0,0 +1,78 @@
+# Normalized tags: transactions.tags stays the free text the user typed
+# ("Food, weekend"), and every comma-separated part is also stored,
+# trimmed and lower-cased, in tags + transaction_tags so tag questions are
+# index lookups instead of LIKE '%x%' scans.
+#
+# Inserts go through sync_tags() in the same transaction (triggers cannot
+# hold the recursive CTE that splits the text); deletes are handled by the
+# trg_transaction_tags_delete trigger.
+#
+# normalize_tag() is the one definition of a tag name: the SQL calls it as
+# a registered function, since SQLite's own lower() and trim() only know
+# ASCII letters and spaces. register_functions() adds it once per
+# connection; defining a function again expires every statement the
+# connection has prepared, triggers included.
+
+SEPARATOR = ","
+
+# Splits tags of every transaction with id >= ? into (transaction_id, tag).
+_SPLIT = """
+    WITH RECURSIVE split(transaction_id, tag, rest) AS (
+        SELECT id, '', tags || ','
+        FROM transactions
+        WHERE id >= ? AND tags IS NOT NULL AND tags != ''
+        UNION ALL
+        SELECT transaction_id,
+               normalize_tag(substr(rest, 1, instr(rest, ',') - 1)),
+               substr(rest, instr(rest, ',') + 1)
+        FROM split
+        WHERE rest != ''
+    )
+"""
+
+
+def normalize_tag(part):
+    # One comma-separated part -> tag name; "" for a blank part.
+    return part.strip().lower()
+
+
+def parse_tags(text):
+    # Tag names in `text`, for user-supplied filters.
+    if not text:
+        return []
+    parts = (normalize_tag(p) for p in text.split(SEPARATOR))
+    return list(dict.fromkeys(p for p in parts if p))
+
+
+def register_functions(conn):
+    conn.create_function("normalize_tag", 1, normalize_tag, deterministic=True)
+
+
+def sync_tags(conn, first_id):
+    # Index the tags of every transaction with id >= first_id. Must run
+    # inside the transaction that inserted them, on a connection passed to
+    # register_functions(). conn may be a cursor, as in the migrations.
+    conn.execute(
+        _SPLIT
+        + """
+        INSERT OR IGNORE INTO tags (name)
+        SELECT DISTINCT tag FROM split WHERE tag != ''
+        """,
+        (first_id,),
+    )
+    conn.execute(
+        _SPLIT
+        + """
+        INSERT OR IGNORE INTO transaction_tags (tag_id, transaction_id)
+        SELECT t.id, s.transaction_id
+        FROM split s
+        JOIN tags t ON t.name = s.tag
+        """,
+        (first_id,),
+    )
+
+
+def next_id(conn):
+    # First id the next insert can get (AUTOINCREMENT never reuses ids).
+    row = conn.execute("SELECT MAX(id) FROM transactions").fetchone()
+    return (row[0] or 0) + 1
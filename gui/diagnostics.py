@@ -0,0 +1,124 @@
+import tkinter as tk
+from tkinter import ttk
+
+from db.models import get_pool
+from utils.diagnostics import diagnostics, format_slow
+
+CARD_BG = "#1c1c1c"
+TEXT_LIGHT = "#ffffff"
+
+# How often (ms) the panel redraws while recording.
+REFRESH_MS = 1000
+
+# Slow queries shown, newest first.
+SLOW_SHOWN = 20
+
+
+class DiagnosticsView(ttk.Frame):
+    # Live view of utils.diagnostics: per query / refresh timings, the slow
+    # query log with plans, and the query cache counters. Polls only while
+    # recording is on.
+    def __init__(self, parent):
+        super().__init__(parent, style="Card.TFrame", padding=10)
+        self._poll_id = None
+
+        # ---------- CONTROLS ----------
+        controls = ttk.Frame(self, style="Card.TFrame")
+        controls.pack(fill="x", pady=(0, 8))
+
+        self.enabled_var = tk.BooleanVar(value=diagnostics.enabled)
+        ttk.Checkbutton(
+            controls,
+            text="Record timings",
+            variable=self.enabled_var,
+            command=self.toggle,
+        ).pack(side="left")
+        ttk.Button(controls, text="Reset", command=self.reset).pack(side="right")
+
+        # ---------- TIMINGS (ROLLING HISTOGRAMS) ----------
+        columns = ("count", "p50", "p95", "max")
+        self.table = ttk.Treeview(self, columns=columns, show="tree headings", height=10)
+        self.table.heading("#0", text="Name")
+        self.table.column("#0", width=170, stretch=True)
+        for col in columns:
+            self.table.heading(col, text=col)
+            self.table.column(col, width=55, anchor="e", stretch=False)
+        self.table.pack(fill="both", expand=True)
+
+        # ---------- SLOW QUERIES ----------
+        ttk.Label(self, text="Slow queries", style="Card.TLabel").pack(anchor="w", pady=(8, 2))
+        self.slow_text = tk.Text(
+            self, height=8, wrap="none", bg=CARD_BG, fg=TEXT_LIGHT, font=("Consolas", 9)
+        )
+        self.slow_text.pack(fill="both", expand=True)
+
+        self.cache_label = ttk.Label(self, style="Card.TLabel")
+        self.cache_label.pack(anchor="w", pady=(6, 0))
+
+        self.update_view()
+        if diagnostics.enabled:
+            self._schedule()
+
+    # ======================================================
+    # CONTROLS
+    # ======================================================
+    def toggle(self):
+        if self.enabled_var.get():
+            diagnostics.enable()
+            self._schedule()
+        else:
+            diagnostics.disable()
+            if self._poll_id is not None:
+                self.after_cancel(self._poll_id)
+                self._poll_id = None
+        self.update_view()
+
+    def reset(self):
+        diagnostics.reset()
+        self.update_view()
+
+    # ======================================================
+    # REDRAW
+    # ======================================================
+    def update_view(self):
+        self.table.delete(*self.table.get_children())
+        for name, s in diagnostics.summary().items():
+            self.table.insert(
+                "",
+                "end",
+                text=name,
+                values=(
+                    s["count"],
+                    f"{s['p50_ms']:.1f}",
+                    f"{s['p95_ms']:.1f}",
+                    f"{s['max_ms']:.1f}",
+                ),
+            )
+
+        self.slow_text.configure(state="normal")
+        self.slow_text.delete("1.0", "end")
+        for entry in list(diagnostics.slow)[-SLOW_SHOWN:][::-1]:
+            self.slow_text.insert("end", format_slow(entry) + "\n\n")
+        self.slow_text.configure(state="disabled")
+
+        cache = get_pool().cache.stats()
+        self.cache_label.config(
+            text=f"Query cache: {cache['entries']} entries, "
+            f"{cache['hits']} hits / {cache['misses']} misses"
+        )
+
+    def _schedule(self):
+        if self._poll_id is None:
+            self._poll_id = self.after(REFRESH_MS, self._tick)
+
+    def _tick(self):
+        self._poll_id = None
+        self.update_view()
+        if diagnostics.enabled:
+            self._schedule()
+
+    def destroy(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        super().destroy()
@@ -0,0 +1,169 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db.models import get_pool
+from db.repository import Repository
+
+# How often (ms) the Tk thread drains finished queries while any are in flight.
+POLL_MS = 16
+
+
+class _Request:
+    def __init__(self, key):
+        self.key = key
+        self.cancelled = False
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def cancel(self):
+        with self.lock:
+            self.cancelled = True
+            # Abort a statement that is already running on the worker.
+            if self.conn is not None:
+                self.conn.interrupt()
+
+
+class QueryExecutor:
+    # Runs Repository reads on worker threads, each with its own read-only
+    # pooled connection, and hands results back on the Tk thread.
+    #
+    # Requests are keyed: submitting a new request under a key cancels the
+    # previous one, so a burst of filter changes only renders the last.
+    # submit() and the callbacks always run on the Tk thread.
+    def __init__(self, root, workers=None):
+        self.root = root
+        self._pool = get_pool()
+        self._local = threading.local()
+        # Readers checked out by the workers, given back in shutdown().
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(
+            max_workers=workers or self._pool.readers,
+            thread_name_prefix="query",
+            initializer=self._init_worker,
+        )
+        self._done = queue.SimpleQueue()
+        self._latest = {}
+        self._poll_id = None
+
+    def _init_worker(self):
+        conn = self._pool.acquire()
+        with self._conns_lock:
+            self._conns.append(conn)
+        self._local.repo = Repository(conn=conn)
+
+    # ======================================================
+    # SUBMIT (fn(repo, *args) ON A WORKER)
+    # ======================================================
+    def submit(self, key, fn, *args, callback=None, errback=None):
+        stale = self._latest.get(key)
+        if stale is not None:
+            stale[0].cancel()
+
+        request = _Request(key)
+        future = self._threads.submit(self._run, request, fn, args)
+        self._latest[key] = (request, future)
+        future.add_done_callback(
+            lambda f: self._done.put((request, f, callback, errback))
+        )
+
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_MS, self._poll)
+        return future
+
+    def pending(self, key):
+        return key in self._latest
+
+    def cancel(self, key):
+        stale = self._latest.pop(key, None)
+        if stale is not None:
+            stale[0].cancel()
+            stale[1].cancel()
+
+    def _run(self, request, fn, args):
+        repo = self._local.repo
+        with request.lock:
+            if request.cancelled:
+                return None
+            request.conn = repo.conn
+        try:
+            return fn(repo, *args)
+        finally:
+            with request.lock:
+                request.conn = None
+
+    # ======================================================
+    # DELIVER RESULTS ON THE TK THREAD
+    # ======================================================
+    def _poll(self):
+        self._poll_id = None
+
+        while True:
+            try:
+                request, future, callback, errback = self._done.get_nowait()
+            except queue.Empty:
+                break
+
+            latest = self._latest.get(request.key)
+            if latest is None or latest[0] is not request:
+                continue  # superseded by a newer request
+            del self._latest[request.key]
+
+            if request.cancelled or future.cancelled():
+                continue
+
+            error = future.exception()
+            if error is None:
+                if callback:
+                    callback(future.result())
+            elif errback:
+                errback(error)
+            else:
+                self.root.report_callback_exception(
+                    type(error), error, error.__traceback__
+                )
+
+        if self._latest:
+            self._poll_id = self.root.after(POLL_MS, self._poll)
+
+    def shutdown(self):
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        for key in list(self._latest):
+            self.cancel(key)
+        # Running statements were interrupted above, so the workers finish
+        # promptly; wait for them before their connections go back.
+        self._threads.shutdown(wait=True, cancel_futures=True)
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            self._pool.release(conn)
+
+
+class InlineExecutor:
+    # Same interface, but runs on the calling thread with the UI connection.
+    # Used when a view is created without a QueryExecutor.
+    def __init__(self, repo=None):
+        self.repo = repo or Repository()
+
+    def submit(self, key, fn, *args, callback=None, errback=None):
+        try:
+            result = fn(self.repo, *args)
+        except Exception as e:
+            if errback is None:
+                raise
+            errback(e)
+            return
+        if callback:
+            callback(result)
+
+    def pending(self, key):
+        return False
+
+    def cancel(self, key):
+        pass
+
+    def shutdown(self):
+        pass
@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk
-from gui.transaction_form import TransactionForm
 from gui.transaction_list import TransactionList
-from gui.reports import ReportsWindow
 from gui.settings import SettingsWindow
+from gui.diagnostics import DiagnosticsView
+from gui.executor import QueryExecutor
+from gui.scheduler import RefreshScheduler
 from db.models import init_db
+from business.recurring import apply_recurring
+from utils.startup import startup
+
+# gui.reports (matplotlib, PIL, NumPy) and gui.transaction_form (tkcalendar)
+# are imported on first use, so none of them delay the first window.
 
 # Ferrari theme colors
 FERRARI_RED = "#C4001A"
@@ -12,18 +18,36 @@ BG_DARK = "#0b0b0b"
 CARD_BG = "#1c1c1c"
 TEXT_LIGHT = "#ffffff"
 
+# Pause (ms) between the first paint and building the reports panel.
+STAGE_DELAY_MS = 10
+
 
 class MainWindow:
-    def __init__(self, root):
+    def __init__(self, root, on_started=None):
         init_db()
+        # Catch up recurring rules before any view reads the ledger
+        apply_recurring()
         self.root = root
         self.root.title("K Personal Expense Checker")
         self.root.configure(bg=BG_DARK)
         self.root.geometry("1200x700")
 
+        # Reads run on worker threads so the Tk loop never waits on SQLite
+        self.executor = QueryExecutor(self.root)
+        # Every redraw goes through here: coalesced to one pass per idle
+        self.scheduler = RefreshScheduler(self.root)
+
+        # Staged startup: header + list now, reports after the first paint.
+        # on_started runs once the reports panel is built as well.
+        self.on_started = on_started
+
         self.setup_style()
         self.build_header()
         self.build_dashboard()
+        startup.mark("shell")
+
+        self.list_view.bind("<Map>", self._on_list_mapped)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
 
     # ---------------- STYLES ----------------
     def setup_style(self):
@@ -94,7 +118,9 @@ class MainWindow:
 
         self.list_view = TransactionList(
             left,
-            refresh_reports_cb=self.refresh_reports
+            change_cb=self.apply_change,
+            executor=self.executor,
+            scheduler=self.scheduler,
         )
         self.list_view.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -105,29 +131,77 @@ class MainWindow:
         ttk.Label(middle, text="Reports", style="Card.TLabel") \
             .pack(anchor="w", padx=10, pady=5)
 
-        self.reports_view = ReportsWindow(middle, inline=True)
-        self.reports_view.pack(fill="both", expand=True, padx=10, pady=10)
+        # Placeholder until build_reports() runs after the first paint
+        self.reports_frame = middle
+        self.reports_placeholder = ttk.Label(
+            middle, text="Loading reports…", style="Card.TLabel"
+        )
+        self.reports_placeholder.pack(expand=True)
 
-        # -------- RIGHT : SETTINGS --------
+        # -------- RIGHT : SETTINGS + DIAGNOSTICS --------
         right = ttk.Frame(content, style="Card.TFrame")
         right.grid(row=0, column=2, sticky="nsew")
 
-        ttk.Label(right, text="Settings", style="Card.TLabel") \
-            .pack(anchor="w", padx=10, pady=5)
+        tabs = ttk.Notebook(right)
+        tabs.pack(fill="both", expand=True, padx=10, pady=10)
+
+        settings_tab = ttk.Frame(tabs, style="Card.TFrame")
+        self.settings_view = SettingsWindow(settings_tab, inline=True)
+        tabs.add(settings_tab, text="Settings")
+
+        self.diagnostics_view = DiagnosticsView(tabs)
+        tabs.add(self.diagnostics_view, text="Diagnostics")
 
-        self.settings_view = SettingsWindow(right, inline=True)
-        self.settings_view.pack(fill="both", expand=True, padx=10, pady=10)
+    # ---------------- STAGED STARTUP ----------------
+    def _on_list_mapped(self, event=None):
+        self.list_view.unbind("<Map>")
+        self.root.after_idle(self._first_paint)
+
+    def _first_paint(self):
+        # Flush the pending redraws so the mark is taken after the paint
+        self.root.update_idletasks()
+        startup.mark("first paint")
+        self.root.after(STAGE_DELAY_MS, self.build_reports)
+
+    def build_reports(self):
+        from gui.reports import ReportsWindow
+
+        self.reports_placeholder.destroy()
+        self.reports_view = ReportsWindow(
+            self.reports_frame,
+            inline=True,
+            executor=self.executor,
+            scheduler=self.scheduler,
+        )
+        self.reports_view.pack(fill="both", expand=True, padx=10, pady=10)
+        startup.mark("reports")
+
+        if self.on_started:
+            self.on_started()
 
     # ---------------- GLOBAL REFRESH ----------------
     def refresh_all(self):
-        """Refresh list + reports together"""
-        self.list_view.refresh()
-        self.refresh_reports()
+        """Refresh list + reports together (one pass, next idle)"""
+        self.scheduler.invalidate("transactions")
 
     def refresh_reports(self):
+        self.scheduler.mark_dirty("reports")
+
+    # ---------------- INCREMENTAL UPDATE ----------------
+    def apply_change(self, change):
+        """Patch list + reports with a single add/delete"""
+        self.list_view.apply_change(change)
         if hasattr(self, "reports_view"):
-            self.reports_view.refresh()
+            self.reports_view.apply_change(change)
+
+    # ---------------- CLOSE ----------------
+    def close(self):
+        # Stop the query workers and hand their readers back to the pool
+        self.executor.shutdown()
+        self.root.destroy()
 
     # ---------------- ADD TRANSACTION ----------------
     def open_add(self):
-        TransactionForm(self.root, self.refresh_all)
+        from gui.transaction_form import TransactionForm
+
+        TransactionForm(self.root, self.apply_change)
@@ -1,215 +1,322 @@
 import tkinter as tk
 from tkinter import ttk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-from db.repository import Repository
-from datetime import datetime
-from PIL import Image, ImageTk, ImageDraw
-import os
-import math
+from matplotlib.figure import Figure
+from business.budgets import ALERT_LABELS, EXCEEDED, WARNING, BudgetEngine
+from db.currency import BASE_CURRENCY, symbol
+from db.repository import DashboardSnapshot, Repository
+from gui.executor import InlineExecutor
+from gui.scheduler import RefreshScheduler
+from utils.charts import (
+    EXPENSE_COLOR,
+    GAUGE_ANGLES,
+    INCOME_COLOR,
+    create_line_artists,
+    draw_pie,
+    gauge_image,
+    gauge_state,
+    update_line_chart,
+)
+from utils.diagnostics import timed
+from PIL import ImageTk
+from datetime import date as Date
 
 # ================= THEME =================
 CARD_BG = "#1c1c1c"
 TEXT_LIGHT = "#ffffff"
 FERRARI_RED = "#C4001A"
-INCOME_COLOR = "#32CD32"
-EXPENSE_COLOR = "#FFA500"
+ALERT_COLORS = {WARNING: "#FFD700", EXCEEDED: FERRARI_RED}
+
+
+SNAPSHOT_QUERY = "reports:snapshot"
+BUDGETS_QUERY = "reports:budgets"
+VIEW_NAME = "reports"
+FILTERS_TOPIC = "reports:filters"
+
+# Rows shown in the budgets strip, most used first.
+BUDGET_ROWS = 5
+
+
+def budget_period(month, year):
+    # Budgets follow the period filter; an "All" part means the current one.
+    today = Date.today()
+    year = today.year if year == "All" else int(year)
+    month = today.month if month == "All" else int(month)
+    return year, month
 
 
 class ReportsWindow(ttk.Frame):
-    def __init__(self, parent, inline=False):
+    def __init__(self, parent, inline=False, executor=None, scheduler=None):
         super().__init__(parent)
 
         self.repo = Repository()
+        self.executor = executor or InlineExecutor(self.repo)
+        self.scheduler = scheduler or RefreshScheduler(self)
+        self.scheduler.register(
+            VIEW_NAME, self.refresh, depends_on=("transactions", FILTERS_TOPIC)
+        )
         self.month = "All"
+        self.year = "All"
+        self._loading = False
+        self._loading_budgets = False
+        self.snapshot = DashboardSnapshot("All", "All", 0, 0, (), ())
+        self.budget_engine = BudgetEngine((), ())
 
         self.pack(fill="both", expand=True, padx=10, pady=10)
+        self.build_layout()
         self.build_dashboard()
+        self.load_data()
 
     # ======================================================
     # PUBLIC API
     # ======================================================
-    def set_filters(self, month):
+    def set_filters(self, month, year="All"):
         self.month = month
-        self.refresh()
+        self.year = year
+        self.scheduler.invalidate(FILTERS_TOPIC)
 
     def refresh(self):
+        self.load_data()
+
+    def apply_change(self, change):
+        # A snapshot still being read may predate this write, and a row in
+        # another currency needs converting at its date's rate; ask again.
+        if self._loading or self._loading_budgets or change.row[7] != self.snapshot.currency:
+            self.load_data()
+            return
+
+        # Fold one inserted/deleted row into the snapshot and the budgets of
+        # its category, and redraw without going back to the database.
+        self.snapshot = self.snapshot.apply(change)
+        self.budget_engine.apply(change)
         self.build_dashboard()
 
     # ======================================================
-    # DASHBOARD
+    # DATA (ONE SNAPSHOT PER REFRESH, READ OFF THE TK THREAD)
     # ======================================================
-    def build_dashboard(self):
-        for w in self.winfo_children():
-            w.destroy()
+    def load_data(self):
+        self._loading = True
+        self.executor.submit(
+            SNAPSHOT_QUERY,
+            Repository.dashboard_snapshot,
+            self.month,
+            self.year,
+            callback=self._show_snapshot,
+        )
+        self._loading_budgets = True
+        self.executor.submit(
+            BUDGETS_QUERY, BudgetEngine.load, callback=self._show_budgets
+        )
 
-        total_income = self.repo.get_total("income", self.month)
-        total_expense = self.repo.get_total("expense", self.month)
+    def _show_snapshot(self, snapshot):
+        self._loading = False
+        self.snapshot = snapshot
+        self.build_dashboard()
+
+    def _show_budgets(self, engine):
+        self._loading_budgets = False
+        self.budget_engine = engine
+        self.update_budgets()
 
+    # ======================================================
+    # LAYOUT (WIDGETS + FIGURES ARE CREATED ONCE)
+    # ======================================================
+    def build_layout(self):
         # ---------- TOP ----------
         top = tk.Frame(self, bg=CARD_BG)
         top.pack(fill="x", pady=10)
 
         gauge_frame = tk.Frame(top, bg=CARD_BG)
         gauge_frame.pack(side="left", padx=20)
-        self.create_gauge(gauge_frame, total_income, total_expense)
+        self.create_gauge(gauge_frame)
 
         cards = tk.Frame(top, bg=CARD_BG)
         cards.pack(side="left", fill="x", expand=True)
 
-        self.create_card(cards, "Total Income", f"₹ {total_income:.2f}", INCOME_COLOR)
-        self.create_card(cards, "Total Expense", f"₹ {total_expense:.2f}", EXPENSE_COLOR)
+        self.income_card = self.create_card(cards, "Total Income", INCOME_COLOR)
+        self.expense_card = self.create_card(cards, "Total Expense", EXPENSE_COLOR)
+
+        # ---------- BUDGETS ----------
+        self.budgets_frame = tk.Frame(self, bg=CARD_BG)
+        self.budgets_frame.pack(fill="x")
+        self.budget_rows = [self.create_budget_row(row) for row in range(BUDGET_ROWS)]
 
         # ---------- CHARTS ----------
         charts = tk.Frame(self, bg=CARD_BG)
         charts.pack(fill="both", expand=True, pady=10)
 
-        cats, vals = self.repo.get_expense_by_category(self.month)
-        self.create_pie_chart(charts, cats, vals, "Expenses by Category").pack(
-            side="left", expand=True
-        )
-
+        self.create_pie_chart(charts).pack(side="left", expand=True)
         self.create_line_chart(charts).pack(side="left", expand=True)
 
+    # ======================================================
+    # DASHBOARD (UPDATE IN PLACE)
+    # ======================================================
+    @timed("ReportsWindow.build_dashboard")
+    def build_dashboard(self):
+        snap = self.snapshot
+        total_income = snap.income
+        total_expense = snap.expense
+
+        self.update_gauge(total_income, total_expense)
+
+        sign = symbol(snap.currency)
+        # Rows in a currency without rates are left out; say which.
+        note = f"  (excl. {', '.join(snap.unconverted)})" if snap.unconverted else ""
+        self.income_card.config(text=f"{sign} {total_income:.2f}{note}")
+        self.expense_card.config(text=f"{sign} {total_expense:.2f}{note}")
+
+        cats = [c for c, _ in snap.categories]
+        vals = [v for _, v in snap.categories]
+        self.update_pie_chart(cats, vals, "Expenses by Category")
+        self.update_line_chart(snap)
+        self.update_budgets()
+
+    # ======================================================
+    # TEARDOWN
+    # ======================================================
+    def destroy(self):
+        # Drop artists and canvases so nothing keeps the figures alive.
+        for fig in (self.pie_fig, self.line_fig):
+            fig.clear()
+        self.pie_canvas = self.line_canvas = None
+        super().destroy()
+
     # ======================================================
     # CARD
     # ======================================================
-    def create_card(self, parent, title, value, color):
+    def create_card(self, parent, title, color):
         frame = tk.Frame(parent, bg=CARD_BG)
         frame.pack(fill="x", pady=6)
 
         tk.Label(frame, text=title, fg=TEXT_LIGHT, bg=CARD_BG, font=("Segoe UI", 11, "bold")).pack(anchor="w")
-        tk.Label(
+        value = tk.Label(
             frame,
-            text=value,
+            text="",
             fg=color,
             bg=CARD_BG,
             font=("Segoe UI", 14, "bold"),
-        ).pack(anchor="w")
+        )
+        value.pack(anchor="w")
+        return value
 
     # ======================================================
-    # PIE CHART (3D MODERN STYLE)
+    # BUDGETS (UTILIZATION + ALERTS FOR THE SHOWN PERIOD)
     # ======================================================
-    def create_pie_chart(self, parent, categories, values, title):
-        fig, ax = plt.subplots(figsize=(3.5, 3.5), dpi=100)
-        fig.patch.set_facecolor(CARD_BG)
-        ax.set_facecolor(CARD_BG)
-        ax.axis('equal')  # Make circular
-
-        if not values or sum(values) == 0:
-            wedges, texts = ax.pie(
-                [1], labels=["No data"], colors=["#555555"], startangle=90,
-                wedgeprops=dict(width=0.6, edgecolor=CARD_BG)
+    def create_budget_row(self, row):
+        # Label, bar and amounts of one strip row, gridded but hidden until
+        # a budget fills them.
+        name = tk.Label(self.budgets_frame, fg=TEXT_LIGHT, bg=CARD_BG, font=("Segoe UI", 9))
+        bar = ttk.Progressbar(self.budgets_frame, maximum=100, length=120)
+        amounts = tk.Label(self.budgets_frame, bg=CARD_BG, font=("Segoe UI", 9, "bold"))
+
+        name.grid(row=row, column=0, sticky="w")
+        bar.grid(row=row, column=1, padx=8)
+        amounts.grid(row=row, column=2, sticky="w")
+        widgets = (name, bar, amounts)
+        for widget in widgets:
+            widget.grid_remove()
+        return widgets
+
+    @timed("ReportsWindow.update_budgets")
+    def update_budgets(self):
+        # The rows are built once; a refresh reconfigures them and hides
+        # the ones no budget fills.
+        year, month = budget_period(self.snapshot.month, self.snapshot.year)
+        statuses = self.budget_engine.period_status(year, month)[:BUDGET_ROWS]
+
+        for row, widgets in enumerate(self.budget_rows):
+            if row >= len(statuses):
+                for widget in widgets:
+                    widget.grid_remove()
+                continue
+
+            status = statuses[row]
+            name, bar, amounts = widgets
+            name.config(text=f"{status.budget.category} ({status.budget.period})")
+            bar.config(value=min(status.utilization, 1.0) * 100)
+            amounts.config(
+                text=f"{symbol(BASE_CURRENCY)} {status.spent:.0f} / {status.available:.0f} "
+                f"{ALERT_LABELS[status.alert] if status.alert else ''}",
+                fg=ALERT_COLORS.get(status.alert, TEXT_LIGHT),
             )
-            for t in texts:
-                t.set_color("white")
-                t.set_fontsize(10)
-        else:
-            colors = plt.cm.Set3.colors  # pastel modern palette
-            wedges, texts, autotexts = ax.pie(
-                values,
-                labels=categories,
-                autopct="%1.1f%%",
-                startangle=90,
-                pctdistance=0.75,
-                wedgeprops=dict(width=0.6, edgecolor=CARD_BG, linewidth=1),
-                colors=colors
-            )
-            # Category labels in white
-            for t in texts:
-                t.set_color("white")
-                t.set_fontsize(9)
-            # Percentages in black
-            for at in autotexts:
-                at.set_color("black")
-                at.set_fontsize(9)
-                at.set_fontweight("bold")
-
-        ax.set_title(title, color=TEXT_LIGHT, fontsize=11, pad=10)
+            for widget in widgets:
+                widget.grid()
 
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        return canvas.get_tk_widget()
+    # ======================================================
+    # PIE CHART (3D MODERN STYLE)
+    # ======================================================
+    def create_pie_chart(self, parent):
+        # Figure() rather than plt.subplots(): nothing registers it with
+        # pyplot, so it is freed together with this view.
+        self.pie_fig = Figure(figsize=(3.5, 3.5), dpi=100)
+        self.pie_fig.patch.set_facecolor(CARD_BG)
+        self.pie_ax = self.pie_fig.add_subplot(111)
+
+        self.pie_canvas = FigureCanvasTkAgg(self.pie_fig, parent)
+        return self.pie_canvas.get_tk_widget()
+
+    @timed("ReportsWindow.update_pie_chart")
+    def update_pie_chart(self, categories, values, title):
+        # The figure and canvas are reused; only the axes is redrawn.
+        draw_pie(self.pie_ax, categories, values, title)
+        self.pie_canvas.draw_idle()
 
     # ======================================================
     # LINE CHART (INCOME VS EXPENSE WHOLE PERIOD)
     # ======================================================
     def create_line_chart(self, parent):
-        data = self.repo.fetch_transactions()  # All transactions
+        self.line_fig = Figure(figsize=(4.5, 3.5), dpi=100)
+        self.line_ax = self.line_fig.add_subplot(111)
+        self.line_artists = create_line_artists(self.line_ax)
+        self.line_fig.tight_layout()
 
-        if not data:
-            return tk.Label(parent, text="No data", fg=TEXT_LIGHT, bg=CARD_BG, font=("Segoe UI", 11))
+        self.line_canvas = FigureCanvasTkAgg(self.line_fig, parent)
+        return self.line_canvas.get_tk_widget()
 
-        # Aggregate income and expense per day
-        daily_totals = {}
-        for row in data:
-            date_str = row[1]  # Date
-            amount = float(row[2])  # Amount
-            txn_type = row[3].lower()  # Type
+    @timed("ReportsWindow.update_line_chart")
+    def update_line_chart(self, snap):
+        update_line_chart(self.line_ax, self.line_artists, snap)
+        self.line_canvas.draw_idle()
 
-            if date_str not in daily_totals:
-                daily_totals[date_str] = {'income': 0, 'expense': 0}
+    # ======================================================
+    # EXPENSOMETER GAUGE (THICK BLACK NEEDLE)
+    # ======================================================
+    def create_gauge(self, parent):
+        self.gauge_sprites = load_gauge_sprites()
 
-            if txn_type == "income":
-                daily_totals[date_str]['income'] += amount
-            elif txn_type == "expense":
-                daily_totals[date_str]['expense'] += amount
+        self.gauge_image = tk.Label(parent, bg=CARD_BG)
+        self.gauge_image.pack()
+        self.gauge_label = tk.Label(parent, bg=CARD_BG, font=("Segoe UI", 13, "bold"))
+        self.gauge_label.pack()
 
-        sorted_dates = sorted(daily_totals.keys(), key=lambda x: datetime.strptime(x, "%Y-%m-%d"))
-        dates, income, expense = [], [], []
-        for d in sorted_dates:
-            dates.append(d)
-            income.append(daily_totals[d]['income'])
-            expense.append(daily_totals[d]['expense'])
+    @timed("ReportsWindow.update_gauge")
+    def update_gauge(self, income, expense):
+        angle, label, color = gauge_state(income, expense)
 
-        # Plot graph
-        fig, ax = plt.subplots(figsize=(4.5, 3.5), dpi=100)
-        ax.plot(dates, income, label="Income", color=INCOME_COLOR, marker="o")
-        ax.plot(dates, expense, label="Expense", color=EXPENSE_COLOR, marker="o")
+        sprite = self.gauge_sprites.get(angle)
+        if sprite is not None:
+            self.gauge_image.config(image=sprite)
+        self.gauge_label.config(text=label, fg=color)
 
-        ax.set_title("Income vs Expense (All Period)", color=TEXT_LIGHT, fontsize=11)
-        ax.tick_params(axis='x', labelrotation=20, labelsize=9)
-        ax.tick_params(axis='y', labelsize=9)
-        ax.legend(fontsize=9)
-        fig.tight_layout()
 
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        return canvas.get_tk_widget()
+# ======================================================
+# GAUGE SPRITES (DECODED + COMPOSITED ONCE PER PROCESS)
+# ======================================================
+_gauge_sprites = None
 
-    # ======================================================
-    # EXPENSOMETER GAUGE (THICK BLACK NEEDLE)
-    # ======================================================
-    def create_gauge(self, parent, income, expense):
-        img_path = os.path.join("assets", "exp.png")
-        if not os.path.exists(img_path):
-            return
 
-        base = Image.open(img_path).convert("RGBA").resize((220, 220))
-        size = base.size
-        center = (size[0] // 2, size[1] // 2)
-        radius = 90  # Needle length
-
-        diff = income - expense
-        if diff < 0:
-            angle, label, color = 180, "Overspent", "red"
-        elif diff < income * 0.5:
-            angle, label, color = 90, "Moderate", "grey"
-        else:
-            angle, label, color = 0, "Good savings", "green"
-
-        overlay = Image.new("RGBA", size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(overlay)
-
-        # Thick black needle
-        rad = math.radians(180 - angle)
-        tip = (center[0] + radius * math.cos(rad),
-               center[1] - radius * math.sin(rad))
-        draw.line([center, tip], fill="black", width=6)
-
-        img = ImageTk.PhotoImage(Image.alpha_composite(base, overlay))
-
-        lbl = tk.Label(parent, image=img, bg=CARD_BG)
-        lbl.image = img
-        lbl.pack()
-        tk.Label(parent, text=label, fg=color, bg=CARD_BG, font=("Segoe UI", 13, "bold")).pack()
+def load_gauge_sprites():
+    # The needle only ever points at 0/90/180 degrees, so all three states
+    # are rendered up front and refreshes just swap the label's image.
+    global _gauge_sprites
+    if _gauge_sprites is not None:
+        return _gauge_sprites
+
+    _gauge_sprites = {}
+    for angle in GAUGE_ANGLES:
+        image = gauge_image(angle)
+        if image is None:
+            break
+        _gauge_sprites[angle] = ImageTk.PhotoImage(image)
+
+    return _gauge_sprites
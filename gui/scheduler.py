@@ -0,0 +1,83 @@
+import time
+
+from utils.diagnostics import diagnostics
+
+
+class RefreshScheduler:
+    # Central place views go through to redraw.
+    #
+    # Views register a refresh callback and the topics they depend on
+    # ("transactions", their own filters, ...). Marking a view dirty, or
+    # invalidating a topic, only flags it; all flagged views are refreshed
+    # together, once each, on the next idle cycle (or after debounce_ms).
+    def __init__(self, root, debounce_ms=0):
+        self.root = root
+        self.debounce_ms = debounce_ms
+        self._views = {}
+        self._dirty = set()
+        self._pending_id = None
+        self._stats = {}
+
+    # ======================================================
+    # REGISTRATION
+    # ======================================================
+    def register(self, name, callback, depends_on=()):
+        self._views[name] = (callback, frozenset(depends_on))
+        self._stats.setdefault(name, {"count": 0, "total_ms": 0.0, "last_ms": 0.0})
+
+    def unregister(self, name):
+        self._views.pop(name, None)
+        self._dirty.discard(name)
+
+    # ======================================================
+    # DIRTY TRACKING
+    # ======================================================
+    def mark_dirty(self, name):
+        if name in self._views:
+            self._dirty.add(name)
+            self._schedule()
+
+    def invalidate(self, topic):
+        for name, (_, topics) in self._views.items():
+            if topic in topics:
+                self._dirty.add(name)
+        if self._dirty:
+            self._schedule()
+
+    def _schedule(self):
+        if self._pending_id is not None:
+            if not self.debounce_ms:
+                return
+            # Debounced: restart the quiet period on every new request.
+            self.root.after_cancel(self._pending_id)
+
+        if self.debounce_ms:
+            self._pending_id = self.root.after(self.debounce_ms, self.flush)
+        else:
+            self._pending_id = self.root.after_idle(self.flush)
+
+    # ======================================================
+    # ONE REFRESH PASS
+    # ======================================================
+    def flush(self):
+        self._pending_id = None
+        dirty, self._dirty = self._dirty, set()
+
+        # Registration order, so e.g. the list redraws before the reports.
+        for name, (callback, _) in list(self._views.items()):
+            if name not in dirty:
+                continue
+
+            start = time.perf_counter()
+            callback()
+            elapsed = (time.perf_counter() - start) * 1000
+
+            stats = self._stats[name]
+            stats["count"] += 1
+            stats["total_ms"] += elapsed
+            stats["last_ms"] = elapsed
+            if diagnostics.enabled:
+                diagnostics.record(f"refresh:{name}", elapsed)
+
+    def stats(self):
+        return {name: dict(s) for name, s in self._stats.items()}
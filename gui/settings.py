@@ -1,14 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
 import sys
+from datetime import date as Date
+
+from db.currency import CURRENCIES
+from db.repository import Repository
 
 CARD_BG = "#1c1c1c"
 TEXT_LIGHT = "#ffffff"
 FERRARI_RED = "#C4001A"
 
-# Example conversion rate
-USD_TO_INR = 91
-
 
 class SettingsWindow(ttk.Frame):
     def __init__(self, parent, inline=False):
@@ -33,22 +34,26 @@ class SettingsWindow(ttk.Frame):
         # From Currency
         ttk.Label(self, text="From Currency", style="Card.TLabel").pack(anchor="w")
         self.from_var = tk.StringVar(value="INR")
-        ttk.Combobox(
+        self.from_box = ttk.Combobox(
             self,
-            values=["INR", "USD"],
+            values=CURRENCIES,
             textvariable=self.from_var,
             state="readonly",
-        ).pack(fill="x", pady=(2, 8))
+            postcommand=self.refresh_currencies,
+        )
+        self.from_box.pack(fill="x", pady=(2, 8))
 
         # To Currency
         ttk.Label(self, text="To Currency", style="Card.TLabel").pack(anchor="w")
         self.to_var = tk.StringVar(value="USD")
-        ttk.Combobox(
+        self.to_box = ttk.Combobox(
             self,
-            values=["INR", "USD"],
+            values=CURRENCIES,
             textvariable=self.to_var,
             state="readonly",
-        ).pack(fill="x", pady=(2, 8))
+            postcommand=self.refresh_currencies,
+        )
+        self.to_box.pack(fill="x", pady=(2, 8))
 
         # Amount
         ttk.Label(self, text="Amount", style="Card.TLabel").pack(anchor="w")
@@ -80,27 +85,34 @@ class SettingsWindow(ttk.Frame):
             command=self.exit_app,
         ).pack(fill="x")
 
+    def refresh_currencies(self):
+        # Runs as a list opens, so rates loaded meanwhile (python -m
+        # db.currency load ...) offer their currencies too.
+        currencies = sorted({*CURRENCIES, *Repository().rate_table().currencies()})
+        self.from_box.configure(values=currencies)
+        self.to_box.configure(values=currencies)
+
     def convert(self):
+        from_cur = self.from_var.get()
+        to_cur = self.to_var.get()
         try:
             amount = float(self.amount_var.get())
-            from_cur = self.from_var.get()
-            to_cur = self.to_var.get()
-
-            if from_cur == to_cur:
-                result = amount
-            elif from_cur == "INR" and to_cur == "USD":
-                result = amount / USD_TO_INR
-            elif from_cur == "USD" and to_cur == "INR":
-                result = amount * USD_TO_INR
-            else:
-                result = 0
-
-            self.result_label.config(
-                text=f"{amount:.2f} {from_cur} = {result:.2f} {to_cur}"
-            )
-
         except ValueError:
             self.result_label.config(text="Enter a valid number")
+            return
+
+        # Today's rates from exchange_rates (the latest loaded ones).
+        try:
+            result = Repository().rate_table().convert(
+                amount, from_cur, to_cur, Date.today().isoformat()
+            )
+        except ValueError as e:
+            self.result_label.config(text=str(e))
+            return
+
+        self.result_label.config(
+            text=f"{amount:.2f} {from_cur} = {result:.2f} {to_cur}"
+        )
 
     def exit_app(self):
         """Exit the entire application"""
@@ -1,8 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
+from db.currency import BASE_CURRENCY, CURRENCIES
 from db.repository import Repository
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
 FERRARI_RED = "#C4001A"
 BG_DARK = "#0b0b0b"
@@ -16,7 +18,7 @@ class TransactionForm(tk.Toplevel):
         self.refresh_cb = refresh_cb
 
         self.title("Add Transaction")
-        self.geometry("600x500")
+        self.geometry("600x570")
         self.configure(bg=BG_DARK)
         self.resizable(False, False)
 
@@ -46,7 +48,8 @@ class TransactionForm(tk.Toplevel):
             ("Type", "type", ["Income", "Expense"]),
             ("Category", "category", []),
             ("Payment Method", "payment", ["Cash", "Card", "UPI", "Wallet"]),
-            ("Tags", "tags", "entry")
+            ("Tags", "tags", "entry"),
+            ("Currency", "currency", list(CURRENCIES)),
         ]
 
         for i, (label_text, key, field_type) in enumerate(fields):
@@ -64,6 +67,8 @@ class TransactionForm(tk.Toplevel):
                 entry = ttk.Combobox(card, values=field_type, style="Ferrari.TCombobox", state="readonly")
                 if key == "type":
                     entry.set("Income")  # default type
+                elif key == "currency":
+                    entry.set(BASE_CURRENCY)
             entry.grid(row=row*2, column=col, sticky="ew", padx=5, pady=(0,10))
             self.entries[key] = entry
 
@@ -100,16 +105,16 @@ class TransactionForm(tk.Toplevel):
         try:
             data = (
                 self.entries["date"].get(),
-                float(self.entries["amount"].get()),
+                Decimal(self.entries["amount"].get().strip()),
                 self.entries["type"].get().lower(),
                 self.entries["category"].get(),
                 self.entries["payment"].get(),
                 self.entries["tags"].get()
             )
-            self.repo.add_transaction(data)
-            self.refresh_cb()
+            change = self.repo.add_transaction(data, self.entries["currency"].get())
+            self.refresh_cb(change)
             self.destroy()
-        except ValueError:
+        except (ValueError, InvalidOperation):
             messagebox.showerror("Error", "Amount must be a number.")
         except Exception as e:
             messagebox.showerror("Error", str(e))
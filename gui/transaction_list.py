@@ -1,19 +1,52 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from db.repository import Repository
+from gui.executor import InlineExecutor
+from gui.scheduler import RefreshScheduler
+from utils.diagnostics import timed
 from datetime import datetime
 
 CARD_BG = "#1c1c1c"
 TEXT_LIGHT = "#ffffff"
 FERRARI_RED = "#C4001A"
 
+MONTHS = [
+    "January", "February", "March", "April",
+    "May", "June", "July", "August",
+    "September", "October", "November", "December",
+]
+
+# Rows fetched per keyset page, and how far down the loaded rows (0-1) the
+# viewport may get before the next page is requested.
+PAGE_SIZE = 200
+PREFETCH_AT = 0.9
+
+# Quiet period (ms) after the last keystroke before a search is run.
+SEARCH_DEBOUNCE_MS = 250
+
+# Executor keys: a newer request under the same key supersedes the older.
+PAGE_QUERY = "transaction-list:page"
+YEARS_QUERY = "transaction-list:years"
+
+# Refresh scheduler view name and the topic our filter widgets invalidate.
+VIEW_NAME = "transaction-list"
+FILTERS_TOPIC = "transaction-list:filters"
+
 
 class TransactionList(ttk.Treeview):
-    def __init__(self, parent, refresh_reports_cb=None):
-        self.container = parent
+    def __init__(
+        self, parent, refresh_reports_cb=None, change_cb=None, executor=None, scheduler=None
+    ):
         self.repo = Repository()
+        self.executor = executor or InlineExecutor(self.repo)
+        self.scheduler = scheduler or RefreshScheduler(parent)
         self.refresh_reports_cb = refresh_reports_cb
-        self.row_buttons = {}
+        self.change_cb = change_cb
+        self._page_after = None
+        self._exhausted = False
+        self._loading = False
+        self._reloading = False
+        self._search_after_id = None
 
         # ================= FILTER BAR =================
         filter_frame = tk.Frame(parent, bg=CARD_BG)
@@ -30,14 +63,10 @@ class TransactionList(ttk.Treeview):
             textvariable=self.month_var,
             state="readonly",
             width=12,
-            values=[
-                "All", "January", "February", "March", "April",
-                "May", "June", "July", "August",
-                "September", "October", "November", "December",
-            ],
+            values=["All"] + MONTHS,
         )
         self.month_cb.pack(side="left", padx=5)
-        self.month_cb.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        self.month_cb.bind("<<ComboboxSelected>>", self._filters_changed)
 
         # ---------- YEAR ----------
         tk.Label(filter_frame, text="Year", bg=CARD_BG, fg=TEXT_LIGHT).pack(
@@ -52,7 +81,28 @@ class TransactionList(ttk.Treeview):
             width=8,
         )
         self.year_cb.pack(side="left", padx=5)
-        self.year_cb.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        self.year_cb.bind("<<ComboboxSelected>>", self._filters_changed)
+
+        # ---------- SEARCH (CATEGORY / PAYMENT / TAGS, AS YOU TYPE) ----------
+        tk.Label(filter_frame, text="Search", bg=CARD_BG, fg=TEXT_LIGHT).pack(
+            side="left", padx=(20, 5)
+        )
+
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=18)
+        self.search_entry.pack(side="left", padx=5)
+        self.search_var.trace_add("write", self._search_changed)
+        self.search_entry.bind("<Escape>", lambda e: self.search_var.set(""))
+
+        # ---------- REMOVE (ONE BUTTON FOR THE SELECTED ROW) ----------
+        tk.Button(
+            filter_frame,
+            text="Remove Selected",
+            bg=FERRARI_RED,
+            fg="white",
+            font=("Segoe UI", 9, "bold"),
+            command=self.delete_selected,
+        ).pack(side="right", padx=10)
 
         # ================= TABLE =================
         columns = (
@@ -62,10 +112,21 @@ class TransactionList(ttk.Treeview):
             "Category",
             "Payment Method",
             "Tags",
-            "Actions",
+            "Currency",
+        )
+        super().__init__(
+            parent, columns=columns, show="headings", selectmode="browse"
         )
-        super().__init__(parent, columns=columns, show="headings")
         self.pack(fill="both", expand=True)
+        self.configure(yscrollcommand=self._on_yview)
+
+        # ================= ROW ACTIONS =================
+        self.context_menu = tk.Menu(self, tearoff=0)
+        self.context_menu.add_command(
+            label="Delete transaction", command=self.delete_selected
+        )
+        self.bind("<Button-3>", self._show_context_menu)
+        self.bind("<Delete>", self.delete_selected)
 
         # ================= STYLE =================
         style = ttk.Style()
@@ -96,22 +157,27 @@ class TransactionList(ttk.Treeview):
             self.heading(col, text=col)
             self.column(col, anchor="center", width=100, stretch=False)
 
-        # Populate years + set default
-        self._populate_years()
+        self.scheduler.register(
+            VIEW_NAME, self.reload, depends_on=("transactions", FILTERS_TOPIC)
+        )
 
-        self.refresh()
+        # Populate years + set default, then load the first page
+        self._populate_years(then=lambda: self.scheduler.mark_dirty(VIEW_NAME))
 
     # ======================================================
     # POPULATE YEAR DROPDOWN (DEFAULT = CURRENT YEAR)
     # ======================================================
-    def _populate_years(self):
-        years = set()
-        for row in self.repo.fetch_transactions():
-            year = datetime.strptime(row[1], "%Y-%m-%d").year
-            years.add(str(year))
+    def _populate_years(self, then=None):
+        def show(years):
+            self._show_years(years)
+            if then:
+                then()
 
+        self.executor.submit(YEARS_QUERY, Repository.fetch_years, callback=show)
+
+    def _show_years(self, years):
         current_year = str(datetime.now().year)
-        year_list = ["All"] + sorted(years, reverse=True)
+        year_list = ["All"] + [str(y) for y in years]
         self.year_cb["values"] = year_list
 
         # ✅ Default year = current year (if exists)
@@ -121,58 +187,178 @@ class TransactionList(ttk.Treeview):
             self.year_var.set("All")
 
     # ======================================================
-    # REFRESH TABLE + REPORTS
+    # ACTIVE FILTERS (MONTH NUMBER / YEAR, OR "All")
     # ======================================================
-    def refresh(self):
-        self.delete(*self.get_children())
-        for btn in self.row_buttons.values():
-            btn.destroy()
-        self.row_buttons.clear()
-
+    def current_filters(self):
         month = self.month_var.get()
-        year = self.year_var.get()
+        if month != "All":
+            month = str(MONTHS.index(month) + 1)
+        return month, self.year_var.get() or "All"
 
-        for row in self.repo.fetch_transactions():
-            txn_id = row[0]
-            txn_date = datetime.strptime(row[1], "%Y-%m-%d")
+    def current_search(self):
+        return self.search_var.get().strip()
 
-            if month != "All" and txn_date.strftime("%B") != month:
-                continue
-            if year != "All" and str(txn_date.year) != year:
-                continue
+    def _filters_changed(self, event=None):
+        # Coalesced: several quick changes still cost one reload.
+        self.scheduler.invalidate(FILTERS_TOPIC)
 
-            self.insert("", "end", iid=txn_id, values=row[1:8])
-            self._add_remove_button(txn_id)
+    def _search_changed(self, *args):
+        # Debounced: only the text standing after a pause is searched.
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._run_search)
+
+    def _run_search(self):
+        self._search_after_id = None
+        self._filters_changed()
+
+    # ======================================================
+    # REFRESH TABLE + REPORTS
+    # ======================================================
+    @timed("TransactionList.refresh")
+    def refresh(self):
+        self.reload()
 
         # 🔥 Sync reports
         if self.refresh_reports_cb:
             self.refresh_reports_cb()
 
+    @timed("TransactionList.reload")
+    def reload(self):
+        # Current rows stay on screen until the new first page arrives.
+        # Only that page is materialized; the rest arrive on scroll.
+        self._page_after = None
+        self._exhausted = False
+        self._loading = True
+        self._reloading = True
+
+        self.executor.submit(
+            PAGE_QUERY,
+            Repository.fetch_page,
+            *self.current_filters(),
+            None,
+            PAGE_SIZE,
+            self.current_search(),
+            callback=self._show_first_page,
+        )
+
+    @timed("TransactionList.first_page")
+    def _show_first_page(self, rows):
+        self._reloading = False
+        self.delete(*self.get_children())
+        self._append_page(rows)
+
     # ======================================================
-    # REMOVE BUTTON
+    # KEYSET PAGINATION
     # ======================================================
-    def _add_remove_button(self, txn_id):
-        bbox = self.bbox(txn_id, column=6)
-        if not bbox:
-            self.after(100, lambda: self._add_remove_button(txn_id))
+    def _load_next_page(self):
+        if self._exhausted or self._loading:
             return
 
-        x, y, w, h = bbox
-        btn = tk.Button(
-            self.container,
-            text="Remove",
-            bg=FERRARI_RED,
-            fg="white",
-            font=("Segoe UI", 9, "bold"),
-            command=lambda tid=txn_id: self.delete_transaction(tid),
-        )
-        btn.place(
-            x=x + self.winfo_x(),
-            y=y + self.winfo_y(),
-            width=w,
-            height=h,
+        self._loading = True
+        self.executor.submit(
+            PAGE_QUERY,
+            Repository.fetch_page,
+            *self.current_filters(),
+            self._page_after,
+            PAGE_SIZE,
+            self.current_search(),
+            callback=self._append_page,
         )
-        self.row_buttons[txn_id] = btn
+
+    @timed("TransactionList.append_page")
+    def _append_page(self, rows):
+        self._loading = False
+        for row in rows:
+            self.insert("", "end", iid=row[0], values=row[1:8])
+
+        if rows:
+            self._page_after = (rows[-1][1], rows[-1][0])
+        self._exhausted = len(rows) < PAGE_SIZE
+
+    def _on_yview(self, first, last):
+        # Fetch the next page once the viewport nears the loaded tail.
+        if self._exhausted or self._loading or float(last) < PREFETCH_AT:
+            return
+
+        self.after_idle(self._load_next_page)
+
+    # ======================================================
+    # INCREMENTAL UPDATE (ONE ROW, NO RE-QUERY)
+    # ======================================================
+    def apply_change(self, change):
+        txn_id, date = change.row[0], change.row[1]
+
+        if change.op == "delete":
+            if self.exists(txn_id):
+                self.delete(txn_id)
+            return
+
+        self._note_year(date[:4])
+
+        # A first page still in flight may predate this write; ask again.
+        if self._reloading:
+            self.reload()
+            return
+
+        month, year = self.current_filters()
+        if year != "All" and int(date[:4]) != int(year):
+            return
+        if month != "All" and int(date[5:7]) != int(month):
+            return
+
+        # Whether the row matches the search is the index's call.
+        if self.current_search():
+            self.reload()
+            return
+
+        # Binary search the loaded rows, which are sorted by (date, id) DESC.
+        children = self.get_children()
+        key = (date, txn_id)
+        lo, hi = 0, len(children)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            child = children[mid]
+            if (self.set(child, "Date"), int(child)) > key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        # Past the loaded tail the row belongs to a page not fetched yet;
+        # re-issue an in-flight page request so it cannot miss the row.
+        if lo == len(children) and not self._exhausted:
+            if self._loading:
+                self.executor.cancel(PAGE_QUERY)
+                self._loading = False
+                self._load_next_page()
+            return
+
+        self.insert("", lo, iid=txn_id, values=change.row[1:8])
+
+    def _note_year(self, year):
+        years = list(self.year_cb["values"])
+        if year in years:
+            return
+
+        years = ["All"] + sorted(years[1:] + [year], reverse=True)
+        self.year_cb["values"] = years
+
+    # ======================================================
+    # DELETE ACTIONS (MENU / DELETE KEY / BUTTON)
+    # ======================================================
+    def _show_context_menu(self, event):
+        txn_id = self.identify_row(event.y)
+        if not txn_id:
+            return
+
+        self.selection_set(txn_id)
+        self.focus(txn_id)
+        self.context_menu.tk_popup(event.x_root, event.y_root)
+
+    def delete_selected(self, event=None):
+        selected = self.selection()
+        if selected:
+            self.delete_transaction(int(selected[0]))
 
     # ======================================================
     # DELETE TRANSACTION
@@ -184,7 +370,12 @@ class TransactionList(ttk.Treeview):
             return
 
         try:
-            self.repo.delete_transaction(txn_id)
-            self.refresh()
+            change = self.repo.delete_transaction(txn_id)
+            if change is None:
+                return
+            if self.change_cb:
+                self.change_cb(change)
+            else:
+                self.apply_change(change)
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -0,0 +1,179 @@
+# Headless dashboard reports: the Reports panel (gauge, totals, category
+# pie, daily income/expense line) rendered to image files without Tk.
+#
+#   python report.py 2025                   # twelve monthly reports
+#   python report.py 2025 --yearly          # ...plus the whole of 2025
+#   python report.py 2025-03 2024-12 all --format png svg --out archive
+#   python report.py 2025 --currency USD    # amounts converted to USD
+#
+# The database is opened read-only (never created or migrated), and every
+# period is one job on a process pool with a worker per core by default.
+# Each worker opens its own connection once and draws with Agg.
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.request import pathname2url
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from db.currency import BASE_CURRENCY
+from db.migrations import SCHEMA_VERSION, get_version
+from db.models import DB_NAME
+from db.repository import Repository
+from utils.charts import dashboard_figure, period_label
+
+FORMATS = ("png", "svg")
+OUT_DIR = "reports"
+
+_PERIOD = re.compile(r"^(\d{4})(?:-(\d{1,2}))?$")
+
+
+# ======================================================
+# PERIODS
+# ======================================================
+def parse_periods(specs, yearly=False):
+    # ["2025", "2024-03", "all"] -> [(month, year), ...] in the GUI's filter
+    # form ("All" or a number as text). A bare year is its twelve months,
+    # followed by the year itself when yearly is set. Duplicates are dropped.
+    periods = []
+    for spec in specs:
+        if spec.lower() == "all":
+            periods.append(("All", "All"))
+            continue
+
+        match = _PERIOD.match(spec)
+        if match is None:
+            raise ValueError(f"not a period: {spec!r} (use YYYY, YYYY-MM or all)")
+        year, month = match.groups()
+        if month is not None:
+            if not 1 <= int(month) <= 12:
+                raise ValueError(f"not a month: {spec!r}")
+            periods.append((str(int(month)), year))
+            continue
+
+        periods.extend((str(m), year) for m in range(1, 13))
+        if yearly:
+            periods.append(("All", year))
+
+    return list(dict.fromkeys(periods))
+
+
+def period_slug(month, year):
+    if year == "All":
+        return "all" if month == "All" else f"month-{int(month):02d}"
+    if month == "All":
+        return str(year)
+    return f"{int(year)}-{int(month):02d}"
+
+
+# ======================================================
+# READ-ONLY DATABASE
+# ======================================================
+def open_read_only(db_path):
+    # mode=ro fails instead of creating a missing file, and the schema must
+    # already be current since nothing here may migrate it.
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"no database at {db_path}")
+
+    uri = "file:" + pathname2url(os.path.abspath(db_path)) + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    version = get_version(conn)
+    if version != SCHEMA_VERSION:
+        conn.close()
+        raise RuntimeError(
+            f"{db_path} is at schema version {version}, expected "
+            f"{SCHEMA_VERSION}; open it in the app once to upgrade it"
+        )
+    return conn
+
+
+# ======================================================
+# WORKER (ONE PERIOD PER JOB)
+# ======================================================
+_repo = None
+
+
+def _init_worker(db_path):
+    global _repo
+    _repo = Repository(open_read_only(db_path))
+
+
+def render_period(month, year, out_dir, formats, currency=BASE_CURRENCY):
+    # Returns (month, year, income, expense, [written paths]).
+    snap = _repo.dashboard_snapshot(month, year, currency)
+    fig = dashboard_figure(snap)
+    FigureCanvasAgg(fig)
+
+    stem = os.path.join(out_dir, f"report-{period_slug(month, year)}")
+    paths = []
+    for fmt in formats:
+        path = f"{stem}.{fmt}"
+        fig.savefig(path, format=fmt, facecolor=fig.get_facecolor())
+        paths.append(path)
+
+    fig.clear()
+    return month, year, snap.income, snap.expense, paths
+
+
+def render_reports(
+    db_path, periods, out_dir=OUT_DIR, formats=("png",), jobs=None, currency=BASE_CURRENCY
+):
+    # Yields render_period() results as they finish. jobs=1 renders in
+    # this process, which is easier to debug and profile.
+    os.makedirs(out_dir, exist_ok=True)
+    open_read_only(db_path).close()
+
+    jobs = min(jobs or os.cpu_count() or 1, len(periods))
+    if jobs <= 1:
+        _init_worker(db_path)
+        for month, year in periods:
+            yield render_period(month, year, out_dir, formats, currency)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(db_path,)
+    ) as pool:
+        futures = [
+            pool.submit(render_period, month, year, out_dir, formats, currency)
+            for month, year in periods
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render dashboard reports to image files.")
+    parser.add_argument("periods", nargs="+", metavar="PERIOD", help="YYYY (its twelve months), YYYY-MM or all")
+    parser.add_argument("--yearly", action="store_true", help="also render each YYYY as a whole year")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["png"], dest="formats")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--currency", default=BASE_CURRENCY, type=str.upper, help="reporting currency")
+    args = parser.parse_intermixed_args(argv)
+
+    try:
+        periods = parse_periods(args.periods, args.yearly)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        results = render_reports(
+            args.db, periods, args.out, args.formats, args.jobs, args.currency
+        )
+        for month, year, income, expense, paths in results:
+            print(
+                f"{period_label(month, year):<12} income {income:>12.2f}  "
+                f"expense {expense:>12.2f}  {', '.join(paths)}"
+            )
+    except (OSError, RuntimeError, ValueError, sqlite3.Error) as e:
+        print(f"report: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from db import models
+from db.repository import Repository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    models.configure(str(tmp_path / "expenses.db"))
+    models.init_db()
+    yield Repository()
+    models.close_pool()
+
+
+class FakeRoot:
+    # Just enough of Tk's after() API for the executor and scheduler;
+    # callbacks only run when a test calls drain().
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, ms, fn):
+        self.next_id += 1
+        self.pending[self.next_id] = fn
+        return self.next_id
+
+    def after_idle(self, fn):
+        return self.after(0, fn)
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def report_callback_exception(self, exc_type, exc, tb):
+        raise exc
+
+    def drain(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            after_id, fn = self.pending.popitem()
+            fn()
+            time.sleep(0.001)
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
@@ -0,0 +1,41 @@
+from benchmarks import data, run
+
+
+def test_generator_is_deterministic():
+    first = list(data.generate(500, 2))
+    assert first == list(data.generate(500, 2))
+    assert first != list(data.generate(500, 2, seed=1))
+
+    dates = [r[0] for r in first]
+    assert dates == sorted(dates)
+    assert "2024-01-01" <= dates[0] and dates[-1] <= data.END_DATE.isoformat()
+    assert {r[2] for r in first} == {"income", "expense"}
+
+
+def test_every_repository_method_is_benchmarked(repo):
+    repo.add_transactions(data.batches(data.generate(300, 2)))
+
+    cases = run.repository_cases(repo)
+    assert run.uncovered_methods(cases) == []
+
+    for fn in cases.values():
+        fn()
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"results": {"10k": {"a": {"median_ms": 10.0}, "b": {"median_ms": 0.1}}}}
+    current = {"results": {"10k": {"a": {"median_ms": 20.0}, "b": {"median_ms": 0.5}}}}
+
+    assert run.compare(current, baseline) == [("10k", "a", 10.0, 20.0)]
+
+
+def test_cases_without_a_baseline_are_reported():
+    baseline = {"results": {"10k": {"a": {"median_ms": 10.0}}}}
+    current = {
+        "results": {
+            "10k": {"a": {"median_ms": 10.0}, "gui_case": {"median_ms": 5.0}},
+            "1m": {"populate": {"median_ms": 1.0}, "a": {"median_ms": 10.0}},
+        }
+    }
+
+    assert run.missing_baseline(current, baseline) == [("10k", "gui_case"), ("1m", "a")]
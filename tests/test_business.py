@@ -1,5 +1,164 @@
-from business.budgets import check_budget
+import numpy as np
+
+from db import models
+
+from business.budgets import EXCEEDED, OK, WARNING, BudgetEngine, check_budget
 
 
 def test_budget():
-    assert check_budget(1200, 1000) is True
\ No newline at end of file
+    assert check_budget(1200, 1000) is True
+
+
+def test_check_budget_is_elementwise():
+    spent = np.array([500.0, 1000.0, 1500.0])
+    assert check_budget(spent, 1000).tolist() == [False, False, True]
+
+
+def _add(repo, date, amount, category="Food", txn_type="expense"):
+    return repo.add_transaction((date, amount, txn_type, category, "Cash", ""))
+
+
+def test_engine_evaluates_every_budget_and_period(repo):
+    food = repo.set_budget("Food", "monthly", 100)
+    travel = repo.set_budget("Travel", "yearly", 1000)
+    _add(repo, "2024-01-03", 50)
+    _add(repo, "2024-01-20", 40)
+    _add(repo, "2024-02-01", 120)
+    _add(repo, "2024-03-09", 300, "Travel")
+    _add(repo, "2024-03-09", 999, "Salary", "income")
+
+    engine = BudgetEngine.load(repo)
+
+    jan = engine.status(food, 2024, 1)
+    assert (jan.spent, jan.available, jan.alert) == (90, 100, WARNING)
+    assert engine.status(food, 2024, 2).alert == EXCEEDED
+    assert engine.status(food, 2024, 4).spent == 0
+
+    yearly = engine.status(travel, 2024, 7)
+    assert (yearly.month, yearly.spent, yearly.alert) == (None, 300, OK)
+    assert [s.budget.id for s in engine.alerts(2024, 2)] == [food]
+
+
+def test_rollover_carries_unspent_and_overspent(repo):
+    rent = repo.set_budget("Rent", "monthly", 100, rollover=True)
+    _add(repo, "2024-01-10", 60, "Rent")
+    _add(repo, "2024-03-10", 250, "Rent")
+
+    engine = BudgetEngine.load(repo)
+
+    # January leaves 40, February (no spending) adds 100 more.
+    assert engine.status(rent, 2024, 2).available == 140
+    march = engine.status(rent, 2024, 3)
+    assert (march.available, march.alert) == (240, EXCEEDED)
+    assert engine.status(rent, 2024, 4).available == 90
+
+
+def test_apply_matches_reload(repo):
+    food = repo.set_budget("Food", "monthly", 100, rollover=True)
+    repo.set_budget("Travel", "monthly", 500)
+    _add(repo, "2024-01-03", 50)
+
+    engine = BudgetEngine.load(repo)
+
+    changes = [
+        _add(repo, "2024-01-05", 30),
+        _add(repo, "2023-12-31", 70),
+        _add(repo, "2024-02-14", 20, "Travel"),
+    ]
+    changes.append(repo.delete_transaction(changes[0].row[0]))
+    touched = [engine.apply(c) for c in changes]
+
+    assert touched[0] == [food]
+    fresh = BudgetEngine.load(repo)
+    for year, month in [(2023, 12), (2024, 1), (2024, 2), (2024, 3)]:
+        assert engine.period_status(year, month) == fresh.period_status(year, month)
+
+
+def _rule(repo, rrule="FREQ=MONTHLY;BYMONTHDAY=1", dtstart="2024-01-01"):
+    from business.recurring import RecurringRule
+
+    rule_id = repo.add_recurring_rule(
+        "Rent", rrule, dtstart, (900.0, "expense", "Rent", "UPI", "")
+    )
+    rows = {r[0]: r for r in repo.fetch_recurring_rules()}
+    return RecurringRule(*rows[rule_id])
+
+
+def test_catch_up_is_one_batch_and_idempotent(repo):
+    from business.recurring import apply_recurring
+
+    monthly = _rule(repo)
+    _rule(repo, "FREQ=WEEKLY;BYDAY=FR", "2024-11-01")
+
+    assert apply_recurring(repo, today="2024-12-15") == 12 + 7
+    assert apply_recurring(repo, today="2024-12-15") == 0
+    assert apply_recurring(repo, today="2025-01-01") == 1 + 2
+
+    dates = [
+        r[0]
+        for r in models.get_connection().execute(
+            "SELECT date FROM transactions WHERE rule_id = ?", (monthly.id,)
+        )
+    ]
+    assert len(dates) == len(set(dates)) == 13
+    assert repo.get_total("expense", year="2024") == (12 + 9) * 900.0
+
+
+def test_catch_up_skips_occurrences_already_present(repo):
+    from business.recurring import apply_recurring
+
+    rule = _rule(repo)
+    repo.add_recurring_occurrences(
+        [(rule.id, "2024-02-01", 900.0, "expense", "Rent", "UPI", "", "INR")], [], None
+    )
+
+    assert apply_recurring(repo, today="2024-03-01") == 2
+
+
+def test_invalid_rules_are_refused_and_skipped(repo, caplog):
+    import pytest
+
+    from business.recurring import apply_recurring
+
+    with pytest.raises(ValueError):
+        _rule(repo, "FREQ=SOMETIMES")
+    assert repo.fetch_recurring_rules() == []
+
+    # A rule stored before validation existed must not stop the others.
+    with models.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO recurring_rules"
+            " (name, rrule, dtstart, amount, type, category, payment_method, tags)"
+            " VALUES ('Old', 'FREQ=SOMETIMES', '2024-01-01', 100, 'expense',"
+            " 'Other', 'Cash', '')"
+        )
+    _rule(repo)
+
+    assert apply_recurring(repo, today="2024-03-01") == 3
+    assert "Old" in caplog.text
+
+
+def test_occurrences_keep_the_rule_currency(repo):
+    from business.recurring import apply_recurring
+
+    repo.add_recurring_rule(
+        "Cloud", "FREQ=MONTHLY;BYMONTHDAY=5", "2024-01-01",
+        (12.5, "expense", "Bills", "Card", ""), "USD",
+    )
+
+    assert apply_recurring(repo, today="2024-02-10") == 2
+    currencies = [
+        r[0] for r in models.get_connection().execute("SELECT currency FROM transactions")
+    ]
+    assert currencies == ["USD", "USD"]
+
+
+def test_preview_is_lazy(repo):
+    from business.recurring import preview
+
+    rule = _rule(repo, "FREQ=DAILY", "2024-01-01")  # never ends
+
+    upcoming = list(preview(rule, start="2024-03-10", count=3))
+    assert [r[0] for r in upcoming] == ["2024-03-10", "2024-03-11", "2024-03-12"]
+    assert upcoming[0][1:3] == (900.0, "expense")
+    assert len(repo.fetch_transactions()) == 0
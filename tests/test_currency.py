@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+
+from db import models, rollups
+from db.currency import RateTable, load_rates
+
+
+def _mixed(repo):
+    repo.add_rates([[("USD", "2024-01-01", 80.0), ("USD", "2024-02-01", 90.0)]])
+    repo.add_transaction(("2024-01-10", 1000.0, "income", "Salary", "Card", ""))
+    repo.add_transaction(("2024-01-15", 10.0, "expense", "Food", "Card", ""), "USD")
+    repo.add_transaction(("2024-02-15", 10.0, "expense", "Food", "Card", ""), "USD")
+    repo.add_transaction(("2024-02-20", 200.0, "expense", "Rent", "Cash", ""))
+
+
+def test_rate_table_interval_lookup():
+    table = RateTable([("USD", "2024-01-01", 80.0), ("USD", "2024-02-01", 90.0)])
+
+    assert table.rate("INR", "2024-01-20") == 1.0
+    assert table.rate("USD", "2023-06-01") == 80.0  # before the first rate
+    assert table.rate("USD", "2024-01-31") == 80.0
+    assert table.rate("USD", "2024-02-01") == 90.0
+    assert table.rate("USD", "2030-01-01") == 90.0
+    assert table.convert(180.0, "INR", "USD", "2024-02-10") == 2.0
+    with pytest.raises(ValueError):
+        table.rate("EUR", "2024-01-01")
+
+
+def test_aggregates_convert_to_reporting_currency(repo):
+    _mixed(repo)
+
+    # 10 USD at 80, 10 USD at 90 and 200 INR.
+    assert repo.get_total("expense") == Decimal("1900.00")
+    assert repo.get_total("expense", "1") == Decimal("800.00")
+    assert repo.get_total("income", currency="USD") == Decimal("12.50")
+
+    snap = repo.dashboard_snapshot()
+    assert (snap.income, snap.expense) == (Decimal("1000.00"), Decimal("1900.00"))
+    assert dict(snap.categories) == {"Food": Decimal("1700.00"), "Rent": Decimal("200.00")}
+
+    # Each converted row is rounded to whole cents: 200 / 90 is 2.22.
+    snap = repo.dashboard_snapshot("2", "2024", "USD")
+    assert snap.currency == "USD"
+    assert snap.expense == Decimal("12.22")
+    assert snap.daily == (
+        ("2024-02-15", 0, Decimal("10.00")),
+        ("2024-02-20", 0, Decimal("2.22")),
+    )
+
+    # Every January expense in USD: no conversion, plain rollup sums.
+    assert repo.get_expense_by_category("1", "2024", "USD") == (["Food"], [Decimal("10.00")])
+
+    with pytest.raises(ValueError):
+        repo.get_total("expense", currency="EUR")
+
+
+def test_rollups_stay_keyed_by_currency(repo):
+    _mixed(repo)
+    conn = models.get_connection()
+
+    rows = conn.execute(
+        "SELECT month, currency, total FROM monthly_rollup WHERE type = 'expense' "
+        "ORDER BY month, currency"
+    ).fetchall()
+    # Integer minor units.
+    assert rows == [(1, "USD", 1000), (2, "INR", 20000), (2, "USD", 1000)]
+    assert rollups.verify(conn) == []
+
+
+def test_load_rates_replaces_existing(repo, tmp_path):
+    path = tmp_path / "rates.csv"
+    path.write_text("currency,date,rate\nusd,2024-01-01,82.5\nEUR,2024-01-01,90\n")
+    repo.add_rates([[("USD", "2024-01-01", 80.0)]])
+
+    assert load_rates(str(path), repo) == 2
+    table = repo.rate_table()
+    assert table.currencies() == ["EUR", "INR", "USD"]
+    assert table.rate("USD", "2024-03-01") == 82.5
+
+    path.write_text("currency,date,rate\nUSD,2024-01-01,-1\n")
+    with pytest.raises(ValueError):
+        load_rates(str(path), repo)
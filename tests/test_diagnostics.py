@@ -0,0 +1,78 @@
+import pytest
+
+from utils.diagnostics import Histogram, diagnostics, timed
+
+
+@pytest.fixture
+def recording():
+    diagnostics.reset()
+    diagnostics.enable(log_path=None)
+    yield diagnostics
+    diagnostics.disable()
+    diagnostics.slow_ms = 50.0
+    diagnostics.reset()
+
+
+def test_disabled_records_nothing(repo):
+    diagnostics.reset()
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    repo.fetch_page()
+    assert diagnostics.summary() == {}
+
+
+def test_queries_and_refreshes_are_timed(repo, recording):
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    repo.fetch_page()
+    repo.fetch_page()
+    list(repo.iter_transactions())
+
+    @timed("view.redraw")
+    def redraw():
+        pass
+
+    redraw()
+
+    summary = recording.summary()
+    assert summary["Repository.fetch_page"]["count"] == 2
+    assert summary["Repository.add_transaction"]["count"] == 1
+    assert summary["Repository.iter_transactions"]["count"] == 1
+    assert summary["view.redraw"]["count"] == 1
+
+
+def test_slow_queries_are_logged_with_plans(repo, recording):
+    recording.slow_ms = 0
+    repo.fetch_page("3", "2024", None, 50)
+
+    entry = recording.slow[-1]
+    assert entry.name == "Repository.fetch_page"
+    assert entry.params == "(str, str, NoneType, int)"
+    assert entry.rows == 0
+    (sql,) = entry.statements
+    assert "transactions" in sql and "year = ?" in sql and "2024" not in sql
+    assert any("idx_transactions" in step for step in entry.plans[0])
+
+
+def test_slow_log_keeps_values_out(repo, recording):
+    from utils.diagnostics import format_slow
+
+    recording.slow_ms = 0
+    repo.add_transaction(("2025-01-05", 123.45, "expense", "Pharmacy", "Card", "medical secret"))
+
+    text = format_slow(recording.slow[-1])
+    for value in ("2025-01-05", "12345", "Pharmacy", "medical", "secret"):
+        assert value not in text
+    # Trigger and FTS sub-statements are not logged separately.
+    assert "--" not in text and "no plan" not in text
+
+
+def test_histogram_percentiles_and_buckets():
+    h = Histogram(window=4)
+    for ms in (1, 2, 3, 4, 100):
+        h.add(ms)
+
+    # The window keeps the last four samples; count/max cover everything.
+    assert h.percentile(50) == 3
+    assert h.summary()["count"] == 5
+    assert h.summary()["max_ms"] == 100
+    assert sum(n for _, n in h.buckets()) == 4
+    assert dict(h.buckets())[100] == 1
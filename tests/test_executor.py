@@ -0,0 +1,53 @@
+import threading
+
+from db.repository import Repository
+from gui.executor import QueryExecutor
+
+
+def test_results_arrive_on_the_polling_thread(repo, root):
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    executor = QueryExecutor(root)
+    seen = []
+
+    executor.submit(
+        "total",
+        Repository.get_total,
+        "income",
+        callback=lambda total: seen.append((total, threading.current_thread())),
+    )
+    root.drain()
+    executor.shutdown()
+
+    assert seen == [(100.0, threading.main_thread())]
+
+
+def test_newer_request_supersedes_older_one(repo, root):
+    executor = QueryExecutor(root, workers=1)
+    gate = threading.Event()
+    seen = []
+
+    def slow(repo, label):
+        gate.wait(5)
+        return label
+
+    for label in ("jan", "feb", "mar"):
+        executor.submit("filter", slow, label, callback=seen.append)
+    gate.set()
+    root.drain()
+    executor.shutdown()
+
+    assert seen == ["mar"]
+
+
+def test_shutdown_gives_worker_connections_back(repo, root):
+    from db.models import get_pool
+
+    pool = get_pool()
+    executor = QueryExecutor(root, workers=pool.readers)
+    executor.submit("total", Repository.get_total, "income")
+    root.drain()
+    executor.shutdown()
+
+    # Every reader can be checked out again without waiting.
+    conns = [pool.acquire(timeout=1) for _ in range(pool.readers)]
+    assert len(set(map(id, conns))) == pool.readers
@@ -0,0 +1,151 @@
+from utils.import_export import import_csv, parse_amount
+
+
+STATEMENT = """Txn Date,Narration,Withdrawal,Deposit
+05/03/2024,Coffee,120.00,
+05/03/2024,Coffee,120.00,
+06/03/2024,Salary,,"50,000.00"
+,Closing balance,,
+"""
+
+
+def write_statement(tmp_path, text=STATEMENT):
+    path = tmp_path / "statement.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+MAPPING_SIGNED = {"date": "Date", "amount": "Amount", "category": "Description"}
+
+MAPPING = {
+    "date": "Txn Date",
+    "category": "Narration",
+    "debit": "Withdrawal",
+    "credit": "Deposit",
+}
+
+
+def test_import_streams_batches_and_maps_columns(repo, tmp_path):
+    progress = []
+    result = import_csv(
+        write_statement(tmp_path),
+        mapping=MAPPING,
+        date_formats=["%d/%m/%Y"],
+        batch_size=2,
+        progress_cb=lambda read, inserted: progress.append((read, inserted)),
+    )
+
+    assert result == (4, 3, 0, 1, [])
+    assert progress == [(2, 2), (4, 3)]
+    assert [r[1:6] for r in repo.fetch_transactions(order="asc")] == [
+        ("2024-03-05", 120.0, "expense", "Coffee", "Bank"),
+        ("2024-03-05", 120.0, "expense", "Coffee", "Bank"),
+        ("2024-03-06", 50000.0, "income", "Salary", "Bank"),
+    ]
+    assert repo.get_total("income", "3", "2024") == 50000.0
+
+
+def test_lines_in_currencies_without_rates_are_reported(repo, tmp_path):
+    text = "Date,Amount,Currency,Description\n2024-03-05,-10,eur,Cafe\n2024-03-05,-20,inr,Tea\n"
+
+    result = import_csv(
+        write_statement(tmp_path, text), mapping={**MAPPING_SIGNED, "currency": "Currency"}
+    )
+
+    assert (result.inserted, result.skipped, result.unknown_currencies) == (1, 1, ["EUR"])
+    assert repo.get_total("expense") == 20
+
+
+def test_reimport_skips_lines_already_imported(repo, tmp_path):
+    path = write_statement(tmp_path)
+    import_csv(path, mapping=MAPPING, date_formats=["%d/%m/%Y"])
+
+    again = import_csv(path, mapping=MAPPING, date_formats=["%d/%m/%Y"])
+    assert again.inserted == 0
+    assert again.duplicates == 3
+    assert len(repo.fetch_transactions()) == 3
+
+
+def test_identical_lines_apart_in_the_statement_are_kept(repo, tmp_path):
+    text = "Date,Amount,Description\n2024-03-05,-10,Tea\n2024-03-06,-99,Rent\n2024-03-05,-10,Tea\n"
+    path = write_statement(tmp_path, text)
+
+    assert import_csv(path, mapping=MAPPING_SIGNED).inserted == 3
+    assert import_csv(path, mapping=MAPPING_SIGNED).duplicates == 3
+
+
+def test_parse_amount_formats():
+    assert parse_amount("1,234.50") == 1234.5
+    assert parse_amount("₹ 99") == 99.0
+    assert parse_amount("(40.00)") == -40.0
+    assert parse_amount("250.00 Dr") == -250.0
+    assert parse_amount("250.00 CR") == 250.0
+
+
+def test_export_csv_streams_with_header_and_filters(repo, tmp_path):
+    import csv
+
+    from utils.import_export import export_csv
+
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    repo.add_transaction(("2024-02-05", 40.0, "expense", "Food", "Cash", "tea"))
+    repo.add_transaction(("2024-03-05", 5.0, "expense", "Fuel", "Card", ""))
+
+    path = tmp_path / "out.csv"
+    written = export_csv(
+        str(path), start="2024-02-01", txn_type="expense", chunk_size=1
+    )
+
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert written == 2
+    assert rows[0] == [
+        "id", "date", "amount", "type", "category", "payment_method", "tags", "currency",
+    ]
+    assert [r[1] for r in rows[1:]] == ["2024-02-05", "2024-03-05"]
+
+
+def test_export_npz_round_trips(repo, tmp_path):
+    import pytest
+
+    np = pytest.importorskip("numpy")
+    from utils.import_export import export_npz
+
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    repo.add_transaction(("2024-02-05", 40.0, "expense", "Food", "Cash", "tea"))
+
+    path = str(tmp_path / "out.npz")
+    assert export_npz(path, chunk_size=1) == 2
+
+    data = np.load(path)
+    assert data["day"].tolist() == [19727, 19758]
+    assert data["amount"].tolist() == [10000, 4000]  # minor units
+    assert data["category_labels"][data["category"]].tolist() == ["Salary", "Food"]
+
+
+def test_binary_exports_keep_rows_without_a_date(repo, tmp_path):
+    import datetime
+
+    import pytest
+
+    from db import models
+    from utils.import_export import NO_DAY, export_arrow, export_npz
+
+    np = pytest.importorskip("numpy")
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    # Legacy rows may have no date.
+    with models.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+            "VALUES (NULL, 500, 'expense', 'Food', 'Cash', '')"
+        )
+
+    path = str(tmp_path / "out.npz")
+    assert export_npz(path) == 2
+    assert np.load(path)["day"].tolist() == [NO_DAY, 19727]
+
+    pa = pytest.importorskip("pyarrow")
+    path = str(tmp_path / "out.arrow")
+    assert export_arrow(path) == 2
+    table = pa.ipc.open_file(path).read_all()
+    assert table.column("date").to_pylist() == [None, datetime.date(2024, 1, 5)]
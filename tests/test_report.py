@@ -0,0 +1,59 @@
+import os
+import sqlite3
+
+import pytest
+
+import report
+from db import models
+
+
+def test_parse_periods():
+    assert report.parse_periods(["2025-03", "all"]) == [("3", "2025"), ("All", "All")]
+
+    year = report.parse_periods(["2024", "2024-05"], yearly=True)
+    assert year[:12] == [(str(m), "2024") for m in range(1, 13)]
+    assert year[12:] == [("All", "2024")]
+
+    for bad in ("2024-13", "24", "march"):
+        with pytest.raises(ValueError):
+            report.parse_periods([bad])
+
+
+def test_reports_render_from_a_read_only_database(repo, tmp_path):
+    for row in [
+        ("2025-03-01", 1000.0, "income", "Salary", "Bank", ""),
+        ("2025-03-02", 250.0, "expense", "Food", "Cash", ""),
+        ("2025-04-10", 80.0, "expense", "Fuel", "Card", ""),
+    ]:
+        repo.add_transaction(row)
+    db_path = models.get_pool().db_name
+    models.close_pool()
+    before = os.path.getmtime(db_path)
+
+    out = tmp_path / "out"
+    periods = [("3", "2025"), ("4", "2025"), ("All", "2025")]
+    results = sorted(report.render_reports(db_path, periods, str(out), ("png", "svg"), jobs=2))
+
+    totals = {(m, y): (income, expense) for m, y, income, expense, _ in results}
+    assert totals == {
+        ("3", "2025"): (1000.0, 250.0),
+        ("4", "2025"): (0, 80.0),
+        ("All", "2025"): (1000.0, 330.0),
+    }
+    assert sorted(os.listdir(out)) == sorted(
+        f"report-{slug}.{fmt}"
+        for slug in ("2025", "2025-03", "2025-04")
+        for fmt in ("png", "svg")
+    )
+    with open(out / "report-2025-03.png", "rb") as f:
+        assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+    assert os.path.getmtime(db_path) == before
+
+
+def test_missing_or_outdated_database_is_refused(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        report.open_read_only(str(tmp_path / "missing.db"))
+    assert not (tmp_path / "missing.db").exists()
+
+    sqlite3.connect(str(tmp_path / "old.db")).close()
+    assert report.main(["2025", "--db", str(tmp_path / "old.db"), "--out", str(tmp_path)]) == 1
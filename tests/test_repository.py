@@ -0,0 +1,486 @@
+from db import models
+
+
+def test_connection_is_reused(repo):
+    assert models.get_connection() is models.get_connection()
+
+
+def test_wal_and_pragmas(repo):
+    conn = models.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -16384
+    # NORMAL == 1
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_reader_pool_is_read_only_and_bounded(repo):
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+
+    pool = models.get_pool()
+    with pool.reader() as a, pool.reader() as b:
+        assert a is not b
+        assert a.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 1
+        assert a.execute("PRAGMA query_only").fetchone()[0] == 1
+
+    with pool.reader() as c:
+        assert c in (a, b)
+
+
+def test_add_total_delete(repo):
+    repo.add_transaction(("2024-01-05", 100.0, "income", "Salary", "Card", ""))
+    repo.add_transaction(("2024-02-05", 40.0, "expense", "Food", "Cash", ""))
+
+    assert repo.get_total("income") == 100.0
+    assert repo.get_total("expense", "2") == 40.0
+    assert repo.get_total("expense", "1") == 0
+
+    txn_id = repo.fetch_transactions()[0][0]
+    repo.delete_transaction(txn_id)
+    assert len(repo.fetch_transactions()) == 1
+
+
+def test_migrations_upgrade_legacy_db_in_place(tmp_path):
+    import sqlite3
+
+    from db.migrations import SCHEMA_VERSION
+
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "date TEXT, amount REAL, type TEXT, category TEXT, "
+        "payment_method TEXT, tags TEXT)"
+    )
+    legacy.execute(
+        "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+        "VALUES ('2023-11-20', 75.5, 'expense', 'Food', 'Cash', '')"
+    )
+    legacy.commit()
+    legacy.close()
+
+    models.configure(path)
+    try:
+        models.init_db()
+        conn = models.get_connection()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute(
+            "SELECT year, month, day_num FROM transactions"
+        ).fetchone() == (2023, 11, 19681)
+
+        # Re-running is a no-op.
+        models.init_db()
+    finally:
+        models.close_pool()
+
+
+def test_period_filters_use_indexes(repo):
+    repo.add_transaction(("2023-03-05", 10.0, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-03-07", 20.0, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-04-01", 5.0, "expense", "Fuel", "Card", ""))
+
+    assert repo.get_total("expense", "3") == 30.0
+    assert repo.get_total("expense", "03", "2024") == 20.0
+    assert repo.get_expense_by_category("4", 2024) == (["Fuel"], [5.0])
+    assert repo.fetch_transactions_filtered("3", "2024") == [("2024-03-07", 0, 20.0)]
+
+    plan = models.get_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT SUM(amount) FROM transactions "
+        "WHERE type = ? AND year = ? AND month = ?",
+        ("expense", 2024, 3),
+    ).fetchall()
+    assert "idx_transactions_type_period" in plan[0][3]
+
+
+def test_fetch_transactions_filters_and_orders(repo):
+    repo.add_transaction(("2023-03-05", 10.0, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-03-07", 20.0, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-04-01", 5.0, "income", "Other", "Card", ""))
+
+    assert [r[1] for r in repo.fetch_transactions()] == [
+        "2024-04-01", "2024-03-07", "2023-03-05",
+    ]
+    assert [r[1] for r in repo.fetch_transactions(month="3", order="asc")] == [
+        "2023-03-05", "2024-03-07",
+    ]
+    assert [r[1] for r in repo.fetch_transactions(year="2024", month="4")] == [
+        "2024-04-01",
+    ]
+    assert repo.fetch_years() == [2024, 2023]
+
+
+def test_fetch_page_walks_keyset(repo):
+    for day in range(1, 8):
+        repo.add_transaction((f"2024-05-0{day}", day, "expense", "Food", "Cash", ""))
+    # Same date as an existing row: the id breaks the tie.
+    repo.add_transaction(("2024-05-03", 99.0, "expense", "Food", "Cash", ""))
+
+    seen, after = [], None
+    while True:
+        page = repo.fetch_page(month="5", year="2024", after=after, limit=3)
+        seen.extend(page)
+        if len(page) < 3:
+            break
+        after = (page[-1][1], page[-1][0])
+
+    assert seen == repo.fetch_transactions(month="5", year="2024")
+
+
+def test_writes_return_change_records(repo):
+    from db.repository import Change
+
+    added = repo.add_transaction(("2024-06-01", 12.5, "expense", "Food", "UPI", "tea"))
+    assert added == Change(
+        "insert", (added.row[0], "2024-06-01", 12.5, "expense", "Food", "UPI", "tea", "INR")
+    )
+
+    removed = repo.delete_transaction(added.row[0])
+    assert removed == Change("delete", added.row)
+    assert repo.delete_transaction(added.row[0]) is None
+
+
+def test_rollups_follow_inserts_updates_and_deletes(repo):
+    from db import rollups
+
+    repo.add_transaction(("2024-03-05", 10.0, "expense", "Food", "Cash", ""))
+    a = repo.add_transaction(("2024-03-05", 15.0, "expense", "Food", "Card", ""))
+    b = repo.add_transaction(("2024-03-06", 100.0, "income", "Salary", "Card", ""))
+
+    conn = models.get_connection()
+    with conn:
+        conn.execute(
+            "UPDATE transactions SET date = '2024-04-01', category = 'Fuel' "
+            "WHERE id = ?",
+            (a.row[0],),
+        )
+    repo.delete_transaction(b.row[0])
+
+    assert rollups.verify(conn) == []
+    assert repo.get_total("expense", "3", "2024") == 10.0
+    assert repo.get_total("income") == 0
+    assert repo.get_expense_by_category("4") == (["Fuel"], [15.0])
+    assert repo.fetch_transactions_filtered() == [
+        ("2024-03-05", 0, 10.0),
+        ("2024-04-01", 0, 15.0),
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM monthly_rollup").fetchone()[0] == 2
+
+    # A tampered bucket is reported and fixed by a rebuild.
+    with conn:
+        conn.execute("UPDATE monthly_rollup SET total = 0")
+    assert rollups.verify(conn)
+    rollups.rebuild(conn)
+    assert rollups.verify(conn) == []
+
+
+def test_dashboard_snapshot_matches_individual_queries(repo):
+    repo.add_transaction(("2024-03-05", 10.0, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-03-05", 50.0, "income", "Salary", "Card", ""))
+    repo.add_transaction(("2024-04-02", 7.0, "expense", "Fuel", "Card", ""))
+
+    snap = repo.dashboard_snapshot("3", "2024")
+    assert snap.income == repo.get_total("income", "3", "2024") == 50.0
+    assert snap.expense == repo.get_total("expense", "3", "2024") == 10.0
+    assert snap.categories == (("Food", 10.0),)
+    assert snap.daily == (("2024-03-05", 50.0, 10.0),)
+
+    everything = repo.dashboard_snapshot()
+    assert everything.expense == 17.0
+    assert list(everything.daily) == repo.fetch_transactions_filtered()
+
+
+def test_dashboard_snapshot_apply_matches_requery(repo):
+    repo.add_transaction(("2024-03-05", 10.0, "expense", "Food", "Cash", ""))
+    snap = repo.dashboard_snapshot()
+
+    added = repo.add_transaction(("2024-03-04", 4.0, "expense", "Fuel", "Cash", ""))
+    snap = snap.apply(added)
+    assert snap == repo.dashboard_snapshot()
+
+    snap = snap.apply(repo.delete_transaction(added.row[0]))
+    assert snap == repo.dashboard_snapshot()
+
+    # Rows outside the snapshot's period leave it untouched.
+    march = repo.dashboard_snapshot("3", "2024")
+    assert march.apply(
+        repo.add_transaction(("2024-05-01", 1.0, "income", "Other", "Cash", ""))
+    ) is march
+
+
+def test_query_cache_hits_and_write_invalidation(repo):
+    cache = models.get_pool().cache
+    repo.add_transaction(("2024-03-05", 10.0, "expense", "Food", "Cash", ""))
+
+    assert repo.get_total("expense", "3") == 10.0
+    hits = cache.hits
+    assert repo.get_total("expense", "3") == 10.0
+    assert cache.hits == hits + 1
+
+    repo.add_transaction(("2024-03-06", 5.0, "expense", "Food", "Cash", ""))
+    assert repo.get_total("expense", "3") == 15.0
+
+
+def test_query_cache_sees_other_processes_writes(repo, tmp_path):
+    import sqlite3
+
+    assert repo.get_total("income") == 0
+
+    other = sqlite3.connect(str(tmp_path / "expenses.db"))
+    with other:
+        other.execute(
+            "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+            "VALUES ('2024-01-01', 4200, 'income', 'Salary', 'Card', '')"
+        )
+    other.close()
+
+    assert repo.get_total("income") == 42.0
+
+
+def test_query_cache_is_bounded():
+    from db.cache import QueryCache
+
+    class Conn:
+        def execute(self, sql):
+            return self
+
+        def fetchone(self):
+            return (1,)
+
+    cache, conn = QueryCache(maxsize=2), Conn()
+    for key in ("a", "b", "c"):
+        _, _, version = cache.lookup(conn, key)
+        cache.store(key, key.upper(), version)
+
+    assert cache.lookup(conn, "a")[0] is False
+    assert cache.lookup(conn, "c")[:2] == (True, "C")
+
+
+def test_tags_are_normalized_and_filterable(repo):
+    repo.add_transaction(("2024-01-05", 10.0, "expense", "Food", "Cash", "Weekend, food"))
+    repo.add_transaction(("2024-01-06", 20.0, "expense", "Food", "Cash", "food"))
+    repo.add_transaction(("2024-02-06", 5.0, "expense", "Fun", "Cash", " weekend ,,"))
+    repo.add_transaction(("2024-02-07", 99.0, "income", "Salary", "Card", "FOOD"))
+
+    assert repo.fetch_tags() == [("food", 3), ("weekend", 2)]
+    assert [r[2] for r in repo.fetch_by_tags(["Weekend"])] == [5.0, 10.0]
+    assert [r[2] for r in repo.fetch_by_tags("food, weekend", match="all")] == [10.0]
+    assert [r[2] for r in repo.fetch_by_tags(["weekend"], month="2")] == [5.0]
+    assert repo.fetch_by_tags(["nope"]) == []
+    assert repo.get_spend_by_tag() == [("food", 30.0), ("weekend", 15.0)]
+    assert repo.get_spend_by_tag(month="2") == [("weekend", 5.0)]
+
+    repo.delete_transaction(repo.fetch_by_tags(["weekend"])[0][0])
+    assert repo.get_spend_by_tag() == [("food", 30.0), ("weekend", 10.0)]
+
+
+def test_spend_by_tag_converts_like_totals(repo):
+    from decimal import Decimal
+
+    repo.add_rates([[("USD", "2024-01-01", 80.0)]])
+    repo.add_transaction(("2024-01-01", 0.4, "expense", "Food", "Cash", "trip"))
+    repo.add_transaction(("2024-01-01", 0.4, "expense", "Food", "Card", "trip"))
+    repo.add_transaction(("2024-01-01", 0.07, "expense", "Food", "Card", "trip"), "USD")
+
+    for currency, spend in (("USD", Decimal("0.08")), ("INR", Decimal("6.40"))):
+        assert repo.get_total("expense", currency=currency) == spend
+        assert repo.get_spend_by_tag(currency=currency) == [("trip", spend)]
+
+
+def test_converted_aggregates_round_per_rollup_bucket(repo):
+    from decimal import Decimal
+
+    # 0.40 INR is 0.005 USD: the two Food rows on one day are one
+    # daily_rollup bucket and round to 0.01 together, against 0.02 row by
+    # row. Every aggregate rounds at that point, so they all agree.
+    repo.add_rates([[("USD", "2024-01-01", 80.0), ("USD", "2024-01-02", 83.3)]])
+    for category in ("Food", "Food", "Travel", "Rent"):
+        repo.add_transaction(("2024-01-01", 0.4, "expense", category, "Cash", ""))
+    repo.add_transaction(("2024-01-02", 1.23, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-01-02", 0.07, "expense", "Food", "Card", ""), "USD")
+    repo.add_transaction(("2024-01-02", 0.11, "expense", "Rent", "Card", ""), "USD")
+
+    assert repo.get_total("expense", "1", "2024", "USD") == Decimal("0.22")
+    for currency in ("INR", "USD"):
+        total = repo.get_total("expense", currency=currency)
+        assert sum(repo.get_expense_by_category(currency=currency)[1]) == total
+        assert sum(d[2] for d in repo.fetch_transactions_filtered(currency=currency)) == total
+        assert repo.dashboard_snapshot(currency=currency).expense == total
+
+
+def test_rows_without_rates_are_left_out_of_other_currencies(repo):
+    from decimal import Decimal
+
+    import pytest
+
+    repo.add_rates([[("USD", "2024-01-01", 80.0)]])
+    repo.add_transaction(("2024-01-01", 100, "expense", "Food", "Cash", "trip"))
+    repo.add_transaction(("2024-02-02", 5, "expense", "Travel", "Card", "trip"), "EUR")
+
+    assert repo.missing_rates() == ["EUR"]
+    assert repo.get_total("expense") == Decimal("100.00")
+    assert repo.get_expense_by_category() == (["Food"], [Decimal("100.00")])
+    assert repo.fetch_transactions_filtered()[-1][1:] == (0, 0)
+    assert repo.get_spend_by_tag() == [("trip", Decimal("100.00"))]
+    snapshot = repo.dashboard_snapshot()
+    assert (snapshot.expense, snapshot.unconverted) == (Decimal("100.00"), ("EUR",))
+    # Reporting in EUR needs no rate for EUR rows alone, but does for INR.
+    assert repo.get_total("expense", "2", "2024", "EUR") == Decimal("5.00")
+    with pytest.raises(ValueError):
+        repo.get_total("expense", currency="EUR")
+
+
+def test_tag_lookups_use_the_index(repo):
+    conn = models.get_connection()
+    plan = " ".join(
+        r[3]
+        for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT tt.transaction_id FROM tags t "
+            "JOIN transaction_tags tt ON tt.tag_id = t.id WHERE t.name IN ('food')"
+        )
+    )
+    assert "SCAN" not in plan
+
+
+def test_tag_backfill_on_upgrade(tmp_path):
+    import sqlite3
+
+    from db.migrations import MIGRATIONS, migrate
+
+    # A database at version 7, from before tags were normalized.
+    conn = sqlite3.connect(str(tmp_path / "old.db"))
+    conn.execute("BEGIN")
+    for step in MIGRATIONS[:7]:
+        step(conn.cursor())
+    conn.execute("PRAGMA user_version = 7")
+    conn.execute(
+        "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+        "VALUES ('2023-11-20', 75.5, 'expense', 'Food', 'Cash', 'Trip, food,	CAFÉ')"
+    )
+    conn.commit()
+
+    migrate(conn)
+    names = conn.execute(
+        "SELECT name FROM tags JOIN transaction_tags ON tag_id = tags.id ORDER BY name"
+    ).fetchall()
+    assert names == [("café",), ("food",), ("trip",)]
+    conn.close()
+
+
+def test_legacy_rows_without_amount_or_date_migrate(tmp_path):
+    import sqlite3
+
+    from db import rollups
+
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "date TEXT, amount REAL, type TEXT, category TEXT, "
+        "payment_method TEXT, tags TEXT)"
+    )
+    legacy.executemany(
+        "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+        "VALUES (?, ?, 'expense', 'Food', 'Cash', '')",
+        [("2023-11-20", None), ("2023-11-20", 7.5), (None, 3.0)],
+    )
+    legacy.commit()
+    legacy.close()
+
+    models.configure(path)
+    try:
+        models.init_db()
+        conn = models.get_connection()
+        assert conn.execute("SELECT total, count FROM daily_rollup").fetchall() == [(750, 2)]
+        assert rollups.verify(conn) == []
+
+        conn.execute("DELETE FROM transactions WHERE amount IS NULL")
+        assert conn.execute("SELECT total, count FROM monthly_rollup").fetchall() == [(750, 1)]
+    finally:
+        models.close_pool()
+
+
+def test_minor_units_upgrade_keeps_ids_and_triggers(tmp_path):
+    import sqlite3
+
+    from db import rollups
+    from db.migrations import MIGRATIONS, migrate
+
+    # A database at version 10, with amounts still stored as REAL.
+    conn = sqlite3.connect(str(tmp_path / "old.db"))
+    conn.execute("BEGIN")
+    for step in MIGRATIONS[:10]:
+        step(conn.cursor())
+    conn.execute("PRAGMA user_version = 10")
+    conn.executemany(
+        "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+        "VALUES (?, ?, 'expense', 'Food', 'Cash', 'tea')",
+        [("2023-11-20", 0.1), ("2023-11-20", 1.005), ("2023-11-21", 19.999)],
+    )
+    conn.execute("DELETE FROM transactions WHERE id = 3")
+    conn.execute(
+        "INSERT INTO budgets (category, period, limit_amount) VALUES ('Food', 'monthly', 99.95)"
+    )
+    conn.commit()
+
+    migrate(conn)
+    # 1.005 rounds half up, as db.money.to_minor does for new amounts.
+    assert conn.execute("SELECT id, typeof(amount), amount FROM transactions").fetchall() == [
+        (1, "integer", 10), (2, "integer", 101)
+    ]
+    assert conn.execute("SELECT limit_amount FROM budgets").fetchone() == (9995,)
+    assert conn.execute("SELECT total FROM monthly_rollup").fetchall() == [(111,)]
+
+    # Triggers, search and AUTOINCREMENT survive the rebuild.
+    conn.execute(
+        "INSERT INTO transactions (date, amount, type, category, payment_method, tags) "
+        "VALUES ('2023-11-22', 5, 'expense', 'Food', 'Cash', '')"
+    )
+    assert conn.execute("SELECT MAX(id) FROM transactions").fetchone() == (4,)
+    assert conn.execute("SELECT total FROM monthly_rollup").fetchall() == [(116,)]
+    assert conn.execute(
+        "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'tea'"
+    ).fetchall() == [(1,), (2,)]
+    assert rollups.verify(conn) == []
+    conn.close()
+
+
+def test_amounts_are_exact(repo):
+    from decimal import Decimal
+
+    repo.add_transaction(("2024-01-05", 0.1, "expense", "Food", "Cash", ""))
+    repo.add_transaction(("2024-01-05", "0.2", "expense", "Food", "Cash", ""))
+    change = repo.add_transaction(("2024-01-06", Decimal("12.345"), "expense", "Rent", "Cash", ""))
+
+    assert change.row[2] == Decimal("12.35")
+    assert repo.get_total("expense", "1", "2024") == Decimal("12.65")
+    assert repo.get_expense_by_category() == (["Food", "Rent"], [Decimal("0.30"), Decimal("12.35")])
+    assert [r[2] for r in repo.fetch_transactions(order="asc")] == [
+        Decimal("0.10"), Decimal("0.20"), Decimal("12.35")
+    ]
+
+
+def test_tags_normalize_like_filters(repo):
+    repo.add_transaction(("2024-03-01", 9.0, "expense", "Food", "Cash", "CAFÉ,\tTrip\u00a0"))
+
+    assert sorted(name for name, _ in repo.fetch_tags()) == ["café", "trip"]
+    assert len(repo.fetch_by_tags("Café, TRIP", match="all")) == 1
+
+
+def test_search_pages_prefix_matches(repo):
+    from db.repository import search_query
+
+    for day in range(1, 6):
+        repo.add_transaction((f"2024-03-0{day}", 40.0, "expense", "Fuel", "Card", ""))
+    repo.add_transaction(("2024-03-06", 9.0, "expense", "Food", "Cash", "fuel-station"))
+    repo.add_transaction(("2024-03-07", 9.0, "expense", "Food", "Cash", ""))
+
+    first = repo.fetch_page(limit=4, search="fu")
+    assert [r[1] for r in first] == ["2024-03-06", "2024-03-05", "2024-03-04", "2024-03-03"]
+    rest = repo.fetch_page(after=(first[-1][1], first[-1][0]), limit=4, search="fu")
+    assert [r[1] for r in rest] == ["2024-03-02", "2024-03-01"]
+
+    assert len(repo.fetch_page(search="fuel card")) == 5
+    assert repo.fetch_page(search="cash", month="4") == []
+    assert search_query('fu" OR *') == '"fu"* "OR"*'
+
+    repo.delete_transaction(first[0][0])
+    assert len(repo.fetch_page(search="station")) == 0
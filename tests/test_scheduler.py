@@ -0,0 +1,45 @@
+from gui.scheduler import RefreshScheduler
+
+
+def test_refreshes_coalesce_into_one_pass(root):
+    scheduler = RefreshScheduler(root)
+    calls = []
+    scheduler.register("list", lambda: calls.append("list"), ("transactions", "filters"))
+    scheduler.register("reports", lambda: calls.append("reports"), ("transactions",))
+
+    scheduler.invalidate("transactions")
+    scheduler.invalidate("filters")
+    scheduler.mark_dirty("reports")
+    assert calls == []
+    assert len(root.pending) == 1
+
+    root.drain()
+    assert calls == ["list", "reports"]
+
+    stats = scheduler.stats()
+    assert stats["list"]["count"] == 1
+    assert stats["reports"]["count"] == 1
+
+
+def test_topic_only_refreshes_dependents(root):
+    scheduler = RefreshScheduler(root)
+    calls = []
+    scheduler.register("list", lambda: calls.append("list"), ("filters",))
+    scheduler.register("reports", lambda: calls.append("reports"), ("transactions",))
+
+    scheduler.invalidate("filters")
+    root.drain()
+    assert calls == ["list"]
+
+
+def test_debounce_restarts_the_quiet_period(root):
+    scheduler = RefreshScheduler(root, debounce_ms=150)
+    calls = []
+    scheduler.register("list", lambda: calls.append("list"), ("filters",))
+
+    for _ in range(5):
+        scheduler.invalidate("filters")
+    assert len(root.pending) == 1
+
+    root.drain()
+    assert calls == ["list"]
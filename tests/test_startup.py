@@ -0,0 +1,26 @@
+import subprocess
+import sys
+
+from utils.startup import HEAVY_MODULES, StartupTimer
+
+
+def test_main_window_import_stays_light():
+    # Fresh interpreter: what importing the app shell pulls in by itself.
+    code = (
+        "import sys, app; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert out == ""
+
+
+def test_report_lists_phases():
+    timer = StartupTimer()
+    timer.mark("imports")
+    timer.mark("first paint")
+
+    report = timer.report()
+    assert "imports" in report and "first paint" in report
+    assert [m[0] for m in timer.marks] == ["imports", "first paint"]
@@ -1,29 +1,219 @@
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+# Dashboard drawing shared by the Reports panel (gui/reports.py) and the
+# headless report renderer (report.py): gauge state, period titles and the
+# pie / line / gauge artwork. Nothing here touches Tk, so it also runs in
+# worker processes without a display.
+import math
+import os
+from datetime import date as Date
+
+from matplotlib import colormaps
 from matplotlib.figure import Figure
+from PIL import Image, ImageDraw
 
+from db.currency import symbol
 from db.repository import Repository
 
+# ================= THEME =================
+CARD_BG = "#1c1c1c"
+TEXT_LIGHT = "#ffffff"
+INCOME_COLOR = "#32CD32"
+EXPENSE_COLOR = "#FFA500"
 
-def monthly_summary(parent):
-    repo = Repository()
-    data = repo.fetch_transactions()
+# Resolved from the project root so reports render from any directory.
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+GAUGE_IMAGE = os.path.join(ASSETS_DIR, "exp.png")
+GAUGE_SIZE = (220, 220)
+NEEDLE_LENGTH = 90
+GAUGE_ANGLES = (0, 90, 180)
+
+
+# ======================================================
+# LABELS + GAUGE STATE
+# ======================================================
+def period_label(month, year):
+    if month == "All" and year == "All":
+        return "All Period"
+    if month == "All":
+        return str(year)
+    if year == "All":
+        return Date(2000, int(month), 1).strftime("%B")
+    return f"{int(year)}-{int(month):02d}"
+
+
+def gauge_state(income, expense):
+    # (needle angle, label, color) for the expensometer.
+    diff = income - expense
+    if diff < 0:
+        return 180, "Overspent", "red"
+    elif diff < income / 2:
+        return 90, "Moderate", "grey"
+    return 0, "Good savings", "green"
+
+
+def gauge_image(angle):
+    # The dial with its thick black needle at `angle` degrees, as a PIL
+    # image; None when the dial asset is missing.
+    if not os.path.exists(GAUGE_IMAGE):
+        return None
+
+    base = Image.open(GAUGE_IMAGE).convert("RGBA").resize(GAUGE_SIZE)
+    center = (GAUGE_SIZE[0] // 2, GAUGE_SIZE[1] // 2)
+
+    overlay = Image.new("RGBA", GAUGE_SIZE, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    rad = math.radians(180 - angle)
+    tip = (center[0] + NEEDLE_LENGTH * math.cos(rad),
+           center[1] - NEEDLE_LENGTH * math.sin(rad))
+    draw.line([center, tip], fill="black", width=6)
+
+    return Image.alpha_composite(base, overlay)
+
+
+# ======================================================
+# PIE CHART (EXPENSES BY CATEGORY)
+# ======================================================
+def draw_pie(ax, categories, values, title):
+    # Wedge count follows the categories, so the axes is redrawn each time.
+    ax.clear()
+    ax.set_facecolor(CARD_BG)
+    ax.set_aspect("equal", adjustable="box")  # Make circular
+
+    if not values or sum(values) == 0:
+        wedges, texts = ax.pie(
+            [1], labels=["No data"], colors=["#555555"], startangle=90,
+            wedgeprops=dict(width=0.6, edgecolor=CARD_BG)
+        )
+        for t in texts:
+            t.set_color("white")
+            t.set_fontsize(10)
+    else:
+        colors = colormaps["Set3"].colors  # pastel modern palette
+        wedges, texts, autotexts = ax.pie(
+            [float(v) for v in values],
+            labels=categories,
+            autopct="%1.1f%%",
+            startangle=90,
+            pctdistance=0.75,
+            wedgeprops=dict(width=0.6, edgecolor=CARD_BG, linewidth=1),
+            colors=colors
+        )
+        # Category labels in white
+        for t in texts:
+            t.set_color("white")
+            t.set_fontsize(9)
+        # Percentages in black
+        for at in autotexts:
+            at.set_color("black")
+            at.set_fontsize(9)
+            at.set_fontweight("bold")
+
+    ax.set_title(title, color=TEXT_LIGHT, fontsize=11, pad=10)
 
-    total_income = 0
-    total_expense = 0
 
-    for row in data:
-        amount = row[2]
-        tx_type = row[3]
+# ======================================================
+# LINE CHART (DAILY INCOME VS EXPENSE)
+# ======================================================
+def create_line_artists(ax):
+    # Lines are created once and later moved with update_line_chart().
+    (income_line,) = ax.plot([], [], label="Income", color=INCOME_COLOR, marker="o")
+    (expense_line,) = ax.plot([], [], label="Expense", color=EXPENSE_COLOR, marker="o")
+    ax.xaxis_date()
+    no_data_text = ax.text(
+        0.5, 0.5, "No data", transform=ax.transAxes, ha="center", va="center", fontsize=11
+    )
 
-        if tx_type == "income":
-            total_income += amount
-        elif tx_type == "expense":
-            total_expense += amount
+    ax.set_title("Income vs Expense (All Period)", color=TEXT_LIGHT, fontsize=11)
+    ax.tick_params(axis='x', labelrotation=20, labelsize=9)
+    ax.tick_params(axis='y', labelsize=9)
+    ax.legend(fontsize=9)
+    return income_line, expense_line, no_data_text
+
+
+def update_line_chart(ax, artists, snap):
+    income_line, expense_line, no_data_text = artists
+    dates = [Date.fromisoformat(d) for d, _, _ in snap.daily]
+    income = [float(i) for _, i, _ in snap.daily]
+    expense = [float(e) for _, _, e in snap.daily]
+
+    income_line.set_data(dates, income)
+    expense_line.set_data(dates, expense)
+    no_data_text.set_visible(not dates)
+
+    ax.set_title(
+        f"Income vs Expense ({period_label(snap.month, snap.year)})",
+        color=TEXT_LIGHT,
+        fontsize=11,
+    )
+    ax.relim()
+    ax.autoscale_view()
+
+
+# ======================================================
+# FULL DASHBOARD (ONE FIGURE, NO GUI)
+# ======================================================
+def dashboard_figure(snap):
+    # Gauge, totals, pie and line for one DashboardSnapshot on a single
+    # Figure. Figure() is not registered with pyplot, so it is freed as
+    # soon as the caller drops it.
+    fig = Figure(figsize=(10, 7.5), dpi=100)
+    fig.patch.set_facecolor(CARD_BG)
+    grid = fig.add_gridspec(2, 2, height_ratios=(1, 1.4))
+    fig.suptitle(
+        f"K Personal Expense Checker – {period_label(snap.month, snap.year)}",
+        color=TEXT_LIGHT, fontsize=14, fontweight="bold",
+    )
+
+    # ---------- GAUGE ----------
+    angle, label, color = gauge_state(snap.income, snap.expense)
+    gauge_ax = fig.add_subplot(grid[0, 0])
+    gauge_ax.axis("off")
+    dial = gauge_image(angle)
+    if dial is not None:
+        gauge_ax.imshow(dial)
+    gauge_ax.set_title(label, color=color, fontsize=13, fontweight="bold", y=-0.1)
+
+    # ---------- TOTALS ----------
+    cards_ax = fig.add_subplot(grid[0, 1])
+    cards_ax.axis("off")
+    for y, title, value, value_color in (
+        (0.8, "Total Income", snap.income, INCOME_COLOR),
+        (0.35, "Total Expense", snap.expense, EXPENSE_COLOR),
+    ):
+        cards_ax.text(0, y, title, color=TEXT_LIGHT, fontsize=11, fontweight="bold")
+        cards_ax.text(
+            0, y - 0.15, f"{symbol(snap.currency)} {value:.2f}",
+            color=value_color, fontsize=14, fontweight="bold",
+        )
+
+    # ---------- CHARTS ----------
+    categories = [c for c, _ in snap.categories]
+    values = [v for _, v in snap.categories]
+    draw_pie(fig.add_subplot(grid[1, 0]), categories, values, "Expenses by Category")
+
+    line_ax = fig.add_subplot(grid[1, 1])
+    update_line_chart(line_ax, create_line_artists(line_ax), snap)
+    line_ax.tick_params(colors=TEXT_LIGHT)
+
+    fig.tight_layout()
+    return fig
+
+
+# ======================================================
+# SIMPLE SUMMARY (EMBEDDED TK CHART)
+# ======================================================
+def monthly_summary(parent):
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    # Two lookups on the monthly rollup, whatever the size of the ledger.
+    repo = Repository()
+    total_income = repo.get_total("income")
+    total_expense = repo.get_total("expense")
 
     fig = Figure(figsize=(5, 4))
     ax = fig.add_subplot(111)
 
-    ax.bar(["Income", "Expense"], [total_income, total_expense])
+    ax.bar(["Income", "Expense"], [float(total_income), float(total_expense)])
     ax.set_title("Income vs Expense")
     ax.set_ylabel("Amount")
 
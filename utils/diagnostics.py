@@ -0,0 +1,297 @@
+# In-process profiling: wall time of every Repository call and GUI refresh,
+# kept as rolling histograms, plus a slow-query log with EXPLAIN QUERY PLAN.
+#
+# Off by default. While disabled an instrumented call costs one attribute
+# check; no SQL is traced and nothing is recorded. Turn it on from the
+# Diagnostics tab, with diagnostics.enable(), or by starting the app with
+# EXPENSES_DIAGNOSTICS=1.
+import functools
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+# Calls slower than this (ms) go to the slow-query log.
+SLOW_QUERY_MS = 50.0
+
+# Samples kept per histogram; older ones roll off.
+WINDOW = 512
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open.
+BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+SLOW_LOG_SIZE = 100
+SLOW_LOG_FILE = "slow_queries.log"
+
+log = logging.getLogger("expenses.slow_queries")
+
+# code.co_flags bit of generator functions (inspect.CO_GENERATOR, without
+# importing inspect on the startup path).
+CO_GENERATOR = 0x20
+
+# One slow call. statements are the SQL texts it ran with every literal
+# replaced by ? (the values may be personal data; params has their shape)
+# and plans the matching EXPLAIN QUERY PLAN lines.
+SlowQuery = namedtuple(
+    "SlowQuery", ["when", "name", "ms", "params", "rows", "statements", "plans"]
+)
+
+# Bookkeeping statements that are not worth a plan.
+_NO_PLAN = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+# Literals in traced SQL: the trace callback only sees statements with their
+# parameters already inlined. Blobs, strings (with '' escapes), numbers.
+_LITERAL = re.compile(r"\b[xX]'[0-9a-fA-F]*'|'(?:[^']|'')*'|\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+
+
+# ======================================================
+# ROLLING HISTOGRAM
+# ======================================================
+class Histogram:
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        k = min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)
+        return ordered[max(k, 0)]
+
+    def buckets(self):
+        # [(upper bound ms or None for the open bucket, samples), ...]
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for ms in self.samples:
+            i = 0
+            while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+                i += 1
+            counts[i] += 1
+        return list(zip(BUCKETS_MS + (None,), counts))
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": self.max_ms,
+        }
+
+
+# ======================================================
+# REGISTRY
+# ======================================================
+class Diagnostics:
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.slow = deque(maxlen=SLOW_LOG_SIZE)
+
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._handler = None
+
+    def enable(self, log_path=SLOW_LOG_FILE):
+        # log_path=None keeps slow queries in memory only.
+        if log_path and self._handler is None:
+            self._handler = logging.FileHandler(log_path, encoding="utf-8")
+            log.addHandler(self._handler)
+            log.setLevel(logging.INFO)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self._handler is not None:
+            log.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.slow.clear()
+
+    def record(self, name, ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(ms)
+
+    def histogram(self, name):
+        return self._histograms.get(name)
+
+    def summary(self):
+        # {name: summary dict}, slowest p95 first.
+        with self._lock:
+            items = [(name, h.summary()) for name, h in self._histograms.items()]
+        return dict(sorted(items, key=lambda kv: kv[1]["p95_ms"], reverse=True))
+
+    # ======================================================
+    # SQL CAPTURE (TRACE CALLBACK, ONLY WHILE A CALL RUNS)
+    # ======================================================
+    def _trace(self, sql):
+        # Statements run by triggers and the FTS module come through as
+        # "-- ..." comments; they belong to the statement that fired them.
+        statements = getattr(self._local, "statements", None)
+        if statements is not None and not sql.startswith("--"):
+            statements.append(sql)
+
+    def run_query(self, name, conn, fn, args, kwargs):
+        # Nested instrumented calls are folded into the outermost one.
+        if getattr(self._local, "statements", None) is not None:
+            return fn(*args, **kwargs)
+
+        self._local.statements = statements = []
+        conn.set_trace_callback(self._trace)
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            conn.set_trace_callback(None)
+            self._local.statements = None
+
+        self.record(name, ms)
+        if ms >= self.slow_ms:
+            self._log_slow(name, ms, conn, statements, args, result)
+        return result
+
+    def _log_slow(self, name, ms, conn, statements, args, result):
+        statements = [s for s in statements if not s.lstrip().upper().startswith(_NO_PLAN)]
+        plans = [explain(conn, sql) for sql in statements]
+        entry = SlowQuery(
+            datetime.now().isoformat(timespec="seconds"),
+            name,
+            ms,
+            params_shape(args[1:]),
+            row_count(result),
+            [mask_literals(sql) for sql in statements],
+            plans,
+        )
+        self.slow.append(entry)
+        log.info(format_slow(entry))
+
+
+def explain(conn, sql):
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+    except sqlite3.Error as e:
+        return [f"(no plan: {mask_literals(str(e))})"]
+
+
+def mask_literals(sql):
+    return _LITERAL.sub("?", sql)
+
+
+def params_shape(args):
+    # Types and sizes only; the values may be personal data.
+    shape = []
+    for value in args:
+        if isinstance(value, (list, tuple)):
+            shape.append(f"{type(value).__name__}[{len(value)}]")
+        else:
+            shape.append(type(value).__name__)
+    return "(" + ", ".join(shape) + ")"
+
+
+def row_count(result):
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+def format_slow(entry):
+    lines = [
+        f"{entry.when} {entry.name}{entry.params} {entry.ms:.1f} ms, "
+        f"{entry.rows} row(s)"
+    ]
+    for sql, plan in zip(entry.statements, entry.plans):
+        lines.append("  " + " ".join(sql.split()))
+        lines.extend("    " + step for step in plan)
+    return "\n".join(lines)
+
+
+diagnostics = Diagnostics()
+
+if os.environ.get("EXPENSES_DIAGNOSTICS"):
+    diagnostics.enable()
+
+
+# ======================================================
+# DECORATORS
+# ======================================================
+def instrument_queries(cls):
+    # Class decorator: time every public method of a Repository-like class
+    # (it must have _connection()). Generators are timed over the whole
+    # iteration, without SQL capture.
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not callable(method):
+            continue
+        label = f"{cls.__name__}.{name}"
+        if method.__code__.co_flags & CO_GENERATOR:
+            setattr(cls, name, _timed_generator(label, method))
+        else:
+            setattr(cls, name, _timed_query(label, method))
+    return cls
+
+
+def _timed_query(label, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not diagnostics.enabled:
+            return method(self, *args, **kwargs)
+        return diagnostics.run_query(
+            label, self._connection(), method, (self,) + args, kwargs
+        )
+
+    return wrapper
+
+
+def _timed_generator(label, method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not diagnostics.enabled:
+            yield from method(self, *args, **kwargs)
+            return
+
+        start = time.perf_counter()
+        try:
+            yield from method(self, *args, **kwargs)
+        finally:
+            diagnostics.record(label, (time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+def timed(label):
+    # Method/function decorator for GUI work (refreshes, chart builds).
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not diagnostics.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                diagnostics.record(label, (time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    return decorate
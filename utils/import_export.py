@@ -1,6 +1,355 @@
-import pandas as pd
+import csv
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import namedtuple
+from datetime import date as Date, datetime
+from decimal import Decimal, InvalidOperation
 
+from db.currency import BASE_CURRENCY
+from db.fingerprints import fingerprint
+from db.money import MINOR_DIGITS
+from db.repository import EXPORT_CHUNK_SIZE, TRANSACTION_COLUMNS, Repository
 
-def export_csv(data, path):
-    df = pd.DataFrame(data)
-    df.to_csv(path, index=False)
\ No newline at end of file
+
+# ======================================================
+# EXPORT (STREAMING, BOUNDED MEMORY)
+# ======================================================
+# All exporters read through Repository.iter_transactions, so at most one
+# chunk of rows is in memory whatever the size of the ledger. start/end are
+# inclusive ISO dates and txn_type is "income" / "expense"; each returns the
+# number of rows written.
+def export_csv(path, start=None, end=None, txn_type=None, chunk_size=EXPORT_CHUNK_SIZE):
+    count = 0
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(TRANSACTION_COLUMNS)
+        for chunk in Repository().iter_transactions(start, end, txn_type, chunk_size):
+            writer.writerows(chunk)
+            count += len(chunk)
+
+    return count
+
+
+# Columnar layout shared by the binary exporters: dates become int32 days
+# since 1970-01-01 (NO_DAY for a row without a date), amounts stay int64
+# minor units (db/money.py) and the low-cardinality text columns are
+# dictionary encoded (int32 codes + a "<name>_labels" array in the .npz).
+NUMPY_COLUMNS = {
+    "id": "int64",
+    "day": "int32",
+    "amount": "int64",
+    "type": "int32",
+    "category": "int32",
+    "payment_method": "int32",
+    "tags": "int32",
+    "currency": "int32",
+}
+
+DICTIONARY_COLUMNS = ("type", "category", "payment_method", "tags", "currency")
+
+# int32 has no NaT; the smallest value stands in for a missing date.
+NO_DAY = -(2 ** 31)
+
+
+def export_npz(path, start=None, end=None, txn_type=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Loads back with numpy.load(path). Each column is streamed to a scratch
+    # file per chunk, then copied into the archive behind an .npy header once
+    # the final row count is known.
+    try:
+        import numpy as np
+        from numpy.lib import format as npy_format
+    except ImportError:
+        raise RuntimeError("NumPy is required for .npz export (pip install numpy).")
+
+    dictionaries = {name: {} for name in DICTIONARY_COLUMNS}
+    count = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = {name: open(os.path.join(tmp, name), "wb") for name in NUMPY_COLUMNS}
+        try:
+            chunks = Repository().iter_transactions(
+                start, end, txn_type, chunk_size, minor_units=True
+            )
+            for chunk in chunks:
+                ids, dates, amounts, *texts = zip(*chunk)
+
+                np.asarray(ids, dtype="int64").tofile(scratch["id"])
+                days = np.asarray(dates, dtype="datetime64[D]")
+                days = np.where(np.isnat(days), NO_DAY, days.astype("int64"))
+                days.astype("int32").tofile(scratch["day"])
+                np.asarray(amounts, dtype="int64").tofile(scratch["amount"])
+
+                for name, values in zip(DICTIONARY_COLUMNS, texts):
+                    labels = dictionaries[name]
+                    codes = [labels.setdefault(v or "", len(labels)) for v in values]
+                    np.asarray(codes, dtype="int32").tofile(scratch[name])
+
+                count += len(chunk)
+        finally:
+            for f in scratch.values():
+                f.close()
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+            for name, dtype in NUMPY_COLUMNS.items():
+                header = {
+                    "descr": npy_format.dtype_to_descr(np.dtype(dtype)),
+                    "fortran_order": False,
+                    "shape": (count,),
+                }
+                with zf.open(name + ".npy", "w", force_zip64=True) as out:
+                    npy_format.write_array_header_1_0(out, header)
+                    with open(os.path.join(tmp, name), "rb") as src:
+                        shutil.copyfileobj(src, out)
+
+            for name, labels in dictionaries.items():
+                with zf.open(name + "_labels.npy", "w") as out:
+                    npy_format.write_array(out, np.array(list(labels), dtype=str))
+
+    return count
+
+
+def export_arrow(path, start=None, end=None, txn_type=None, chunk_size=EXPORT_CHUNK_SIZE):
+    # Arrow IPC file (Feather v2), one record batch per chunk. Amounts are
+    # exact decimal128 values with the ledger's two places; a row without a
+    # date gets a null one.
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RuntimeError("pyarrow is required for Arrow export (pip install pyarrow).")
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("amount", pa.decimal128(18, MINOR_DIGITS)),
+        ("type", pa.string()),
+        ("category", pa.string()),
+        ("payment_method", pa.string()),
+        ("tags", pa.string()),
+        ("currency", pa.string()),
+    ])
+    count = 0
+
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for chunk in Repository().iter_transactions(start, end, txn_type, chunk_size):
+            ids, dates, amounts, *texts = zip(*chunk)
+            arrays = [
+                pa.array(ids, pa.int64()),
+                pa.array([Date.fromisoformat(d) if d else None for d in dates], pa.date32()),
+                pa.array(amounts, pa.decimal128(18, MINOR_DIGITS)),
+            ] + [pa.array(values, pa.string()) for values in texts]
+
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            count += len(chunk)
+
+    return count
+
+
+# ======================================================
+# BANK STATEMENT IMPORT (STREAMING)
+# ======================================================
+# Maps our fields to the statement's column headers. A statement has either
+# one signed "amount" column or separate "debit" / "credit" columns; "type"
+# is only needed when amounts are unsigned and the type has its own column,
+# and "currency" when the statement mixes currencies.
+DEFAULT_MAPPING = {
+    "date": "Date",
+    "amount": "Amount",
+    "category": "Description",
+}
+
+DEFAULT_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d %b %Y", "%m/%d/%Y"]
+
+DEFAULT_VALUES = {
+    "category": "Other",
+    "payment_method": "Bank",
+    "tags": "",
+    "currency": BASE_CURRENCY,
+}
+
+BATCH_SIZE = 5000
+
+ImportResult = namedtuple(
+    "ImportResult", ["read", "inserted", "duplicates", "skipped", "unknown_currencies"]
+)
+
+
+# Streams a CSV statement into the ledger in a single transaction. Lines
+# are parsed lazily and inserted in executemany batches, so memory stays flat
+# however long the statement is. Lines already imported by an earlier run
+# (same fingerprint) are skipped, as are lines whose date or amount cannot be
+# parsed (footers, totals) and lines in a currency without exchange rates,
+# which are listed in the result's unknown_currencies.
+# progress_cb(lines_read, rows_inserted) runs after every batch.
+def import_csv(
+    path,
+    mapping=None,
+    date_formats=None,
+    defaults=None,
+    batch_size=BATCH_SIZE,
+    progress_cb=None,
+    encoding="utf-8-sig",
+    delimiter=",",
+):
+    repo = Repository()
+    parser = StatementParser(mapping, date_formats, defaults, repo.rate_table().currencies())
+
+    def on_batch(inserted):
+        if progress_cb:
+            progress_cb(parser.read, inserted)
+
+    with open(path, newline="", encoding=encoding) as f:
+        rows = parser.parse_all(csv.DictReader(f, delimiter=delimiter))
+        inserted = repo.add_transactions(
+            _batched(rows, batch_size), progress_cb=on_batch
+        )
+
+    return ImportResult(
+        read=parser.read,
+        inserted=inserted,
+        duplicates=parser.read - parser.skipped - inserted,
+        skipped=parser.skipped,
+        unknown_currencies=sorted(parser.unknown_currencies),
+    )
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StatementParser:
+    # Turns statement records (dicts keyed by header) into repository rows:
+    # (date, amount, type, category, payment_method, tags, currency,
+    # fingerprint). With `currencies` (RateTable.currencies()), lines in any
+    # other currency are skipped and collected in unknown_currencies.
+    def __init__(self, mapping=None, date_formats=None, defaults=None, currencies=None):
+        self.mapping = dict(mapping or DEFAULT_MAPPING)
+        self.date_formats = list(date_formats or DEFAULT_DATE_FORMATS)
+        self.defaults = {**DEFAULT_VALUES, **(defaults or {})}
+        self.currencies = None if currencies is None else set(currencies)
+
+        self.read = 0
+        self.skipped = 0
+        self.unknown_currencies = set()
+        self._occurrences = {}
+
+    def parse_all(self, records):
+        for record in records:
+            row = self.parse(record)
+            if row is not None:
+                yield row
+
+    def parse(self, record):
+        self.read += 1
+        try:
+            date = self.parse_date(self._field(record, "date"))
+            amount, txn_type = self._amount_and_type(record)
+        except ValueError:
+            self.skipped += 1
+            return None
+
+        category = self._field(record, "category") or self.defaults["category"]
+        payment = self._field(record, "payment_method") or self.defaults["payment_method"]
+        tags = self._field(record, "tags") or self.defaults["tags"]
+        currency = (self._field(record, "currency") or self.defaults["currency"]).upper()
+        if self.currencies is not None and currency not in self.currencies:
+            self.skipped += 1
+            self.unknown_currencies.add(currency)
+            return None
+
+        row = (date, amount, txn_type, category, payment, tags)
+        return row + (currency, self._fingerprint(row, currency))
+
+    def _field(self, record, name):
+        column = self.mapping.get(name)
+        if not column:
+            return ""
+        return (record.get(column) or "").strip()
+
+    # ======================================================
+    # DATES (CONFIGURED FORMATS, THEN DATEUTIL)
+    # ======================================================
+    def parse_date(self, text):
+        if not text:
+            raise ValueError("missing date")
+
+        for i, fmt in enumerate(self.date_formats):
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            # Statements use one format throughout: try it first next time.
+            if i:
+                self.date_formats.insert(0, self.date_formats.pop(i))
+            return parsed.strftime("%Y-%m-%d")
+
+        from dateutil import parser as date_parser
+
+        try:
+            return date_parser.parse(text, dayfirst=True).strftime("%Y-%m-%d")
+        except OverflowError as e:
+            raise ValueError(str(e))
+
+    # ======================================================
+    # AMOUNTS (SIGNED AMOUNT OR DEBIT / CREDIT COLUMNS)
+    # ======================================================
+    def _amount_and_type(self, record):
+        if "debit" in self.mapping or "credit" in self.mapping:
+            debit = self._field(record, "debit")
+            credit = self._field(record, "credit")
+            if debit:
+                return abs(parse_amount(debit)), "expense"
+            if credit:
+                return abs(parse_amount(credit)), "income"
+            raise ValueError("no debit or credit")
+
+        amount = parse_amount(self._field(record, "amount"))
+        txn_type = self._field(record, "type").lower()
+        if txn_type in ("income", "credit", "cr"):
+            return abs(amount), "income"
+        if txn_type in ("expense", "debit", "dr"):
+            return abs(amount), "expense"
+        return abs(amount), "expense" if amount < 0 else "income"
+
+    def _fingerprint(self, row, currency):
+        # Identical lines in one statement (two coffees the same day) are
+        # told apart by how many times the line has occurred so far, so a
+        # re-import matches them one-to-one instead of collapsing them.
+        # Counted over the whole statement, whatever its line order, and
+        # keyed by the line's first fingerprint: about 100 bytes per
+        # distinct line rather than a tuple of its fields.
+        first = fingerprint(row, currency, 0)
+        n = self._occurrences.get(first, 0)
+        self._occurrences[first] = n + 1
+        return first if n == 0 else fingerprint(row, currency, n)
+
+
+_AMOUNT_NOISE = re.compile(r"[^\d.\-]")
+
+
+def parse_amount(text):
+    # Statement text -> Decimal, exactly as written ("1,234.50" is 1234.50).
+    text = text.strip()
+    if not text:
+        raise ValueError("missing amount")
+
+    negative = text.startswith("(") and text.endswith(")")
+    if text.upper().endswith(("DR", "CR")):
+        negative = text.upper().endswith("DR")
+        text = text[:-2]
+
+    try:
+        value = Decimal(_AMOUNT_NOISE.sub("", text))
+    except InvalidOperation:
+        raise ValueError(f"not an amount: {text!r}")
+    return -abs(value) if negative else value
@@ -0,0 +1,47 @@
+# Startup timing: app.py imports this first, so the clock starts before
+# any application or GUI module is loaded. Phases are marked as the
+# staged startup reaches them and also land in the diagnostics histograms
+# as "startup:<phase>".
+#
+#   python app.py --startup-report      (or EXPENSES_STARTUP_REPORT=1)
+import os
+import sys
+import time
+
+from utils.diagnostics import diagnostics
+
+# Modules kept off the startup path; the report lists which were loaded.
+HEAVY_MODULES = ("matplotlib", "PIL", "tkcalendar", "numpy", "pandas", "dateutil")
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.marks = []
+
+    def mark(self, phase):
+        # Milliseconds since the clock started, plus what was loaded by now.
+        elapsed = (time.perf_counter() - self.started) * 1000
+        loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+        self.marks.append((phase, elapsed, loaded))
+        diagnostics.record(f"startup:{phase}", elapsed)
+        return elapsed
+
+    def report(self):
+        lines = ["Startup timing", f"  {'phase':<14}{'total':>10}{'step':>10}  heavy modules"]
+        previous = 0.0
+        for phase, elapsed, loaded in self.marks:
+            lines.append(
+                f"  {phase:<14}{elapsed:>8.1f}ms{elapsed - previous:>8.1f}ms  "
+                + (", ".join(loaded) or "-")
+            )
+            previous = elapsed
+        return "\n".join(lines)
+
+
+def report_requested(argv=None):
+    argv = sys.argv if argv is None else argv
+    return "--startup-report" in argv or bool(os.environ.get("EXPENSES_STARTUP_REPORT"))
+
+
+startup = StartupTimer()